@@ -72,7 +72,6 @@ Idvec = np.arange(8.0,27.0,1.0)
 mdotvec = np.array([5.5]) * cc.sccm2eqA
 
 # Sweep over all temperatures
-dflist = []
 for TgK in [2000.,3000.,4000.]:
     path, df = solve(Idvec, mdotvec, M_db, dc_db, do_db, Lo_db, Lupstream, Lemitter, eiz_db, TgK,
                      fname, verbose=True,phi_s=phisvec)
@@ -85,3 +84,4 @@ mdotvec = np.arange(4.0,10.5,0.5) * cc.sccm2eqA
 TgK = 3000
 path, df = solve(Idvec, mdotvec, M_db, dc_db, do_db, Lo_db, Lupstream, Lemitter, eiz_db, TgK,
                  fname, verbose=True,phi_s=phisvec)
+dflist.append(df)
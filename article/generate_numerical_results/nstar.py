@@ -82,7 +82,6 @@ mdotvec = np.array([3.7, 10.0]) # sccm
 mdotvec *= cc.sccm2eqA
 
 # Sweep over all temperatures
-dflist = []
 for TgK in [2000.,3000.,4000.]:
     path, df = solve(Idvec, mdotvec, M_db, dc_db, do_db, Lo_db, Lupstream, Lemitter, eiz_db, TgK,
                      fname, verbose=True,phi_s=phisvec)
@@ -96,4 +95,4 @@ mdotvec *= cc.sccm2eqA
 TgK = 3000
 path, df = solve(Idvec, mdotvec, M_db, dc_db, do_db, Lo_db, Lupstream, Lemitter, eiz_db, TgK,
                  fname, verbose=True,phi_s=phisvec)
-
+dflist.append(df)
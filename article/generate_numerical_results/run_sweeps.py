@@ -0,0 +1,100 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: run_sweeps.py
+Date: October, 2026
+Description: run the sweeps listed in a manifest (sweeps.toml by default) as a single
+batch on a process pool, and record each run in the simulation inventory.
+This replaces launching the per-cathode scripts one by one. Sweeps with an "adaptive"
+table are refined along one axis (see poctools.adaptive) after the batch.
+
+Usage:
+    python run_sweeps.py [sweeps.toml] [--nproc N] [--only nstar nexis ...] [--no-cache] [--resume]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append('../../')
+from poctools.manifest import load_manifest
+from poctools.sweep import run_sweeps
+from poctools.adaptive import run_adaptive
+from poctools.cache import SolveCache
+from poctools.inventory import inventory_row, append_inventory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the sweeps of a manifest on a process pool")
+    parser.add_argument('manifest', nargs='?', default='sweeps.toml',
+                        help="TOML manifest (default: sweeps.toml)")
+    parser.add_argument('--nproc', type=int, default=None,
+                        help="Number of worker processes (default: all cores)")
+    parser.add_argument('--block-size', type=int, default=1,
+                        help="Maximum number of operating points per call to solve()")
+    parser.add_argument('--precision', default='float64', choices=['float64', 'float32'],
+                        help="Storage precision of the computed columns (default: float64)")
+    parser.add_argument('--only', nargs='+', default=None,
+                        help="Only run the listed cathode entries")
+    parser.add_argument('--output-dir', default='.',
+                        help="Directory where the HDF5 files are written")
+    parser.add_argument('--cache', default='.solve_cache',
+                        help="Directory of the solve cache (default: .solve_cache)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recompute every operating point")
+    parser.add_argument('--orifice-tables', default='.orifice_tables',
+                        help="Directory of the persistent orifice tables (default: .orifice_tables)")
+    parser.add_argument('--no-orifice-tables', action='store_true',
+                        help="Recompute the orifice stage of each sweep from scratch")
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume interrupted sweeps from their completion ledgers")
+    parser.add_argument('--inventory', default='../../simulation_inventory.csv',
+                        help="Simulation inventory to append to")
+    args = parser.parse_args()
+
+    entries = load_manifest(args.manifest, only=args.only)
+    if len(entries) == 0:
+        print("Nothing to run")
+        return
+
+    sweeps = []
+    for _, sw in entries:
+        sw.savefile = os.path.join(args.output_dir, sw.cathode.fname)
+        sweeps.append(sw)
+
+    cache = None if args.no_cache else SolveCache(args.cache)
+    dense = [sw for sw in sweeps if sw.adaptive is None]
+    results = iter(run_sweeps(dense, nproc=args.nproc, cache=cache, checkpoint=True, resume=args.resume,
+                              block_size=args.block_size, precision=args.precision,
+                              orifice_tables=None if args.no_orifice_tables else args.orifice_tables))
+    results = [next(results) if sw.adaptive is None else run_adaptive(sw, nproc=args.nproc, cache=cache)
+               for sw in sweeps]
+
+    rows = []
+    for (entry, sw), runs in zip(entries, results):
+        for key, df in runs:
+            rows.append(inventory_row(entry, key, df, sw.description))
+    append_inventory(args.inventory, rows)
+
+
+if __name__ == '__main__':
+    main()
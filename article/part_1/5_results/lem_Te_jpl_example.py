@@ -28,9 +28,13 @@ Description: generate Fig. 13a and 13b in Part 1 of Physics of Thermionic Orific
 We only consider the JPL LaB6 cathode for this example.
 """
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
+import sys
+sys.path.append('../../../')
+from poctools.loader import load_runs
+from poctools.envelope import envelope
+
 ### Path to HDF5 file
 path_to_results = '../../../results/jpl_lab6.h5'
 
@@ -43,40 +47,24 @@ key_root = 'Xe/simulations/results/'
 key_end = ['r20210303211954','r20210303213415','r20210303214842']
 Tgvec = [2000,3000,4000]
 
-# Create a list for each dataframe
-dlist = []
-for TgK, ke in zip(Tgvec,key_end):
-    # Create the key
-    # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-    key = key_root + str(TgK) + '/insert/' + ke
-    
-    # Read the dataframe
-    d = pd.read_hdf(path_to_results,key=key)
-    dlist.append(d)
-
-# Append everything to the first dataframe
-for d in dlist[1:]:
-    dlist[0] = dlist[0].append(d)
-
-# Aggregate dataframe
-dfall = dlist[0].copy()
+# Load all the runs in a single dataframe
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+dfall = load_runs([(path_to_results,key) for key in keys])
 
 fig, ax = plt.subplots(1,2)
 
-### Find the minimum and maximum bounds for each discharge current
-Idvec = np.unique(dfall['dischargeCurrent'])
+### Find the minimum and maximum bounds for each mass flow rate and discharge current
 mdvec = np.unique(dfall['massFlowRate_sccm'])
 dc = np.unique(dfall['insertDiameter'])
 
-min_lem = np.zeros_like(Idvec)
-max_lem = np.zeros_like(Idvec)
-
-min_te = np.zeros_like(Idvec)
-max_te = np.zeros_like(Idvec)
+env_te = envelope(dfall, 'insertElectronTemperature', by=['massFlowRate_sccm','dischargeCurrent'], skipna=False)
+env_lem = envelope(dfall, 'emissionLength', by=['massFlowRate_sccm','dischargeCurrent'], skipna=False)
 
 # Plot the bounds and fill the area for each mass flow rate
 for idx, md in enumerate(mdvec):
-    dfx = dfall[dfall['massFlowRate_sccm'] == md]
+    te = env_te[env_te['massFlowRate_sccm'] == md]
+    lem = env_lem[env_lem['massFlowRate_sccm'] == md]
     
     # Change color and style depending on the mass flow
     if idx == 0:
@@ -87,14 +75,13 @@ for idx, md in enumerate(mdvec):
         color = (0.1,0.1,0.1,0.5)
     
     # Populate vectors to plot
-    for kk, Id in enumerate(Idvec):
-        dfxx = dfx[dfx['dischargeCurrent'] == Id]
-        
-        min_te[kk] = np.min(dfxx['insertElectronTemperature'])
-        max_te[kk] = np.max(dfxx['insertElectronTemperature'])
-
-        min_lem[kk] = np.min(dfxx['emissionLength'])/dc
-        max_lem[kk] = np.max(dfxx['emissionLength'])/dc
+    Idvec = te['dischargeCurrent'].to_numpy()
+
+    min_te = te['min'].to_numpy()
+    max_te = te['max'].to_numpy()
+
+    min_lem = lem['min'].to_numpy()/dc
+    max_lem = lem['max'].to_numpy()/dc
     
     # Plot
     ax[0].fill_between(Idvec,min_lem,max_lem,color=color)
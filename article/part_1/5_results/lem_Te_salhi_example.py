@@ -27,9 +27,12 @@ Description: generate Fig. 13a and 13b in Part 1 of Physics of Thermionic Orific
 We only consider Salhi's cathode for this example.
 """
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
+import sys
+sys.path.append('../../../')
+from poctools.loader import load_runs
+
 ### Path to HDF5 file
 path_to_results = '../../../results/salhi_xe.h5'
 
@@ -42,23 +45,10 @@ key_root = 'Xe/simulations/results/'
 key_end = ['r20210304172101','r20210304172637','r20210304173212']
 Tgvec = [2000,3000,4000]
 
-# Create a list for each dataframe
-dlist = []
-for TgK, ke in zip(Tgvec,key_end):
-    # Create the key
-    # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-    key = key_root + str(TgK) + '/insert/' + ke
-    
-    # Read the dataframe
-    d = pd.read_hdf(path_to_results,key=key)
-    dlist.append(d)
-
-# Append everything to the first dataframe
-for d in dlist[1:]:
-    dlist[0] = dlist[0].append(d)
-
-# Aggregate dataframe
-dfall = dlist[0].copy()
+# Load all the runs in a single dataframe
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+dfall = load_runs([(path_to_results,key) for key in keys])
 
 fig, ax = plt.subplots(1,2)
 
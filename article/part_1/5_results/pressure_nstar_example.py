@@ -28,9 +28,13 @@ Description: generate Fig. 14a and 14b in Part 1 of Physics of Thermionic Orific
 The data presented are for a neutral gas temperature of 3000 K
 """
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
+import sys
+sys.path.append('../../../')
+from poctools.loader import load_runs
+from poctools.opindex import OperatingPointIndex
+
 ### Path to HDF5 file
 path_to_results = '../../../results/nstar.h5'
 
@@ -43,28 +47,16 @@ key_root = 'Xe/simulations/results/'
 key_end = ['r20210304225118','r20210305144515']
 TgK = 3000
 
-# Create a list for each dataframe
-dlist = []
-for ke in key_end:
-    # Create the key
-    # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-    key = key_root + str(TgK) + '/insert/' + ke
-    
-    # Read the dataframe
-    d = pd.read_hdf(path_to_results,key=key)
-    dlist.append(d)
-
-# Append everything to the first dataframe
-for d in dlist[1:]:
-    dlist[0] = dlist[0].append(d)
-
-# Aggregate dataframe
-dfall = dlist[0].copy()
+# Load all the runs in a single dataframe
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+keys = [key_root + str(TgK) + '/insert/' + ke for ke in key_end]
+dfall = load_runs([(path_to_results,key) for key in keys])
+index = OperatingPointIndex(dfall)
 
 fig, ax = plt.subplots(1,2)
 
 ### Get data for mass flow of 3.7 sccm
-dfx = dfall[np.isclose(dfall['massFlowRate_sccm'],3.7)]
+dfx = index.select(mdot_sccm=3.7)
 
 # Plot curve for each sheath voltage
 for phis in np.unique(dfx['sheathVoltage']):
@@ -75,7 +67,7 @@ for phis in np.unique(dfx['sheathVoltage']):
     ax[0].plot(Idvec,Pvec)
     
 ### Get data for discharge current of 12 A
-dfx = dfall[np.isclose(dfall['dischargeCurrent'],12.)]
+dfx = index.select(Id=12.)
 
 # Plot curve for each sheath voltage
 for phis in np.unique(dfx['sheathVoltage']):
@@ -27,9 +27,13 @@ Date: March, 2021
 Description: generate Fig. 12a in Part 1 of Physics of Thermionic Orificed Hollow Cathodes.
 """
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
+import sys
+sys.path.append('../../../')
+from poctools.loader import load_runs
+from poctools.envelope import envelope
+
 ### Path to HDF5 file
 path_to_results = '../../../results/nstar.h5'
 
@@ -42,34 +46,16 @@ key_root = 'Xe/simulations/results/'
 key_end = ['r20210304223500','r20210304225118','r20210304230806']
 Tgvec = [2000,3000,4000]
 
-# Create a list for each dataframe
-dlist = []
-for TgK, ke in zip(Tgvec,key_end):
-    # Create the key
-    # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-    key = key_root + str(TgK) + '/insert/' + ke
-    
-    # Read the dataframe
-    d = pd.read_hdf(path_to_results,key=key)
-    dlist.append(d)
-
-# Append everything to the first dataframe
-for d in dlist[1:]:
-    dlist[0] = dlist[0].append(d)
-
-# Aggregate dataframe
-dfall = dlist[0].copy()
+# Load all the runs in a single dataframe
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+dfall = load_runs([(path_to_results,key) for key in keys])
 
 ### Find the minimum and maximum bounds for each discharge current
-Idvec = np.unique(dfall['dischargeCurrent'])
-minTw = np.zeros_like(Idvec)
-maxTw = np.zeros_like(Idvec)
-
-for kk, Id in enumerate(Idvec):
-    dfx = dfall[dfall['dischargeCurrent'] == Id]
-    
-    minTw[kk] = np.min(dfx['insertTemperature'])
-    maxTw[kk] = np.max(dfx['insertTemperature'])
+env = envelope(dfall, 'insertTemperature', by='dischargeCurrent', skipna=False)
+Idvec = env['dischargeCurrent'].to_numpy()
+minTw = env['min'].to_numpy()
+maxTw = env['max'].to_numpy()
 
 # Plot results
 plt.plot(Idvec,minTw,'k-')
@@ -29,11 +29,14 @@ This script requires the collision cross sections for argon.
 """
 
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
-import cathode.constants as cc
-from scipy.optimize import root
-from cathode.models.taunay_et_al_core.collision_holder import collision_holder
+
+import sys
+sys.path.append('../../../')
+from poctools.xsec_table import CollisionTable
+from poctools.loader import load_runs
+from poctools.envelope import envelope
+from poctools.wall_temperature import WorkFunction, add_wall_temperatures
 
 ### Path to HDF5 file
 path_to_results = '../../../results/salhi_ar.h5'
@@ -47,76 +50,26 @@ key_root = 'Ar/simulations/results/'
 key_end = ['r20210309170114','r20210309180313','r20210309190430']
 Tgvec = [2000,3000,4000]
 
-# Create a list for each dataframe
-dlist = []
-for TgK, ke in zip(Tgvec,key_end):
-    # Create the key
-    # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-    key = key_root + str(TgK) + '/insert/' + ke
-    
-    # Read the dataframe
-    d = pd.read_hdf(path_to_results,key=key)
-    dlist.append(d)
-
-# Append everything to the first dataframe
-for d in dlist[1:]:
-    dlist[0] = dlist[0].append(d)
-
-# Aggregate dataframe
-dfall = dlist[0].copy()
-dfall.reset_index(inplace=True)
+# Load all the runs in a single dataframe
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+dfall = load_runs([(path_to_results,key) for key in keys])
 dfx = dfall.dropna() # Drop NaN's to avoid issues when computing wall temperature
 
-### Create a collision holder
-chold = collision_holder('Ar')
+### Load the argon cross sections (parsed once, then read from ../../../.xsec_tables)
+chold = CollisionTable('Ar', data_dir='../../../data', directory='../../../.xsec_tables')
 
 ### For Salhi's argon cathode we must recompute the wall temperature because the code only considers
 ### Ba-O for now. We also consider two constant work functions for Salhi's cathode (1.8 and 2.0 eV)
-RDConstant = 120e4
-for wf in [1.8, 2.0]:
-    phi_wf = lambda Tw: wf # Constant work function
-    
-    for index, row in dfx.iterrows():
-        ### Unpack data
-        dc = row['insertDiameter']
-        Lem_i = row['emissionLength']
-        phi_s = row['sheathVoltage']
-        Te_i = row['insertElectronTemperature']
-        M = row['mass']
-        al_i = row['insertIonizationFraction']
-        ng_i = row['insertNeutralDensity']
-        Id = row['dischargeCurrent']
-    
-        #### Solve for the wall temperature     
-        V_i = np.pi * Lem_i * (dc/2)**2
-        f_Ir = 1/4 * np.sqrt(8*M/(np.pi*cc.me)) * np.exp(-phi_s/Te_i)
-        f_Ii = 1
-        
-        rhs = al_i / (1-al_i) * ng_i**2 * cc.e * chold.xsec('iz',Te_i) * V_i
-        rhs *= (f_Ir-f_Ii)
-        rhs += Id
-        
-        rhs /= (np.pi * Lem_i * dc * RDConstant)
-        lhs = lambda Tw: Tw**2 * np.exp(-cc.e*(phi_wf(Tw))/(cc.kB*Tw))
- 
-        
-        # Solve    
-        sol = root(lambda Tw: lhs(Tw)-rhs,1500)
-        Tw = sol.x[0] - 273.15 # to degC
-        
-        # Update the corresponding quantity
-        dfx.loc[index,'insertTemperature'] = Tw
+models = [WorkFunction(1.8), WorkFunction(2.0)]
+dfx = add_wall_temperatures(dfx, models, chold={'Ar':chold})
 
+for wf in models:
     ### Now, for each discharge current, compute minimum / maximum wall temperature, then display
-    Idvec = np.unique(dfall['dischargeCurrent'])
-    minTw = np.zeros_like(Idvec)
-    maxTw = np.zeros_like(Idvec)
-    
-    for kk,Id in enumerate(Idvec):
-        dfxx = dfx[dfx['dischargeCurrent'] == Id]
-        
-        minTw[kk] = np.min(dfxx['insertTemperature'])
-        maxTw[kk] = np.max(dfxx['insertTemperature'])    
+    env = envelope(dfx, 'insertTemperature_' + wf.name, by='dischargeCurrent', skipna=False)
+    Idvec = env['dischargeCurrent'].to_numpy()
+    minTw = env['min'].to_numpy()
+    maxTw = env['max'].to_numpy()
     
     ### Plot data
     plt.plot(Idvec,minTw,'k-',label='_nolegend_')
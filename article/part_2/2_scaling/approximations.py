@@ -29,18 +29,23 @@ Description: generate Fig. 3 and 4 in Part 2 of Physics of Thermionic Orificed H
 """
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
 import cathode.constants as cc
 
 from cathode.models.taunay_et_al_core.correlation import Te_insert
-from cathode.models.taunay_et_al_core.collision_holder import collision_holder
+
+import sys
+sys.path.append('../../../')
+from poctools.xsec_table import CollisionTable
+from poctools.loader import load_runs
+from poctools.opindex import OperatingPointIndex
+from poctools.envelope import envelope
 
 ### Recreate Figure 3
 Pd = np.logspace(-1,1,20)
 
 for sp in ['Ar','Xe']:
-    ### Create a collision holder
-    chold = collision_holder(sp)
+    ### Load the cross sections (parsed once, then read from ../../../.xsec_tables)
+    chold = CollisionTable(sp, data_dir='../../../data', directory='../../../.xsec_tables')
 
     ng = Pd*cc.Torr / (cc.kB * 3000) # Density 
     ds = 1.0e-2 # 1 cm, arbitrary
@@ -85,43 +90,32 @@ mass_flow_rates = [
 Tgvec = [2000,3000,4000]
 
 ax_idx = 0
+### Load all the runs in a single call
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+runs = [(path_to_results, key_root + str(TgK) + '/insert/' + ke)
+        for path_to_results, key_end in zip(hdf5_paths,end_keys)
+        for TgK, ke in zip(Tgvec,key_end)]
+data = load_runs(list(dict.fromkeys(runs)))
+
 for path_to_results, key_end, mdot_sccm in zip(hdf5_paths,end_keys,mass_flow_rates):
-    # Create a list for each dataframe
-    dlist = []
-    for TgK, ke in zip(Tgvec,key_end):
-        # Create the key
-        # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-        key = key_root + str(TgK) + '/insert/' + ke
-        
-        # Read the dataframe
-        d = pd.read_hdf(path_to_results,key=key)
-        dlist.append(d)
-
-    # Append everything to the first dataframe
-    for d in dlist[1:]:
-        dlist[0] = dlist[0].append(d)
-
-    # Aggregate dataframe
-    dfall = dlist[0].copy()
+    # Select the runs of this cathode
+    keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+    dfall = data[(data['path'] == path_to_results) & data['key'].isin(keys)]
+    index = OperatingPointIndex(dfall)
 
     ### Get data for specified mass flow rate in sccm 
-    dfx = dfall[np.isclose(dfall['massFlowRate_sccm'],mdot_sccm)]
-
-    Idvec = np.unique(dfx['dischargeCurrent'])
-    alpha_i = np.zeros_like(Idvec)
-    ne_o = np.zeros_like(Idvec)
-    sqrt_t = np.zeros_like(Idvec)
-
-    for kk, Id in enumerate(Idvec):
-        dfxx = dfx[dfx['dischargeCurrent'] == Id]
-        alpha_i[kk] = np.nanmean(dfxx['insertIonizationFraction'])
-        ne_o[kk] = np.nanmean(dfxx['orificeNeutralDensity'])
-
-        alpha_o = (dfxx['orificeIonizationFraction'])
-        Tn = (dfxx['neutralGasTemperature'])
-        Te = (dfxx['orificeElectronTemperature'] * cc.eV2Kelvin)
-        sqrt_t[kk] = np.sqrt(np.nanmean((1 + alpha_o * Te/Tn)))
-        print(alpha_o)
+    dfx = index.select(mdot_sccm=mdot_sccm)
+
+    ### Averages over the gas temperatures and sheath voltages for each discharge current
+    alpha_o = (dfx['orificeIonizationFraction'])
+    Tn = (dfx['neutralGasTemperature'])
+    Te = (dfx['orificeElectronTemperature'] * cc.eV2Kelvin)
+
+    env = envelope(dfx, 'insertIonizationFraction', by='dischargeCurrent', stats=('mean',))
+    Idvec = env['dischargeCurrent'].to_numpy()
+    alpha_i = env['mean'].to_numpy()
+    ne_o = envelope(dfx, 'orificeNeutralDensity', by='dischargeCurrent', stats=('mean',))['mean'].to_numpy()
+    sqrt_t = np.sqrt(envelope(dfx, 1 + alpha_o * Te/Tn, by='dischargeCurrent', stats=('mean',))['mean'].to_numpy())
 
     ax[0][ax_idx].plot(Idvec,alpha_i,'k-')
     ax[1][ax_idx].plot(Idvec,ne_o,'k-')
@@ -27,10 +27,15 @@ Date: February, 2022
 Description: generate Fig. 5 in Part 2 of Physics of Thermionic Orificed Hollow Cathodes.
 """
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import cathode.constants as cc
 
+import sys
+sys.path.append('../../../')
+from poctools.loader import load_runs
+from poctools.opindex import OperatingPointIndex
+from poctools.envelope import envelope
+
 ### Path to HDF5 file
 hdf5_paths = [
         '../../../results/nstar.h5',
@@ -214,24 +219,18 @@ xp_te_all = [
         
 
 fig, ax = plt.subplots(2,1)
-for path_to_results, key_end, lem_data, te_data in zip(hdf5_paths,end_keys,xp_lem_all, xp_te_all):
-    # Create a list for each dataframe
-    dlist = []
-    for TgK, ke in zip(Tgvec,key_end):
-        # Create the key
-        # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-        key = key_root + str(TgK) + '/insert/' + ke
-        
-        # Read the dataframe
-        d = pd.read_hdf(path_to_results,key=key)
-        dlist.append(d)
-
-    # Append everything to the first dataframe
-    for d in dlist[1:]:
-        dlist[0] = dlist[0].append(d)
+### Load all the runs in a single call
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+runs = [(path_to_results, key_root + str(TgK) + '/insert/' + ke)
+        for path_to_results, key_end in zip(hdf5_paths,end_keys)
+        for TgK, ke in zip(Tgvec,key_end)]
+data = load_runs(list(dict.fromkeys(runs)))
 
-    # Aggregate dataframe
-    dfall = dlist[0].copy()
+for path_to_results, key_end, lem_data, te_data in zip(hdf5_paths,end_keys,xp_lem_all, xp_te_all):
+    # Select the runs of this cathode
+    keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+    dfall = data[(data['path'] == path_to_results) & data['key'].isin(keys)]
+    index = OperatingPointIndex(dfall)
 
     ### Find the minimum and maximum bounds for each data point
     # Here we have as many discharge current points as there are data points
@@ -248,19 +247,18 @@ for path_to_results, key_end, lem_data, te_data in zip(hdf5_paths,end_keys,xp_le
     xerr = np.zeros((2,len(ave_pd)))
 
     for idx, md in enumerate(mdvec):
-        dfx = dfall[np.isclose(dfall['massFlowRate_sccm'],md)]
+        dfx = index.select(mdot_sccm=md)
         
         xp_lem = np.copy(lem_data)
 
         if not dfx.empty:
             # Populate vectors to plot
-            for kk, Id in enumerate(Idvec):
-                dfxx = dfx[dfx['dischargeCurrent'] == Id]
-
-                if not dfxx.empty:
-                    min_pd[kk] = np.nanmin(dfxx['neutralPressure'] / cc.Torr * dfxx['insertDiameter'] * 1e2)
-                    max_pd[kk] = np.nanmax(dfxx['neutralPressure'] / cc.Torr * dfxx['insertDiameter'] * 1e2)
-                    ave_pd[kk] = np.nanmean(dfxx['neutralPressure'] / cc.Torr * dfxx['insertDiameter'] * 1e2)
+            env = envelope(dfx, dfx['neutralPressure'] / cc.Torr * dfx['insertDiameter'] * 1e2,
+                           by='dischargeCurrent').set_index('dischargeCurrent').reindex(Idvec)
+            found = env['count'].notna().to_numpy()
+            min_pd[found] = env['min'].to_numpy()[found]
+            max_pd[found] = env['max'].to_numpy()[found]
+            ave_pd[found] = env['mean'].to_numpy()[found]
             
             xerr[0,:] = np.copy(ave_pd-min_pd)
             xerr[1,:] = np.copy(max_pd-ave_pd)
@@ -281,20 +279,19 @@ for path_to_results, key_end, lem_data, te_data in zip(hdf5_paths,end_keys,xp_le
     xerr = np.zeros((2,len(ave_pd)))
 
     for idx, md in enumerate(mdvec):
-        dfx = dfall[np.isclose(dfall['massFlowRate_sccm'],md,1e-4)]
+        dfx = index.select(mdot_sccm=md)
         
         xp_te = np.copy(te_data)
 
         if not dfx.empty:
 
             # Populate vectors to plot
-            for kk, Id in enumerate(Idvec):
-                dfxx = dfx[dfx['dischargeCurrent'] == Id]
-
-                if not dfxx.empty:
-                    min_pd[kk] = np.nanmin(dfxx['neutralPressure'] / cc.Torr * dfxx['insertDiameter'] * 1e2)
-                    max_pd[kk] = np.nanmax(dfxx['neutralPressure'] / cc.Torr * dfxx['insertDiameter'] * 1e2)
-                    ave_pd[kk] = np.nanmean(dfxx['neutralPressure'] / cc.Torr * dfxx['insertDiameter'] * 1e2)
+            env = envelope(dfx, dfx['neutralPressure'] / cc.Torr * dfx['insertDiameter'] * 1e2,
+                           by='dischargeCurrent').set_index('dischargeCurrent').reindex(Idvec)
+            found = env['count'].notna().to_numpy()
+            min_pd[found] = env['min'].to_numpy()[found]
+            max_pd[found] = env['max'].to_numpy()[found]
+            ave_pd[found] = env['mean'].to_numpy()[found]
             
             xerr[0,:] = np.copy(ave_pd-min_pd)
             xerr[1,:] = np.copy(max_pd-ave_pd)
@@ -302,7 +299,7 @@ for path_to_results, key_end, lem_data, te_data in zip(hdf5_paths,end_keys,xp_le
             fmt = 'ko'
 
             # Trick for S&W to avoid plotting the same data multiple times
-            if Id == 2.3:
+            if Idvec[-1] == 2.3:
                 ax[1].errorbar(ave_pd[idx], xp_te[idx,2], yerr=xp_te[idx,3],
                         xerr=np.array([
                             [xerr[0,idx]],
@@ -27,9 +27,13 @@ Date: February, 2022
 Description: generate Fig. 5 in Part 2 of Physics of Thermionic Orificed Hollow Cathodes.
 """
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
+import sys
+sys.path.append('../../../')
+from poctools.loader import load_runs
+from poctools.opindex import OperatingPointIndex
+
 ### Path to HDF5 file
 hdf5_paths = [
         '../../../results/siegfried.h5',
@@ -67,34 +71,28 @@ i_plt_idx = 0
 j_plt_idx = 0
 
 Tgvec = [2000,3000,4000]
+### Load all the runs in a single call
+# 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+runs = [(path_to_results, key_root + str(TgK) + '/insert/' + ke)
+        for path_to_results, key_root, key_end in zip(hdf5_paths,root_keys,end_keys)
+        for TgK, ke in zip(Tgvec,key_end)]
+data = load_runs(list(dict.fromkeys(runs)))
+
 for path_to_results, key_root, key_end, mdot_sccm in zip(hdf5_paths,root_keys,end_keys,
         mass_flow_rates):
-    # Create a list for each dataframe
-    dlist = []
-    for TgK, ke in zip(Tgvec,key_end):
-        # Create the key
-        # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-        key = key_root + str(TgK) + '/insert/' + ke
-        
-        # Read the dataframe
-        d = pd.read_hdf(path_to_results,key=key)
-        dlist.append(d)
-
-    # Append everything to the first dataframe
-    for d in dlist[1:]:
-        dlist[0] = dlist[0].append(d)
-
-    # Aggregate dataframe
-    dfall = dlist[0].copy()
+    # Select the runs of this cathode
+    keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
+    dfall = data[(data['path'] == path_to_results) & data['key'].isin(keys)]
+    index = OperatingPointIndex(dfall)
 
     ### Get data
     if cat_idx == 0:
-        dfx = dfall[np.isclose(dfall['dischargeCurrent'],2.3)]
+        dfx = index.select(Id=2.3)
         dfxx = dfx
         Idvec = np.array(dfxx['massFlowRate_sccm'])
         Idvec = np.unique(Idvec)
     else:
-        dfx = dfall[np.isclose(dfall['massFlowRate_sccm'],mdot_sccm)]
+        dfx = index.select(mdot_sccm=mdot_sccm)
         dfxx = dfx
         Idvec = np.array(dfxx['dischargeCurrent'])
         Idvec = np.unique(Idvec)
@@ -105,9 +103,9 @@ for path_to_results, key_root, key_end, mdot_sccm in zip(hdf5_paths,root_keys,en
     rma_arr = []
     for Id in np.unique(Idvec): 
         if cat_idx == 0:
-            dfxxx = dfxx[np.isclose(dfxx.massFlowRate_sccm, Id,1e-2)]
+            dfxxx = index.select(Id=2.3, mdot_sccm=Id)
         else:
-            dfxxx = dfxx[dfxx.dischargeCurrent == Id]
+            dfxxx = index.select(mdot_sccm=mdot_sccm, Id=Id)
 
         rgd = (dfxxx['gasdynamicPressure']+dfxxx['exitStaticPressure'])/dfxxx['totalPressure']
         rmf = dfxxx['momentumFluxPressure']/dfxxx['totalPressure']
@@ -29,7 +29,10 @@ Description: generate Fig. 2 in Part 2 of Physics of Thermionic Orificed Hollow
 """
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
+
+import sys
+sys.path.append('../../../')
+from poctools.envelope_store import EnvelopeStore, load_envelopes
 
 
 # Path to HDF5 files
@@ -158,6 +161,9 @@ fig, ax = plt.subplots(3,2)
 idx_i = 0
 idx_j = 0
 
+### Envelopes are read from their materialized views, computed on first use
+envelopes = EnvelopeStore('../../../results/envelopes')
+
 for path_to_results, key_root, key_end, lims, xp_data in zip(hdf5_paths,root_keys,end_keys,xylims,
         xp_data_all): 
     ### Generate a dataframe out of results for the following parameters:
@@ -167,37 +173,19 @@ for path_to_results, key_root, key_end, lims, xp_data in zip(hdf5_paths,root_key
     # Sheath voltage = 1-10 V
     Tgvec = [2000,3000,4000]
 
-    # Create a list for each dataframe
-    dlist = []
-    for TgK, ke in zip(Tgvec,key_end):
-        # Create the key
-        # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
-        key = key_root + str(TgK) + '/insert/' + ke
-        
-        # Read the dataframe
-        d = pd.read_hdf(path_to_results,key=key)
-        dlist.append(d)
-
-    # Append everything to the first dataframe
-    for d in dlist[1:]:
-        dlist[0] = dlist[0].append(d)
-
-    # Aggregate dataframe
-    dfall = dlist[0].copy()
+    # Runs of this cathode
+    # 'Xe/simulations/results/<temperature>/insert/r<UTC time results were written>'
+    keys = [key_root + str(TgK) + '/insert/' + ke for TgK, ke in zip(Tgvec,key_end)]
 
     ### Find the minimum and maximum bounds for each discharge current
-    for idx,md in enumerate(np.unique(dfall['massFlowRate_eqA'])):
-        dfx = dfall[dfall['massFlowRate_eqA']==md]
-        Idvec = np.unique(dfx['dischargeCurrent'])
-        
-        min_ratio = np.zeros_like(Idvec)
-        max_ratio = np.zeros_like(Idvec)
+    env = load_envelopes([(path_to_results,key) for key in keys], 'pressureRatio',
+                         by=['massFlowRate_eqA','dischargeCurrent'], store=envelopes)
+    for idx,md in enumerate(np.unique(env['massFlowRate_eqA'])):
+        envx = env[env['massFlowRate_eqA']==md]
+        Idvec = envx['dischargeCurrent'].to_numpy()
         
-        for kk, Id in enumerate(Idvec):
-            dfxx = dfx[dfx['dischargeCurrent'] == Id]
-            
-            min_ratio[kk] = np.nanmin(dfxx['totalPressureCorr']/dfxx['magneticPressure'])
-            max_ratio[kk] = np.nanmax(dfxx['totalPressureCorr']/dfxx['magneticPressure'])
+        min_ratio = envx['min'].to_numpy()
+        max_ratio = envx['max'].to_numpy()
 
         # Plot results
         ax[idx_i][idx_j].loglog(Idvec/md,min_ratio,'k-')
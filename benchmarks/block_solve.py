@@ -0,0 +1,86 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: block_solve.py
+Date: October, 2026
+Description: benchmark of the block solve path (one call to solve() per block of
+operating points) against the single-point path (one call per operating point).
+Both paths are run on the same points and their outputs are compared. solve() handles
+the points of a block one after the other: the difference measured here is the per-call
+and process round-trip overhead, not a vectorized residual.
+
+Usage (from the ./benchmarks folder):
+    python block_solve.py [--entry nexis] [--nproc 1] [--block-size 40]
+"""
+import sys
+import time
+import argparse
+import tempfile
+import os
+
+import numpy as np
+
+sys.path.append('../')
+from poctools.manifest import load_manifest
+from poctools.sweep import prime_orifice, run_points
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block vs. single-point solve benchmark")
+    parser.add_argument('--manifest', default='../article/generate_numerical_results/sweeps.toml')
+    parser.add_argument('--entry', default='nexis')
+    parser.add_argument('--sweep', type=int, default=1, help="Index of the sweep of the entry")
+    parser.add_argument('--TgK', type=float, default=3000.)
+    parser.add_argument('--nproc', type=int, default=1)
+    parser.add_argument('--block-size', type=int, default=40)
+    args = parser.parse_args()
+
+    _, sw = load_manifest(args.manifest, only=[args.entry])[args.sweep]
+    sw.TgKvec = np.array([args.TgK])
+    points = sw.points()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        orifice_file = os.path.join(tmpdir, 'orifice.h5')
+        Idvec, mdotvec = sw.orifice_grid()
+        prime_orifice(sw.cathode, sw.TgKvec, Idvec, mdotvec, orifice_file, args.nproc)
+
+        timings = {}
+        outputs = {}
+        for label, block_size in [('single point', 1), ('block', args.block_size)]:
+            t0 = time.perf_counter()
+            outputs[label] = run_points(points, orifice_file, args.nproc, block_size)
+            timings[label] = time.perf_counter() - t0
+
+    num = outputs['block'][0].select_dtypes(include=np.number).columns
+    max_diff = max(np.nanmax(np.abs(a[num].to_numpy() - b[num].to_numpy()))
+                   for a, b in zip(outputs['single point'], outputs['block']))
+
+    print(sw.cathode.name, ":", len(points), "operating points,", args.nproc, "processes")
+    for label, t in timings.items():
+        print("{:>14s}: {:8.2f} s, {:8.2f} ms/point".format(label, t, 1e3 * t / len(points)))
+    print("Speedup: {:.2f}".format(timings['single point'] / timings['block']))
+    print("Maximum absolute difference:", max_diff)
+
+
+if __name__ == '__main__':
+    main()
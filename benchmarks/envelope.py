@@ -0,0 +1,96 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: envelope.py
+Date: October, 2026
+Description: benchmark of poctools.envelope against the mask-per-group loops of the
+article scripts, on a synthetic parameter atlas with the structure of the results
+(cathode x mass flow rate x discharge current x gas temperature x sheath voltage).
+Both methods are checked to give the same envelopes.
+
+Usage (from the ./benchmarks folder):
+    python envelope.py [--cathodes 20] [--mdot 10] [--Id 100]
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('../')
+from poctools.envelope import envelope
+
+
+def atlas(ncathodes, nmdot, nId, seed=0):
+    ''' Synthetic results: one row per (cathode, mdot, Id, TgK, phi_s) '''
+    rng = np.random.default_rng(seed)
+    grid = np.meshgrid(np.arange(ncathodes), np.linspace(1., 20., nmdot), np.linspace(5., 100., nId),
+                       [2000., 3000., 4000.], [1., 4., 7., 10.], indexing='ij')
+    df = pd.DataFrame({c: g.ravel() for c, g in zip(
+        ['cathode', 'massFlowRate_sccm', 'dischargeCurrent', 'neutralGasTemperature', 'sheathVoltage'], grid)})
+    df['totalPressureCorr'] = rng.lognormal(5., 1., len(df))
+    df['magneticPressure'] = rng.lognormal(2., 1., len(df))
+    return df
+
+
+def loop_envelope(df):
+    ''' Envelope computed as in the article scripts '''
+    rows = []
+    for cat in np.unique(df['cathode']):
+        dfc = df[df['cathode'] == cat]
+        for md in np.unique(dfc['massFlowRate_sccm']):
+            dfx = dfc[dfc['massFlowRate_sccm'] == md]
+            for Id in np.unique(dfx['dischargeCurrent']):
+                dfxx = dfx[dfx['dischargeCurrent'] == Id]
+                ratio = dfxx['totalPressureCorr'] / dfxx['magneticPressure']
+                rows.append((np.nanmin(ratio), np.nanmax(ratio)))
+    return np.array(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs. loop envelope benchmark")
+    parser.add_argument('--cathodes', type=int, default=20)
+    parser.add_argument('--mdot', type=int, default=10)
+    parser.add_argument('--Id', type=int, default=100)
+    args = parser.parse_args()
+
+    df = atlas(args.cathodes, args.mdot, args.Id)
+
+    t0 = time.perf_counter()
+    ref = loop_envelope(df)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    env = envelope(df, 'totalPressureCorr / magneticPressure',
+                   by=['cathode', 'massFlowRate_sccm', 'dischargeCurrent'], stats=('min', 'max'))
+    t_vec = time.perf_counter() - t0
+
+    print(len(df), "rows,", len(env), "groups")
+    print("{:>11s}: {:8.3f} s".format('loops', t_loop))
+    print("{:>11s}: {:8.3f} s".format('envelope()', t_vec))
+    print("Speedup: {:.1f}".format(t_loop / t_vec))
+    print("Identical:", np.array_equal(ref, env[['min', 'max']].to_numpy()))
+
+
+if __name__ == '__main__':
+    main()
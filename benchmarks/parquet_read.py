@@ -0,0 +1,130 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: parquet_read.py
+Date: October, 2026
+Description: benchmark of the read path of lem_Te_correlation.py: whole HDF5 frames
+read with pd.read_hdf and concatenated, against a projected and filtered read of the
+Parquet dataset (see poctools.dataset). Each read is done in a fresh process; the
+wall time and the peak resident memory of that process are reported.
+
+Usage (from the ./benchmarks folder):
+    python parquet_read.py [--repeat 5]
+"""
+import sys
+import time
+import json
+import argparse
+import resource
+import tempfile
+import subprocess
+
+sys.path.append('../')
+
+RESULTS = '../results/'
+
+### Files and columns used by lem_Te_correlation.py
+FILES = ['nexis_do-2.0mm', 'jpl_lab6_2cm_do-6.4mm', 'salhi_xe', 'siegfried']
+COLUMNS = ['neutralPressure', 'insertDiameter', 'massFlowRate_sccm', 'dischargeCurrent']
+
+
+def read_hdf():
+    import pandas as pd
+    frames = []
+    for name in FILES:
+        path = RESULTS + name + '.h5'
+        with pd.HDFStore(path, 'r') as store:
+            keys = [k for k in store.keys() if '/insert/' in k]
+        for key in keys:
+            frames.append(pd.read_hdf(path, key))
+    df = pd.concat(frames, ignore_index=True)
+    return df[COLUMNS]
+
+
+def read_parquet(root):
+    from poctools.dataset import read_dataset
+    return read_dataset(root, columns=COLUMNS, species='Xe', cathode=FILES)
+
+
+def _memory_kB(field):
+    ''' Field of /proc/self/status, in kB (Linux only) '''
+    with open('/proc/self/status') as fh:
+        for line in fh:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+
+
+def child(method, root):
+    ''' Run a single read in the current process and print its statistics as JSON '''
+    # Import the readers first so that the imports do not count towards the read
+    import tables
+    import poctools.dataset
+    del tables, poctools
+
+    ### Reset the peak resident memory to the current one
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh:
+            fh.write('5')
+        rss0 = _memory_kB('VmRSS')
+    except OSError:
+        rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    t0 = time.perf_counter()
+    df = read_hdf() if method == 'hdf' else read_parquet(root)
+    dt = time.perf_counter() - t0
+    peak = _memory_kB('VmHWM') or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'time': dt, 'peak_MB': peak / 1024., 'increase_MB': (peak - rss0) / 1024.,
+                      'rows': len(df)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HDF5 vs. Parquet read benchmark")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(*args.child)
+        return
+
+    from poctools.dataset import export_dataset
+
+    with tempfile.TemporaryDirectory() as root:
+        export_dataset([RESULTS + name + '.h5' for name in FILES], root)
+
+        for method in ['hdf', 'parquet']:
+            runs = []
+            for _ in range(args.repeat):
+                out = subprocess.run([sys.executable, '-W', 'ignore', __file__, '--child', method, root],
+                                     check=True, capture_output=True, text=True).stdout
+                runs.append(json.loads(out))
+
+            best = min(r['time'] for r in runs)
+            peak = max(r['peak_MB'] for r in runs)
+            increase = max(r['increase_MB'] for r in runs)
+            print("{:>8s}: {:6d} rows, {:8.1f} ms, peak RSS {:6.1f} MB (+{:5.1f} MB during the read)".format(
+                method, runs[0]['rows'], 1e3 * best, peak, increase))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: adaptive.py
+Date: October, 2026
+Description: adaptive refinement of a sweep axis. Instead of a uniform np.arange grid,
+the sweep starts from a coarse grid along the discharge current or the mass flow rate
+and only bisects the intervals where a monitored output changes faster than a
+tolerance, or where it goes from a converged to a non-converged (NaN) value, so that the
+edges of the non-converged regions are resolved. Refinement stops once intervals reach
+a minimum width, after a maximum number of passes, or when a pass adds no new values.
+
+A sweep of the manifest is run adaptively if it has an "adaptive" table, e.g.
+    adaptive = {axis = "Id", rtol = 0.05, max_passes = 6}
+(see run_adaptive() and article/generate_numerical_results/run_sweeps.py).
+"""
+import tempfile
+import os
+
+import numpy as np
+import pandas as pd
+
+from poctools.sweep import sweep_points, prime_orifice, run_points, with_orifice, write_run
+
+### Options of the "adaptive" table of a manifest sweep
+ADAPTIVE_OPTIONS = ['axis', 'monitor', 'rtol', 'min_step', 'max_passes', 'max_points']
+
+### Outputs monitored by default
+MONITORED = ['totalPressureCorr', 'emissionLength', 'insertElectronTemperature']
+
+### Column of the results that corresponds to each sweep axis
+AXIS_COLUMNS = {'Id': 'dischargeCurrent', 'mdot': 'massFlowRate_eqA'}
+
+### Default minimum width of a refined interval, as a fraction of the widest interval of the coarse grid
+MIN_STEP_FRACTION = 1. / 32.
+
+### Default maximum number of refinement passes
+MAX_PASSES = 8
+
+
+def intervals_to_refine(df, axis, monitor=MONITORED, rtol=0.05, min_step=None):
+    '''
+    Find the intervals of the sweep axis to bisect. The curves of each monitored output
+    are taken separately for each gas temperature and sheath voltage. An interval
+    [a, b] is refined if b - a > min_step and, for any curve, either f(a) and f(b) are
+    finite and
+        |f(b) - f(a)| > rtol * max(|f(a)|, |f(b)|)
+    or exactly one of f(a) and f(b) is NaN (the edge of a non-converged region).
+    min_step defaults to MIN_STEP_FRACTION times the widest interval of the axis, i.e.
+    of the coarse grid on the first pass.
+    Returns a sorted array of midpoints that are not already values of the axis.
+    '''
+    col = AXIS_COLUMNS[axis]
+    other = AXIS_COLUMNS['mdot' if axis == 'Id' else 'Id']
+    values = np.unique(df[col])
+    if len(values) < 2:
+        return np.array([])
+
+    refine = np.zeros(len(values) - 1, dtype=bool)
+    for _, curve in df.groupby(['neutralGasTemperature', 'sheathVoltage', other]):
+        curve = curve.sort_values(col)
+        pos = np.searchsorted(values, curve[col].to_numpy())
+        for name in monitor:
+            f = curve[name].to_numpy(dtype=np.float64)
+            fa, fb = f[:-1], f[1:]
+            with np.errstate(invalid='ignore'):
+                steep = np.abs(fb - fa) > rtol * np.maximum(np.abs(fa), np.abs(fb))
+            flagged = (steep & np.isfinite(fa) & np.isfinite(fb)) | (np.isfinite(fa) != np.isfinite(fb))
+            # Map the flagged segments of this curve onto the intervals of the axis
+            for k in np.nonzero(flagged)[0]:
+                refine[pos[k]:pos[k + 1]] = True
+
+    widths = np.diff(values)
+    if min_step is None:
+        min_step = MIN_STEP_FRACTION * widths.max()
+    refine &= widths > min_step
+
+    # Midpoints of very narrow intervals can round onto an existing value
+    return np.setdiff1d(0.5 * (values[:-1] + values[1:])[refine], values)
+
+
+def _solve(points, orifice_file, nproc, cache):
+    ''' Solve points, using the cache if any '''
+    if cache is None:
+        return run_points(points, orifice_file, nproc)
+
+    hits, misses, duplicates = cache.split(points)
+    computed = run_points([points[i] for i in misses], orifice_file, nproc)
+    frames = [None] * len(points)
+    for i, df in zip(misses, computed):
+        frames[i] = df
+        cache.put(points[i], df)
+    for i, df in hits.items():
+        frames[i] = df
+    for i, first in duplicates.items():
+        frames[i] = frames[first]
+    return frames
+
+
+def adaptive_sweep(cathode, TgKvec, axis, coarse, fixed, phisvec, monitor=MONITORED,
+                   rtol=0.05, min_step=None, max_passes=MAX_PASSES, max_points=None, savefile=None,
+                   description=None, nproc=None, cache=None, verbose=True):
+    '''
+    Adaptive sweep along the discharge current or the mass flow rate.
+
+    Inputs:
+        - cathode: Cathode object
+        - TgKvec: neutral gas temperatures (K)
+        - axis: 'Id' or 'mdot'
+        - coarse: initial (coarse) values of the swept quantity (A or eqA)
+        - fixed: values of the other quantity (A or eqA)
+        - phisvec: sheath voltages (V)
+        - monitor: list of monitored outputs
+        - rtol: relative change of a monitored output above which an interval is bisected
+        - min_step: intervals narrower than this are not bisected. Defaults to
+        MIN_STEP_FRACTION times the widest interval of the coarse grid
+        - max_passes: maximum number of refinement passes
+        - max_points: maximum number of values along the axis
+        - savefile: if given, the runs are written to this HDF5 file
+        - description: "description" attribute of each run
+        - nproc: number of worker processes
+        - cache: optional SolveCache
+        - verbose: print progress
+    Outputs:
+        - axis values that were solved, sorted
+        - dictionary {TgK: DataFrame}, with the rows in the same order as solve()
+    '''
+    if axis not in AXIS_COLUMNS:
+        raise ValueError("axis must be one of " + ", ".join(AXIS_COLUMNS))
+
+    values = np.unique(np.asarray(coarse, dtype=np.float64))
+    coarse = values
+
+    def grid(values):
+        ''' Points of the new values, tagged with the orifice grid (coarse grid) '''
+        if axis == 'Id':
+            return with_orifice(sweep_points(cathode, TgKvec, values, fixed, phisvec), coarse, fixed)
+        return with_orifice(sweep_points(cathode, TgKvec, fixed, values, phisvec), fixed, coarse)
+
+    if min_step is None and len(values) > 1:
+        min_step = MIN_STEP_FRACTION * np.diff(values).max()
+
+    frames = []
+    with tempfile.TemporaryDirectory(prefix='adaptive_') as tmpdir:
+        ### The orifice solution only has to cover the coarse grid bounds
+        orifice_file = os.path.join(tmpdir, 'orifice.h5')
+        if axis == 'Id':
+            prime_orifice(cathode, TgKvec, values, fixed, orifice_file, nproc)
+        else:
+            prime_orifice(cathode, TgKvec, fixed, values, orifice_file, nproc)
+
+        new = values
+        passes = 0
+        while len(new) > 0:
+            points = grid(new)
+            frames.extend(_solve(points, orifice_file, nproc, cache))
+            passes += 1
+
+            if passes >= max_passes:
+                break
+
+            df = pd.concat(frames, ignore_index=True)
+            new = np.setdiff1d(intervals_to_refine(df, axis, monitor, rtol, min_step), values)
+            if max_points is not None:
+                new = new[:max(0, max_points - len(values))]
+
+            if verbose:
+                print(cathode.name, ": pass", passes, ",", len(values), "values,",
+                      len(new), "intervals to refine")
+            values = np.union1d(values, new)
+
+    ### Reorder the rows as in a dense sweep
+    df = pd.concat(frames, ignore_index=True)
+    sort_by = ['neutralGasTemperature', 'massFlowRate_eqA', 'dischargeCurrent', 'sheathVoltage']
+    df = df.sort_values(sort_by, kind='stable').reset_index(drop=True)
+
+    results = {}
+    for TgK, dfT in df.groupby('neutralGasTemperature', sort=False):
+        dfT = dfT.reset_index(drop=True)
+        if savefile is not None:
+            key = write_run(savefile, cathode, TgK, dfT, description)
+            if verbose:
+                print(cathode.name, ": wrote", savefile, key)
+        results[TgK] = dfT
+
+    return values, results
+
+
+def run_adaptive(sweep, nproc=None, cache=None, verbose=True):
+    '''
+    Run a sweep of the manifest (see poctools.manifest) adaptively. The axis given in
+    sweep.adaptive is refined from the values of the sweep, which act as the coarse grid;
+    the other options of sweep.adaptive are passed to adaptive_sweep().
+    Outputs:
+        - list of (key, DataFrame), one per gas temperature, as for run_sweeps()
+    '''
+    options = dict(sweep.adaptive)
+    axis = options.pop('axis')
+    if axis == 'Id':
+        coarse, fixed = sweep.Idvec, sweep.mdotvec
+    else:
+        coarse, fixed = sweep.mdotvec, sweep.Idvec
+
+    _, results = adaptive_sweep(sweep.cathode, sweep.TgKvec, axis, coarse, fixed, sweep.phisvec,
+                                nproc=nproc, cache=cache, verbose=verbose, **options)
+
+    runs = []
+    for TgK, df in results.items():
+        key = write_run(sweep.output_file(), sweep.cathode, TgK, df, sweep.description)
+        if verbose:
+            print(sweep.cathode.name, ": wrote", sweep.output_file(), key)
+        runs.append((key, df))
+    return runs
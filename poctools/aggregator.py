@@ -0,0 +1,241 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: aggregator.py
+Date: October, 2026
+Description: single-writer aggregation of the results of concurrent solver workers.
+Calling solve() from several processes on the same output file fails: each call opens
+the file (HDF5 locking errors) and names its run from the UTC time at second resolution
+(colliding 'r<timestamp>' keys). Here, a single writer process holds the only open
+handle on the output file. Workers solve in private scratch files and send their rows
+through a queue, as compact binary batches (numeric columns in one float64 buffer,
+other columns as JSON text). The writer assigns collision-free run keys and writes
+each run in one piece once all its rows have arrived.
+
+Example:
+    from poctools.aggregator import aggregated_sweep
+    keys = aggregated_sweep(cathode, [2000., 3000., 4000.], Idvec, mdotvec, phisvec, 'nstar.h5', nproc=32)
+"""
+import os
+import json
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from poctools.loader import bisection_from_json, bisection_to_json
+from poctools.sweep import (_solve_job, batch_points, copy_orifice_data, free_key, prime_orifice,
+                            sweep_points)
+
+
+def encode_rows(df):
+    '''
+    Compact binary encoding of the rows of a DataFrame.
+    Returns (header, payload): the header holds the column names and types, and the
+    non-numeric columns as JSON text; the payload holds the numeric columns as a single
+    float64 buffer, row-major.
+    '''
+    numeric = [c for c in df.columns if isinstance(df[c].dtype, np.dtype) and df[c].dtype.kind in 'biuf']
+    text = {}
+    for c in df.columns:
+        if c in numeric:
+            continue
+        values = bisection_to_json(df[c]) if c == 'bisectionOutput' else df[c].tolist()
+        text[c] = json.dumps(values)
+
+    header = {'columns': list(df.columns), 'numeric': numeric, 'nrows': len(df),
+              'dtypes': {c: df[c].dtype.str for c in numeric}, 'text': text}
+    payload = np.ascontiguousarray(df[numeric].to_numpy(dtype=np.float64)).tobytes()
+    return header, payload
+
+
+def decode_rows(header, payload):
+    ''' Inverse of encode_rows() '''
+    values = np.frombuffer(payload, dtype=np.float64).reshape(header['nrows'], len(header['numeric']))
+    data = {c: values[:, k].astype(header['dtypes'][c]) for k, c in enumerate(header['numeric'])}
+    for c, text in header['text'].items():
+        data[c] = json.loads(text)
+        if c == 'bisectionOutput':
+            data[c] = pd.Series(bisection_from_json(data[c]), dtype=object)
+    return pd.DataFrame(data, columns=header['columns'])
+
+
+def send_rows(queue, run, order, df):
+    '''
+    Send rows of a run to the writer.
+    Inputs:
+        - queue: queue of the writer (ResultWriter.queue)
+        - run: identifier of the run, as given to ResultWriter.open_run()
+        - order: position of each row in the run
+        - df: DataFrame of the rows
+    '''
+    queue.put(('rows', run, list(order)) + encode_rows(df))
+
+
+def _write(store, taken, run):
+    ''' Write a complete run with a free key. Returns the key. '''
+    order = np.concatenate([o for o, _ in run['batches']])
+    df = pd.concat([d for _, d in run['batches']], ignore_index=True)
+    df = df.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+    key = free_key(taken, run['species'], run['TgK'])
+    store.put(key, df)
+    if run['description'] is not None:
+        store.get_storer(key).attrs.description = run['description']
+    store.flush()
+    taken.add('/' + key)
+    return key
+
+
+def _writer_loop(queue, replies, savefile):
+    '''
+    Writer process. Messages:
+        - ('open', run, species, TgK, nrows, description): declare a run of nrows rows
+        - ('rows', run, order, header, payload): rows of a run
+        - ('stop',): write nothing more and reply with {run: key}
+    A run is written as soon as all its rows have arrived.
+    '''
+    keys = {}
+    runs = {}
+    try:
+        with pd.HDFStore(savefile) as store:
+            taken = set(store.keys())
+            while True:
+                msg = queue.get()
+                if msg[0] == 'stop':
+                    break
+                if msg[0] == 'open':
+                    _, run, species, TgK, nrows, description = msg
+                    runs[run] = {'species': species, 'TgK': TgK, 'nrows': nrows,
+                                 'description': description, 'received': 0, 'batches': []}
+                    continue
+
+                _, run, order, header, payload = msg
+                runs[run]['batches'].append((np.asarray(order), decode_rows(header, payload)))
+                runs[run]['received'] += header['nrows']
+                if runs[run]['received'] >= runs[run]['nrows']:
+                    keys[run] = _write(store, taken, runs.pop(run))
+
+        incomplete = sorted(str(r) for r in runs)
+        if len(incomplete) > 0:
+            replies.put(('error', "Incomplete runs were not written: " + ', '.join(incomplete), keys))
+        else:
+            replies.put(('ok', None, keys))
+    except Exception as exc:
+        replies.put(('error', repr(exc), keys))
+
+
+class ResultWriter:
+    '''
+    Writer process that owns an HDF5 output file. The queue can be passed to worker
+    processes (it is a manager queue), which send their rows with send_rows().
+    Runs must be declared with open_run() before their rows are sent.
+    '''
+    def __init__(self, savefile):
+        self.savefile = savefile
+        self.manager = multiprocessing.Manager()
+        self.queue = self.manager.Queue()
+        self.replies = self.manager.Queue()
+        self.process = multiprocessing.Process(target=_writer_loop, args=(self.queue, self.replies, savefile))
+        self.process.start()
+
+    def open_run(self, run, species, TgK, nrows, description=None):
+        self.queue.put(('open', run, species, TgK, nrows, description))
+
+    def close(self):
+        '''
+        Stop the writer once all the queued rows are written.
+        Returns {run: key} of the written runs.
+        '''
+        self.queue.put(('stop',))
+        status, message, keys = self.replies.get()
+        self.process.join()
+        self.manager.shutdown()
+        if status != 'ok':
+            raise RuntimeError("Writer of " + self.savefile + ": " + message)
+        return keys
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self.process.is_alive():
+            try:
+                self.close()
+            except RuntimeError:
+                # Do not hide the exception that interrupted the runs
+                if exc_type is None:
+                    raise
+
+
+def _solve_and_send(queue, run, order, points, orifice_file):
+    ''' Worker: solve a point or a block of points and send the rows to the writer '''
+    frames = _solve_job(points, orifice_file)
+    send_rows(queue, run, np.repeat(order, [len(df) for df in frames]),
+              pd.concat(frames, ignore_index=True))
+
+
+def aggregated_sweep(cathode, TgKvec, Idvec, mdotvec, phisvec, savefile=None, nproc=None,
+                     description=None, block_size=1):
+    '''
+    Parallel sweep in which all the workers write to the same file through a single writer.
+    Inputs:
+        - cathode: Cathode object (see poctools.sweep)
+        - TgKvec, Idvec, mdotvec, phisvec: sweep axes (K, A, eqA, V)
+        - savefile: HDF5 output file. Defaults to cathode.fname
+        - nproc: number of worker processes. Defaults to the number of cores
+        - description: "description" attribute of each run
+        - block_size: maximum number of points per call to solve()
+    Outputs:
+        - dictionary {TgK: key} of the written runs
+    '''
+    savefile = savefile or cathode.fname
+    nproc = nproc or os.cpu_count()
+
+    with tempfile.TemporaryDirectory(prefix='aggregated_') as tmpdir:
+        ### The orifice stage is computed first, in a scratch file
+        orifice_file = os.path.join(tmpdir, 'orifice.h5')
+        prime_orifice(cathode, TgKvec, Idvec, mdotvec, orifice_file, nproc)
+
+        with ResultWriter(savefile) as writer, ProcessPoolExecutor(max_workers=nproc) as executor:
+            jobs = []
+            for TgK in TgKvec:
+                points = sweep_points(cathode, [TgK], Idvec, mdotvec, phisvec)
+                writer.open_run(float(TgK), cathode.species, float(TgK), len(points), description)
+                if block_size > 1:
+                    blocks = batch_points(points, [orifice_file] * len(points), block_size)
+                else:
+                    blocks = [[k] for k in range(len(points))]
+                jobs += [executor.submit(_solve_and_send, writer.queue, float(TgK), b,
+                                         [points[k] for k in b], orifice_file) for b in blocks]
+
+            for job in jobs:
+                job.result()
+            keys = writer.close()
+
+        ### The orifice solution is added once the writer has released the file
+        for TgK in TgKvec:
+            copy_orifice_data(orifice_file, savefile, cathode.species, TgK)
+
+    return keys
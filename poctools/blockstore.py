@@ -0,0 +1,324 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: blockstore.py
+Date: October, 2026
+Description: content-addressed block store for the results/*.h5 files. Each column of
+each run, each run schema (column names and types), each run record, and each auxiliary
+array (orifice solution, conditions, geometry) is stored once, as a compressed object
+named after the SHA-256 hash of its content. Identical blocks are therefore shared across
+runs, cathodes, and geometry variants, and the store grows with the new information only.
+
+Each ingested file becomes a thin view, <root>/views/<cathode>.json, that maps the keys of
+the file to their objects. A view has the read API of pd.HDFStore (keys, select, get_storer)
+and its path can be given to poctools.loader.load_runs in place of an HDF5 file:
+
+    from poctools.loader import load_runs, insert_key
+    dfall = load_runs([('results/blocks/views/plhc.json', insert_key('Ar', 3000, 'r20210309173700'))])
+
+Usage:
+    python -m poctools.blockstore ingest results/*.h5 [--root results/blocks]
+    python -m poctools.blockstore gc [--root results/blocks]
+"""
+import io
+import os
+import json
+import zlib
+import hashlib
+import argparse
+import tempfile
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from poctools.catalog import cathode_name
+from poctools.loader import _is_json, bisection_from_json, bisection_to_json
+
+DEFAULT_ROOT = 'results/blocks'
+
+
+def _npy(arr):
+    ''' Serialize a numeric or structured array in the .npy format '''
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(arr), allow_pickle=False)
+    return buf.getvalue()
+
+
+def _json(obj):
+    return json.dumps(obj, sort_keys=True).encode()
+
+
+def _text(values):
+    ''' JSON list of the entries of a string or object column. Missing entries are null. '''
+    return _json([None if not isinstance(v, str) and pd.isna(v) else v for v in values])
+
+
+class BlockStore:
+    '''
+    Content-addressed store. Objects are zlib-compressed and stored under
+    <root>/objects/<first two hex digits>/<hash>; views are stored under <root>/views.
+    '''
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'views'), exist_ok=True)
+
+    def _path(self, h):
+        return os.path.join(self.root, 'objects', h[:2], h)
+
+    def view_path(self, cathode):
+        return os.path.join(self.root, 'views', cathode + '.json')
+
+    def views(self):
+        ''' Names of the stored views '''
+        return sorted(f[:-len('.json')] for f in os.listdir(os.path.join(self.root, 'views'))
+                      if f.endswith('.json'))
+
+    def put(self, data):
+        ''' Store bytes and return their hash. Existing objects are not rewritten. '''
+        h = hashlib.sha256(data).hexdigest()
+        path = self._path(h)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, zlib.compress(data, 6))
+        return h
+
+    def get(self, h):
+        with open(self._path(h), 'rb') as fobj:
+            return zlib.decompress(fobj.read())
+
+    def get_array(self, h):
+        return np.load(io.BytesIO(self.get(h)), allow_pickle=False)
+
+    def get_json(self, h):
+        return json.loads(self.get(h))
+
+    def _put_column(self, series):
+        '''
+        Store a column. Numeric columns are stored as .npy arrays; string and object
+        columns as JSON lists. "bisectionOutput" is stored as its JSON encoding.
+        Returns (dtype, hash).
+        '''
+        if series.name == 'bisectionOutput':
+            values = series if _is_json(series) else bisection_to_json(series)
+            return 'bisection', self.put(_text(values))
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+            return series.dtype.str, self.put(_npy(series.to_numpy()))
+        return str(series.dtype), self.put(_text(series))
+
+    def put_frame(self, df, description=None):
+        ''' Store the columns, schema, and record of a run. Returns the hash of the record. '''
+        dtypes, blocks = zip(*[self._put_column(df[c]) for c in df.columns])
+        schema = self.put(_json({'columns': list(df.columns), 'dtypes': list(dtypes)}))
+        record = {'schema': schema, 'blocks': list(blocks),
+                  'index': self.put(_npy(df.index.to_numpy())),
+                  'description': None if description is None else str(description)}
+        return self.put(_json(record))
+
+    def get_frame(self, h, columns=None):
+        ''' Read a run from the hash of its record. Only the requested columns are read. '''
+        record = self.get_json(h)
+        schema = self.get_json(record['schema'])
+        names = schema['columns'] if columns is None else columns
+
+        index = pd.Index(self.get_array(record['index']))
+        data = {}
+        for name in names:
+            idx = schema['columns'].index(name)
+            dtype, block = schema['dtypes'][idx], record['blocks'][idx]
+            if dtype == 'bisection':
+                data[name] = pd.Series(bisection_from_json(self.get_json(block)), index=index, dtype=object)
+            elif dtype[0] in '<>|':
+                # Numeric columns, stored with their numpy type string
+                data[name] = self.get_array(block)
+            else:
+                data[name] = pd.Series(self.get_json(block), index=index, dtype=dtype)
+
+        return pd.DataFrame(data, index=index, columns=names)
+
+    def ingest(self, path, cathode=None):
+        '''
+        Store all the runs and auxiliary datasets of an HDF5 result file, and write its view.
+        Inputs:
+            - path: HDF5 result file
+            - cathode: name of the view. Defaults to the file name without extension
+        Outputs:
+            - path of the view
+        '''
+        cathode = cathode or cathode_name(path)
+        runs = {}
+        with pd.HDFStore(path, 'r') as store:
+            for key in store.keys():
+                storer = store.get_storer(key)
+                runs[key.lstrip('/')] = self.put_frame(store.select(key),
+                                                       getattr(storer.attrs, 'description', None))
+
+        arrays = {}
+
+        def visit(name, obj):
+            if not isinstance(obj, h5py.Dataset) or any(name.startswith(k + '/') for k in runs):
+                return
+            if obj.dtype.kind == 'O':
+                arrays[name] = 'json:' + self.put(_json([str(v) for v in obj.asstr()[()].ravel()]))
+            else:
+                arrays[name] = self.put(_npy(obj[()]))
+
+        with h5py.File(path, 'r') as f:
+            f.visititems(visit)
+
+        view = self.view_path(cathode)
+        _write_atomic(view, json.dumps({'source': os.path.basename(path), 'runs': runs, 'arrays': arrays},
+                                       indent=1, sort_keys=True).encode())
+        return view
+
+    def referenced(self):
+        ''' Hashes of all the objects referenced by the views '''
+        refs = set()
+        for cathode in self.views():
+            with open(self.view_path(cathode)) as fobj:
+                view = json.load(fobj)
+            refs.update(h.split(':')[-1] for h in view['arrays'].values())
+            for h in view['runs'].values():
+                record = self.get_json(h)
+                refs.update([h, record['schema'], record['index']] + record['blocks'])
+        return refs
+
+    def gc(self):
+        ''' Remove the objects that no view references. Returns the number of bytes freed. '''
+        refs = self.referenced()
+        freed = 0
+        for sub in os.listdir(os.path.join(self.root, 'objects')):
+            for h in os.listdir(os.path.join(self.root, 'objects', sub)):
+                if h not in refs:
+                    freed += os.path.getsize(self._path(h))
+                    os.remove(self._path(h))
+        return freed
+
+    def count(self):
+        ''' Number of stored objects '''
+        return sum(len(os.listdir(os.path.join(self.root, 'objects', sub)))
+                   for sub in os.listdir(os.path.join(self.root, 'objects')))
+
+    def size(self):
+        ''' Size on disk of the objects (bytes) '''
+        total = 0
+        for sub in os.listdir(os.path.join(self.root, 'objects')):
+            for h in os.listdir(os.path.join(self.root, 'objects', sub)):
+                total += os.path.getsize(self._path(h))
+        return total
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fobj:
+            fobj.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class _Attrs:
+    def __init__(self, description):
+        if description is not None:
+            self.description = description
+
+
+class _Storer:
+    ''' Minimal equivalent of a pandas storer: run attributes and format '''
+    is_table = False
+
+    def __init__(self, description):
+        self.attrs = _Attrs(description)
+
+
+class BlockView:
+    '''
+    Read-only view of one ingested file, with the read API of pd.HDFStore.
+    The auxiliary datasets (e.g., 'Xe/simulations/results/3000/orifice') are returned
+    by array().
+    '''
+    def __init__(self, path):
+        self.path = path
+        with open(path) as fobj:
+            self.view = json.load(fobj)
+        self.store = BlockStore(os.path.dirname(os.path.dirname(os.path.abspath(path))))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def keys(self):
+        return ['/' + k for k in self.view['runs']]
+
+    def _record(self, key):
+        return self.view['runs'][key.lstrip('/')]
+
+    def get_storer(self, key):
+        return _Storer(self.store.get_json(self._record(key))['description'])
+
+    def select(self, key, where=None, columns=None):
+        '''
+        Read a run. Only the requested columns are decompressed. Row conditions (where)
+        are evaluated in memory.
+        '''
+        if where is not None:
+            df = self.store.get_frame(self._record(key))
+            df = df.query(' & '.join('(' + w + ')' for w in where))
+            return df if columns is None else df[columns]
+        return self.store.get_frame(self._record(key), columns)
+
+    def get(self, key):
+        return self.select(key)
+
+    __getitem__ = get
+
+    def array(self, name):
+        h = self.view['arrays'][name.lstrip('/')]
+        if h.startswith('json:'):
+            return np.array(self.store.get_json(h[len('json:'):]), dtype=object)
+        return self.store.get_array(h)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Content-addressed block store of result files")
+    parser.add_argument('command', choices=['ingest', 'gc'])
+    parser.add_argument('files', nargs='*', help="HDF5 result files to ingest")
+    parser.add_argument('--root', default=DEFAULT_ROOT, help="Root directory of the store")
+    args = parser.parse_args()
+
+    store = BlockStore(args.root)
+    if args.command == 'ingest':
+        for path in args.files:
+            print(path, "->", store.ingest(path))
+        original = sum(os.path.getsize(p) for p in args.files)
+        print("Result files: {:.2f} MB, block store: {:.2f} MB in {} objects".format(
+            original / 1e6, store.size() / 1e6, store.count()))
+    else:
+        print("Freed {:.2f} MB".format(store.gc() / 1e6))
@@ -0,0 +1,165 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: cache.py
+Date: October, 2026
+Description: content-addressed cache of solved operating points. Each point is keyed
+on a hash of every input of the solve (gas, geometry, TgK, Id, mdot, phi_s), of the
+orifice grid the insert stage interpolates on, and of the version of the cathode package,
+so that identical operating points are only computed once across sweeps, scripts, and
+sessions.
+"""
+import os
+import json
+import hashlib
+import tempfile
+
+import pandas as pd
+
+### Cathode fields that enter the solve. The name and output file do not.
+HASHED_FIELDS = ['species', 'M_db', 'eiz_db', 'do_db', 'dc_db', 'Lo_db', 'Lupstream', 'Lemitter']
+
+
+def cathode_version():
+    ''' Version of the installed cathode package '''
+    try:
+        from importlib.metadata import version
+        return version('cathode')
+    except Exception:
+        import cathode
+        return getattr(cathode, '__version__', 'unknown')
+
+
+def orifice_hash(Idvec, mdotvec):
+    '''
+    SHA-256 hash of an orifice interpolation grid: discharge currents (A) and mass flow
+    rates (eqA). The orifice solution, and thus the insert solution that interpolates it,
+    depends on the grid.
+    '''
+    grid = {'Id': [repr(float(x)) for x in sorted(Idvec)],
+            'mdot': [repr(float(x)) for x in sorted(mdotvec)]}
+    return hashlib.sha256(json.dumps(grid, sort_keys=True).encode()).hexdigest()
+
+
+def point_hash(point, version=None):
+    '''
+    SHA-256 hash of all the inputs of a single operating point, including the hash of
+    its orifice grid (point.orifice, see orifice_hash()).
+    Floats are hashed through their exact repr().
+    '''
+    if version is None:
+        version = cathode_version()
+
+    cat = point.cathode
+    inputs = {f: repr(getattr(cat, f)) for f in HASHED_FIELDS}
+    inputs.update({
+        'TgK': repr(float(point.TgK)),
+        'Id': repr(float(point.Id)),
+        'mdot': repr(float(point.mdot)),
+        'phi_s': repr(None if point.phi_s is None else float(point.phi_s)),
+        'orifice': repr(point.orifice),
+        'version': version,
+    })
+
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+class SolveCache:
+    '''
+    Persistent cache of solved operating points. Each point is stored as a pickled
+    DataFrame under <directory>/<first two hex digits>/<hash>.pkl.
+    '''
+    def __init__(self, directory, version=None):
+        self.directory = directory
+        self.version = version or cathode_version()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, point):
+        return point_hash(point, self.version)
+
+    def _path(self, h):
+        return os.path.join(self.directory, h[:2], h + '.pkl')
+
+    def __contains__(self, point):
+        return os.path.exists(self._path(self.key(point)))
+
+    def _load(self, h):
+        path = self._path(h)
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path)
+
+    def get(self, point):
+        ''' Cached DataFrame of a point, or None on a miss '''
+        return self._load(self.key(point))
+
+    def put(self, point, df):
+        ''' Store the DataFrame of a point. The write is atomic. '''
+        path = self._path(self.key(point))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_pickle(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def split(self, points):
+        ''' Split a list of points into cache hits and misses. See split_points. '''
+        return split_points(points, [self])
+
+
+def split_points(points, stores):
+    '''
+    Split a list of points into hits and misses, looking up each point in a list of
+    stores (caches or ledgers) in order. Misses that share the same inputs are only
+    listed once.
+    Returns (hits, misses, duplicates):
+        - hits: dictionary {index: DataFrame}
+        - misses: list of indices of the points to compute
+        - duplicates: dictionary {index: index of the first occurrence in misses}
+    '''
+    hits = {}
+    misses = []
+    duplicates = {}
+    first = {}
+    version = stores[0].version if len(stores) > 0 else cathode_version()
+    for idx, point in enumerate(points):
+        h = point_hash(point, version)
+        df = None
+        for store in stores:
+            df = store._load(h if store.version == version else store.key(point))
+            if df is not None:
+                break
+
+        if df is not None:
+            hits[idx] = df
+        elif h in first:
+            duplicates[idx] = first[h]
+        else:
+            first[h] = idx
+            misses.append(idx)
+
+    return hits, misses, duplicates
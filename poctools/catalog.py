@@ -0,0 +1,319 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: catalog.py
+Date: October, 2026
+Description: catalog of the runs stored in results/*.h5. Each run (HDF5 key
+'<species>/simulations/results/<Tg>/insert/r<timestamp>') is indexed in a SQLite
+database with its cathode, gas, temperature, ranges of discharge current, mass flow
+rate, and sheath voltage, and its description attribute. The distinct operating
+points of each run are indexed as well, so that queries such as
+"nexis, 3000 K, mdot = 5.5 sccm" do not need to open the HDF5 files.
+
+The catalog is updated incrementally: only the files whose modification time or
+size changed are scanned again.
+
+Usage:
+    python -m poctools.catalog update results/*.h5
+    python -m poctools.catalog query --cathode nexis --TgK 3000 --mdot-sccm 5.5
+    python -m poctools.catalog check simulation_inventory.csv
+"""
+import os
+import sqlite3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from poctools.loader import load_runs
+
+DEFAULT_DATABASE = 'results/catalog.sqlite'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS runs (
+    path TEXT,
+    key TEXT,
+    cathode TEXT COLLATE NOCASE,
+    species TEXT,
+    TgK REAL,
+    date TEXT,
+    nrows INTEGER,
+    Id_min REAL, Id_max REAL,
+    mdot_sccm_min REAL, mdot_sccm_max REAL,
+    mdot_eqA_min REAL, mdot_eqA_max REAL,
+    phi_s_min REAL, phi_s_max REAL,
+    insertDiameter REAL, orificeDiameter REAL, orificeLength REAL,
+    description TEXT,
+    PRIMARY KEY (path, key)
+);
+CREATE TABLE IF NOT EXISTS points (
+    path TEXT,
+    key TEXT,
+    Id REAL,
+    mdot_sccm REAL,
+    mdot_eqA REAL,
+    phi_s REAL
+);
+CREATE INDEX IF NOT EXISTS runs_cathode ON runs (cathode, TgK);
+CREATE INDEX IF NOT EXISTS points_Id ON points (Id);
+CREATE INDEX IF NOT EXISTS points_mdot ON points (mdot_sccm);
+CREATE INDEX IF NOT EXISTS points_run ON points (path, key);
+'''
+
+
+def _like_escape(text):
+    ''' Escape the LIKE wildcards of a user string (used with ESCAPE '\\') '''
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def cathode_name(path):
+    ''' Name of the cathode of a results file, as used in the inventory (e.g., "nexis_do-2.0mm") '''
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _scan_file(path):
+    '''
+    Extract the parameters of each insert run of an HDF5 file.
+    Returns a list of run records and a list of point records.
+    '''
+    runs = []
+    points = []
+    with pd.HDFStore(path, 'r') as store:
+        for key in store.keys():
+            if '/insert/' not in key:
+                continue
+            df = store.select(key)
+            attrs = store.get_storer(key).attrs
+            description = getattr(attrs, 'description', None)
+
+            key = key.lstrip('/')
+            first = df.iloc[0] if len(df) > 0 else {}
+            runs.append({
+                'path': path,
+                'key': key,
+                'cathode': cathode_name(path),
+                'species': key.split('/')[0],
+                'TgK': float(key.split('/')[3]),
+                'date': key.split('/')[-1][1:9],
+                'nrows': len(df),
+                'Id_min': df['dischargeCurrent'].min(), 'Id_max': df['dischargeCurrent'].max(),
+                'mdot_sccm_min': df['massFlowRate_sccm'].min(), 'mdot_sccm_max': df['massFlowRate_sccm'].max(),
+                'mdot_eqA_min': df['massFlowRate_eqA'].min(), 'mdot_eqA_max': df['massFlowRate_eqA'].max(),
+                'phi_s_min': df['sheathVoltage'].min(), 'phi_s_max': df['sheathVoltage'].max(),
+                'insertDiameter': first.get('insertDiameter'),
+                'orificeDiameter': first.get('orificeDiameter'),
+                'orificeLength': first.get('orificeLength'),
+                'description': description,
+            })
+
+            cols = ['dischargeCurrent', 'massFlowRate_sccm', 'massFlowRate_eqA', 'sheathVoltage']
+            for Id, sccm, eqA, phi_s in df[cols].drop_duplicates().itertuples(index=False):
+                points.append((path, key, Id, sccm, eqA, phi_s))
+
+    return runs, points
+
+
+class Catalog:
+    '''
+    SQLite catalog of the runs of a set of results files.
+    '''
+    def __init__(self, database=DEFAULT_DATABASE):
+        self.database = database
+        self.connection = sqlite3.connect(database)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def update(self, paths, prune=False):
+        '''
+        Index the files that are new or that changed since the last update.
+        Inputs:
+            - paths: HDF5 result files
+            - prune: if True, remove from the catalog the files that are not in paths.
+            Only use it with the full list of result files
+        Outputs:
+            - list of files that were (re)scanned
+        '''
+        con = self.connection
+        known = {p: (m, s) for p, m, s in con.execute('SELECT path, mtime, size FROM files')}
+
+        scanned = []
+        for path in paths:
+            st = os.stat(path)
+            if known.get(path) == (st.st_mtime, st.st_size):
+                continue
+
+            runs, points = _scan_file(path)
+            with con:
+                self._remove(path)
+                if len(runs) > 0:
+                    con.executemany('INSERT INTO runs VALUES (' + ', '.join(':' + c for c in runs[0]) + ')', runs)
+                con.executemany('INSERT INTO points VALUES (?, ?, ?, ?, ?, ?)', points)
+                con.execute('INSERT INTO files VALUES (?, ?, ?)', (path, st.st_mtime, st.st_size))
+            scanned.append(path)
+
+        if prune:
+            with con:
+                for path in set(known) - set(paths):
+                    self._remove(path)
+
+        return scanned
+
+    def _remove(self, path):
+        for table in ['files', 'runs', 'points']:
+            self.connection.execute('DELETE FROM ' + table + ' WHERE path = ?', (path,))
+
+    def find(self, cathode=None, species=None, TgK=None, Id=None, mdot_sccm=None, mdot_eqA=None,
+             phi_s=None, description=None, rtol=1e-2):
+        '''
+        Find the runs that match all the given criteria.
+        Inputs:
+            - cathode: cathode name (file name without extension, e.g. "nexis_do-2.0mm"), not
+            case-sensitive. A trailing "*" matches any suffix
+            - species: "Xe" or "Ar"
+            - TgK: neutral gas temperature (K)
+            - Id, mdot_sccm, mdot_eqA, phi_s: the run must contain at least one operating
+            point that matches all the given values within the relative tolerance rtol
+            - description: substring of the description attribute
+        Outputs:
+            - DataFrame with one row per run, sorted by cathode, temperature, and key
+        '''
+        where = []
+        params = []
+        if cathode is not None:
+            if cathode.endswith('*'):
+                where.append("r.cathode LIKE ? ESCAPE '\\'")
+                params.append(_like_escape(cathode[:-1]) + '%')
+            else:
+                where.append('r.cathode = ?')
+                params.append(cathode)
+        if species is not None:
+            where.append('r.species = ?')
+            params.append(species)
+        if TgK is not None:
+            where.append('r.TgK = ?')
+            params.append(float(TgK))
+        if description is not None:
+            where.append("r.description LIKE ? ESCAPE '\\'")
+            params.append('%' + _like_escape(description) + '%')
+
+        point_where = []
+        for column, value in [('Id', Id), ('mdot_sccm', mdot_sccm), ('mdot_eqA', mdot_eqA), ('phi_s', phi_s)]:
+            if value is not None:
+                lo, hi = sorted([value * (1 - rtol), value * (1 + rtol)])
+                point_where.append('p.' + column + ' BETWEEN ? AND ?')
+                params.extend([lo, hi])
+        if len(point_where) > 0:
+            where.append('EXISTS (SELECT 1 FROM points p WHERE p.path = r.path AND p.key = r.key AND '
+                         + ' AND '.join(point_where) + ')')
+
+        query = 'SELECT * FROM runs r'
+        if len(where) > 0:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY r.cathode, r.TgK, r.key'
+
+        return pd.read_sql_query(query, self.connection, params=params)
+
+    def load(self, runs, columns=None):
+        '''
+        Load the runs returned by find() into a single DataFrame (see poctools.loader.load_runs).
+        '''
+        return load_runs(runs, columns)
+
+    def check_inventory(self, inventory):
+        '''
+        Compare the simulation inventory with the catalog.
+        Returns a DataFrame of the inventory rows with a problem:
+            - "key mismatch": the key column does not match the end of full_key
+            - "not found": full_key is not in any indexed file of that cathode
+            - "range mismatch": the current or mass flow rate ranges differ from the stored run
+        '''
+        inv = pd.read_csv(inventory, dtype={'date': str, 'key': str})
+        runs = self.find()
+        stored = {(c.lower(), k): r for c, k, r in zip(runs['cathode'], runs['key'], runs.itertuples())}
+
+        issues = []
+        for row in inv.itertuples():
+            if row.full_key.split('/')[-1] != row.key:
+                issues.append((row.Index, row.cathode, row.key, row.full_key, 'key mismatch'))
+            run = stored.get((row.cathode.lower(), row.full_key))
+            if run is None:
+                issues.append((row.Index, row.cathode, row.key, row.full_key, 'not found'))
+                continue
+            expected = [row.discharge_current_min, row.discharge_current_max,
+                        row.mass_flow_min, row.mass_flow_max]
+            actual = [run.Id_min, run.Id_max, run.mdot_sccm_min, run.mdot_sccm_max]
+            if not np.allclose(expected, actual, rtol=1e-2):
+                issues.append((row.Index, row.cathode, row.key, row.full_key, 'range mismatch'))
+
+        return pd.DataFrame(issues, columns=['row', 'cathode', 'key', 'full_key', 'issue'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Catalog of the stored results")
+    parser.add_argument('--database', default=DEFAULT_DATABASE)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('update', help="Index new or modified result files")
+    p.add_argument('files', nargs='+')
+    p.add_argument('--prune', action='store_true',
+                   help="Remove the files that are not listed from the catalog")
+
+    p = sub.add_parser('query', help="Find runs")
+    p.add_argument('--cathode')
+    p.add_argument('--species')
+    p.add_argument('--TgK', type=float)
+    p.add_argument('--Id', type=float)
+    p.add_argument('--mdot-sccm', type=float)
+    p.add_argument('--mdot-eqA', type=float)
+    p.add_argument('--phi-s', type=float)
+    p.add_argument('--description')
+    p.add_argument('--rtol', type=float, default=1e-2)
+
+    p = sub.add_parser('check', help="Compare the simulation inventory with the catalog")
+    p.add_argument('inventory')
+
+    args = parser.parse_args()
+    with Catalog(args.database) as catalog:
+        if args.command == 'update':
+            scanned = catalog.update(args.files, prune=args.prune)
+            print("Scanned", len(scanned), "of", len(args.files), "files")
+        elif args.command == 'query':
+            runs = catalog.find(args.cathode, args.species, args.TgK, args.Id, args.mdot_sccm,
+                                args.mdot_eqA, args.phi_s, args.description, args.rtol)
+            columns = ['cathode', 'key', 'Id_min', 'Id_max', 'mdot_sccm_min', 'mdot_sccm_max', 'description']
+            print(runs[columns].to_string(index=False))
+        else:
+            print(catalog.check_inventory(args.inventory).to_string(index=False))
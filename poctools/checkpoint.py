@@ -0,0 +1,72 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: checkpoint.py
+Date: October, 2026
+Description: per-point completion ledger for long sweeps. The ledger of an output file
+<savefile> lives in the directory <savefile>.ledger. Each converged operating point is
+stored there as soon as it is available, so that a killed sweep can be resumed: the
+points already done are read back from the ledger and only the remaining ones are
+computed. The ledger is removed once the runs have been written to the HDF5 file.
+"""
+import os
+import json
+import shutil
+
+from poctools.cache import SolveCache
+
+
+class Ledger(SolveCache):
+    '''
+    Completion ledger of an HDF5 output file. Completed points are stored the same way
+    as in the solve cache; the file completed.jsonl lists them in completion order.
+    '''
+    def __init__(self, savefile, version=None):
+        super().__init__(savefile + '.ledger', version)
+        self.index = os.path.join(self.directory, 'completed.jsonl')
+
+    def put(self, point, df):
+        ''' Record a completed point. The DataFrame is written before the index entry. '''
+        super().put(point, df)
+        entry = {'hash': self.key(point), 'TgK': point.TgK, 'Id': point.Id,
+                 'mdot': point.mdot, 'phi_s': point.phi_s}
+        with open(self.index, 'a') as fh:
+            fh.write(json.dumps(entry) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def completed(self):
+        ''' List of the completed points recorded in the index '''
+        if not os.path.exists(self.index):
+            return []
+        with open(self.index) as fh:
+            return [json.loads(line) for line in fh if line.strip()]
+
+    def clear(self):
+        ''' Forget all completed points '''
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def remove(self):
+        ''' Delete the ledger '''
+        shutil.rmtree(self.directory, ignore_errors=True)
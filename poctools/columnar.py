@@ -0,0 +1,156 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: columnar.py
+Date: October, 2026
+Description: columnar layout of the stored runs for zero-copy reads. Each run of a
+results file is written to an HDF5 file as one contiguous, uncompressed, aligned dataset
+per column, under the same key as in the original file:
+    <key>/<column>
+Numeric columns can then be mapped in memory (np.memmap) directly from the file, without
+going through the HDF5 library or pandas: a column is read as a view on the page cache,
+which is shared by all the processes of a node that read the same file. Text columns
+(species, work function material, bisection output as JSON) are stored as variable-length
+strings and read through h5py.
+
+Usage:
+    python -m poctools.columnar results/*.h5 [--output-dir results/columnar]
+
+Example:
+    store = ColumnStore('results/columnar/salhi_ar.h5')
+    key = store.runs()[0]
+    P = store.column(key, 'totalPressureCorr')     # np.memmap, read-only
+"""
+import os
+import argparse
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from poctools.loader import bisection_from_json, bisection_to_json, load_runs
+
+DEFAULT_ROOT = 'results/columnar'
+
+### Alignment (bytes) of each column in the file
+ALIGNMENT = 64
+
+
+def export_columns(path, output):
+    '''
+    Write the insert runs of an HDF5 result file in the columnar layout.
+    Inputs:
+        - path: HDF5 result file (fixed or table format)
+        - output: columnar HDF5 file, which is overwritten
+    Outputs:
+        - number of runs written
+    '''
+    with pd.HDFStore(path, 'r') as store:
+        keys = [k.lstrip('/') for k in store.keys() if '/insert/' in k]
+        descriptions = {k: getattr(store.get_storer(k).attrs, 'description', None) for k in keys}
+
+    with h5py.File(output, 'w', alignment_threshold=1, alignment_interval=ALIGNMENT) as f:
+        for key in keys:
+            df = load_runs([(path, key)]).drop(columns=['path', 'key'])
+            grp = f.create_group(key)
+            grp.attrs['columns'] = list(df.columns)
+            grp.attrs['nrows'] = len(df)
+            if descriptions[key] is not None:
+                grp.attrs['description'] = str(descriptions[key])
+
+            for column in df.columns:
+                values = df[column]
+                if column == 'bisectionOutput':
+                    values = bisection_to_json(values)
+                    grp.create_dataset(column, data=values, dtype=h5py.string_dtype())
+                elif pd.api.types.is_numeric_dtype(values):
+                    # Contiguous, uncompressed storage so that the column can be mapped
+                    grp.create_dataset(column, data=values.to_numpy(), chunks=None)
+                else:
+                    grp.create_dataset(column, data=values.astype(str).tolist(), dtype=h5py.string_dtype())
+
+    return len(keys)
+
+
+class ColumnStore:
+    '''
+    Reader of a columnar file written by export_columns().
+    '''
+    def __init__(self, path):
+        self.path = path
+        self._layout = {}
+        with h5py.File(path, 'r') as f:
+            def visit(name, obj):
+                if isinstance(obj, h5py.Group) and 'columns' in obj.attrs:
+                    self._layout[name] = {}
+                    for column in obj.attrs['columns']:
+                        ds = obj[column]
+                        offset = ds.id.get_offset()
+                        if ds.dtype.kind in 'fiub' and offset is not None:
+                            self._layout[name][column] = (offset, ds.dtype, ds.shape)
+                        else:
+                            self._layout[name][column] = None
+            f.visititems(visit)
+
+    def runs(self):
+        ''' Keys of the runs in the file '''
+        return list(self._layout)
+
+    def columns(self, key):
+        ''' Columns of a run '''
+        return list(self._layout[key.lstrip('/')])
+
+    def column(self, key, column):
+        '''
+        Column of a run. Numeric columns are returned as read-only np.memmap views on
+        the file; other columns are read as arrays of str.
+        '''
+        key = key.lstrip('/')
+        layout = self._layout[key][column]
+        if layout is not None:
+            offset, dtype, shape = layout
+            return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+        with h5py.File(self.path, 'r') as f:
+            return f[key][column].asstr()[()]
+
+    def frame(self, key, columns=None):
+        ''' DataFrame of a run, restricted to a list of columns '''
+        columns = columns or self.columns(key)
+        df = pd.DataFrame({c: self.column(key, c) for c in columns}, copy=False)
+        if 'bisectionOutput' in df.columns:
+            df['bisectionOutput'] = bisection_from_json(df['bisectionOutput'])
+        return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write results in a columnar, memory-mappable layout")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('--output-dir', default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for path in args.files:
+        output = os.path.join(args.output_dir, os.path.basename(path))
+        n = export_columns(path, output)
+        print(path, ":", n, "runs written to", output)
@@ -0,0 +1,118 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: dataset.py
+Date: October, 2026
+Description: export of the runs stored in results/*.h5 to a partitioned Parquet
+dataset, and read path with column projection and row filters. The dataset is
+partitioned by species, cathode, and neutral gas temperature:
+    <root>/species=Xe/cathode=nexis_do-2.0mm/TgK=3000/nexis_do-2.0mm-0.parquet
+Only the requested columns of the matching partitions are read, instead of whole
+HDF5 frames. The "run" column holds the timestamp part of the HDF5 key of each row
+(e.g., "r20210304211620"), and the "bisectionOutput" column is stored as JSON text.
+
+Usage:
+    python -m poctools.dataset results/*.h5 [--output results/parquet]
+"""
+import argparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from poctools.catalog import cathode_name
+from poctools.loader import _is_json, bisection_to_json
+
+DEFAULT_ROOT = 'results/parquet'
+
+PARTITIONING = ds.partitioning(pa.schema([('species', pa.string()),
+                                          ('cathode', pa.string()),
+                                          ('TgK', pa.int32())]), flavor='hive')
+
+
+def run_frames(path):
+    '''
+    Insert runs of an HDF5 file, with the cathode, TgK, and run columns added.
+    Returns a single DataFrame.
+    '''
+    cathode = cathode_name(path)
+    frames = []
+    with pd.HDFStore(path, 'r') as store:
+        for key in store.keys():
+            if '/insert/' not in key:
+                continue
+            parts = key.lstrip('/').split('/')
+            df = store.select(key)
+            if not _is_json(df['bisectionOutput']):
+                df['bisectionOutput'] = bisection_to_json(df['bisectionOutput'])
+            frames.append(df.assign(cathode=cathode, TgK=int(parts[3]), run=parts[-1]))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_dataset(paths, root=DEFAULT_ROOT, compression='zstd'):
+    '''
+    Export the insert runs of HDF5 files to the Parquet dataset in root. The
+    partitions of a cathode are replaced when its file is exported again.
+    '''
+    options = ds.ParquetFileFormat().make_write_options(compression=compression)
+    for path in paths:
+        table = pa.Table.from_pandas(run_frames(path), preserve_index=False)
+        ds.write_dataset(table, root, format='parquet', partitioning=PARTITIONING,
+                         basename_template=cathode_name(path) + '-{i}.parquet',
+                         existing_data_behavior='delete_matching', file_options=options)
+
+
+def read_dataset(root=DEFAULT_ROOT, columns=None, filters=None, **partitions):
+    '''
+    Read a subset of the Parquet dataset.
+    Inputs:
+        - root: root directory of the dataset
+        - columns: columns to read. Defaults to all columns
+        - filters: list of (column, operator, value) row filters, e.g.
+        [('massFlowRate_sccm', '>', 5.0)], as in pd.read_parquet
+        - partitions: equality filters on the partition columns, e.g. cathode='nexis',
+        TgK=3000. A list or tuple value selects any of its elements.
+    Outputs:
+        - DataFrame
+    '''
+    filters = list(filters or [])
+    for column, value in partitions.items():
+        if isinstance(value, (list, tuple)):
+            filters.append((column, 'in', list(value)))
+        else:
+            filters.append((column, '=', value))
+
+    return pd.read_parquet(root, engine='pyarrow', columns=columns,
+                           filters=filters if len(filters) > 0 else None,
+                           partitioning=PARTITIONING)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export results to a partitioned Parquet dataset")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('--output', default=DEFAULT_ROOT, help="Root directory of the dataset")
+    args = parser.parse_args()
+
+    export_dataset(args.files, args.output)
+    print("Exported", len(args.files), "files to", args.output)
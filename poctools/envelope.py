@@ -0,0 +1,128 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: envelope.py
+Date: October, 2026
+Description: envelopes of the results across the gas temperature and sheath voltage.
+The article plots show, for each (cathode, mass flow rate, discharge current), the
+minimum and maximum of a quantity over TgK = 2000-4000 K and phi_s = 1-10 V. envelope()
+computes the minimum, maximum, mean, and quantiles of any column or expression for all
+the groups at once, with a single sort of the NumPy arrays followed by segment
+reductions (np.ufunc.reduceat), instead of one boolean mask of the whole frame per group.
+
+Example:
+    from poctools.envelope import envelope
+    env = envelope(dfall, 'totalPressureCorr / magneticPressure', by=['massFlowRate_eqA', 'dischargeCurrent'])
+    ax.fill_between(env['dischargeCurrent'], env['min'], env['max'])
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_BY = ['massFlowRate_sccm', 'dischargeCurrent']
+
+
+def _values(df, value):
+    ''' Values of a column name, an expression of the columns (see DataFrame.eval), a callable, or an array '''
+    if isinstance(value, str):
+        values = df[value] if value in df.columns else df.eval(value)
+    elif callable(value):
+        values = value(df)
+    else:
+        values = value
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape != (len(df),):
+        raise ValueError("The envelope values must have one entry per row")
+    return values
+
+
+def envelope(df, value, by=DEFAULT_BY, stats=('min', 'max', 'mean'), quantiles=(), skipna=True):
+    '''
+    Per-group statistics of a quantity.
+    Inputs:
+        - df: DataFrame of results
+        - value: column name, expression of the columns (e.g., 'totalPressureCorr / magneticPressure'),
+        callable of the DataFrame, or array with one entry per row
+        - by: columns that define the groups, e.g. ['path', 'massFlowRate_sccm', 'dischargeCurrent']
+        - stats: any of 'min', 'max', 'mean'
+        - quantiles: quantiles in [0, 1] (linear interpolation, as np.quantile), returned as
+        columns 'q<100 q>', e.g. 'q25'
+        - skipna: if True, NaNs are ignored, as with np.nanmin; otherwise a group that holds a
+        NaN has NaN statistics, as with np.min
+    Outputs:
+        - DataFrame with one row per group, sorted by the columns of by, holding the by columns,
+        the number of finite values "count", and the statistics
+    '''
+    by = [by] if isinstance(by, str) else list(by)
+    values = _values(df, value)
+    nan = np.isnan(values)
+
+    ### Single sort: groups first, then values within each group (NaNs last)
+    codes = []
+    labels = []
+    for c in by:
+        code, unique = pd.factorize(df[c], sort=True)
+        codes.append(code)
+        labels.append(unique)
+    order = np.lexsort([values] + codes[::-1])
+    sorted_codes = [code[order] for code in codes]
+    sorted_values = values[order]
+
+    n = len(values)
+    change = np.zeros(n, dtype=bool)
+    if n > 0:
+        change[0] = True
+        for code in sorted_codes:
+            change[1:] |= code[1:] != code[:-1]
+    starts = np.flatnonzero(change)
+
+    ### Number of values and NaNs of each group
+    sizes = np.diff(np.append(starts, n))
+    nans = np.add.reduceat(nan[order], starts) if n > 0 else np.zeros(0, dtype=int)
+    count = sizes - nans
+    empty = (count == 0) | ((nans > 0) & (not skipna))
+
+    out = {c: lab[code[starts]] for c, lab, code in zip(by, labels, sorted_codes)}
+    out['count'] = count
+
+    ### Non-NaN values of a group are in [start, start + count)
+    first = starts
+    last = starts + np.maximum(count, 1) - 1
+    for s in stats:
+        if s == 'min':
+            res = sorted_values[first]
+        elif s == 'max':
+            res = sorted_values[last]
+        elif s == 'mean':
+            finite = np.where(np.isnan(sorted_values), 0.0, sorted_values)
+            res = np.add.reduceat(finite, starts) / np.maximum(count, 1) if n > 0 else np.zeros(0)
+        else:
+            raise ValueError("Unknown statistic " + str(s))
+        out[s] = np.where(empty, np.nan, res)
+
+    for q in quantiles:
+        pos = first + q * (np.maximum(count, 1) - 1)
+        lo = np.floor(pos).astype(int)
+        hi = np.ceil(pos).astype(int)
+        res = sorted_values[lo] + (pos - lo) * (sorted_values[hi] - sorted_values[lo])
+        out['q' + '{:g}'.format(100 * q)] = np.where(empty, np.nan, res)
+
+    return pd.DataFrame(out)
@@ -0,0 +1,205 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: envelope_store.py
+Date: October, 2026
+Description: materialized envelopes of the stored runs. For each run of results/*.h5, the
+minimum, maximum, mean, and number of values of a few quantities over the sheath voltages
+are stored per (mass flow rate, discharge current) in a sidecar file,
+results/envelopes/<file>_<hash>.h5, under the key of the run. The hash is that of the
+absolute path of the result file, so that result files of the same name in different
+directories have separate sidecars. Envelopes across several runs (e.g.,
+the three gas temperatures) are combined from the per-run envelopes, so that the plots
+read a few kilobytes instead of the runs themselves.
+
+Each envelope records the content hash of its source run. An envelope is reused as long as
+the source file has the same modification time and size, or, if it changed, as long as the
+run has the same hash; it is recomputed otherwise. Sidecars are only opened for writing
+when an envelope is stored or refreshed, so that several processes can read them at once.
+
+Usage:
+    python -m poctools.envelope_store results/*.h5 [--directory results/envelopes]
+"""
+import os
+import hashlib
+import argparse
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from poctools.envelope import envelope
+
+DEFAULT_DIRECTORY = 'results/envelopes'
+
+### Quantities of the envelopes: name and expression of the result columns
+QUANTITIES = {
+    'emissionLength': 'emissionLength',
+    'insertElectronTemperature': 'insertElectronTemperature',
+    'insertTemperature': 'insertTemperature',
+    'totalPressureCorr': 'totalPressureCorr',
+    'pressureRatio': 'totalPressureCorr / magneticPressure',
+    'totalToMagneticRatio': 'totalToMagneticRatio',
+}
+
+### Groups of the envelopes
+BY = ['massFlowRate_sccm', 'massFlowRate_eqA', 'dischargeCurrent']
+
+### Version of the envelope definition: envelopes of another version are recomputed
+VERSION = 1
+
+
+def run_hash(path, key):
+    ''' SHA-256 hash of all the datasets of a run, in name order '''
+    h = hashlib.sha256()
+    with h5py.File(path, 'r') as f:
+        group = f[key]
+        names = []
+        group.visit(names.append)
+        for name in sorted(names):
+            obj = group[name]
+            if not isinstance(obj, h5py.Dataset):
+                continue
+            h.update(name.encode())
+            data = obj[()]
+            if isinstance(data, np.ndarray) and data.dtype.kind == 'O':
+                for item in data.ravel():
+                    h.update(np.asarray(item).tobytes())
+            else:
+                h.update(np.asarray(data).tobytes())
+    return h.hexdigest()
+
+
+def run_envelope(df):
+    '''
+    Envelope of a run over the sheath voltages: for each quantity q, the columns
+    q_count, q_min, q_max, and q_mean, per (mass flow rate, discharge current).
+    '''
+    out = None
+    for name, expr in QUANTITIES.items():
+        env = envelope(df, expr, by=BY).rename(columns={s: name + '_' + s for s in ['count', 'min', 'max', 'mean']})
+        out = env if out is None else out.merge(env, on=BY)
+    return out
+
+
+class EnvelopeStore:
+    ''' Sidecar files of materialized envelopes, one per result file '''
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, source):
+        ''' Sidecar file of a result file: <directory>/<name>_<hash of the absolute path>.h5 '''
+        name, ext = os.path.splitext(os.path.basename(source))
+        digest = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:12]
+        return os.path.join(self.directory, name + '_' + digest + (ext or '.h5'))
+
+    def get(self, source, key):
+        '''
+        Envelope of a run. It is computed and stored if it is missing or stale.
+        Returns a DataFrame (see run_envelope()).
+        '''
+        key = key.lstrip('/')
+        st = os.stat(source)
+        sidecar = self.path(source)
+
+        h = None
+        if os.path.exists(sidecar):
+            env = None
+            with pd.HDFStore(sidecar, 'r') as store:
+                if '/' + key in store.keys():
+                    attrs = store.get_storer(key).attrs
+                    if getattr(attrs, 'version', None) == VERSION:
+                        if (attrs.source_mtime, attrs.source_size) == (st.st_mtime_ns, st.st_size):
+                            return store.select(key)
+                        h = run_hash(source, key)
+                        if attrs.source_hash == h:
+                            env = store.select(key)
+
+            if env is not None:
+                # The file changed, but not this run: only refresh the modification time and size
+                with pd.HDFStore(sidecar, 'a') as store:
+                    attrs = store.get_storer(key).attrs
+                    attrs.source_mtime = st.st_mtime_ns
+                    attrs.source_size = st.st_size
+                return env
+
+        h = h or run_hash(source, key)
+        env = run_envelope(pd.read_hdf(source, key))
+        with pd.HDFStore(sidecar, 'a') as store:
+            store.put(key, env)
+            attrs = store.get_storer(key).attrs
+            attrs.version = VERSION
+            attrs.source_hash = h
+            attrs.source_mtime = st.st_mtime_ns
+            attrs.source_size = st.st_size
+        return env
+
+    def update(self, source):
+        ''' Materialize the envelopes of all the runs of a result file. Returns the keys. '''
+        with pd.HDFStore(source, 'r') as store:
+            keys = [k.lstrip('/') for k in store.keys() if '/insert/' in k]
+        for key in keys:
+            self.get(source, key)
+        return keys
+
+
+def load_envelopes(runs, quantity, by=('massFlowRate_sccm', 'dischargeCurrent'), store=None):
+    '''
+    Envelope of a quantity across several runs, from their materialized envelopes.
+    Inputs:
+        - runs: list of (file, key) pairs
+        - quantity: name of one of QUANTITIES
+        - by: columns of BY that define the groups
+        - store: EnvelopeStore. Defaults to results/envelopes
+    Outputs:
+        - DataFrame with the by columns, count, min, max, and mean. NaN values of the runs
+        are ignored, as with np.nanmin.
+    '''
+    store = store or EnvelopeStore()
+    by = [by] if isinstance(by, str) else list(by)
+    df = pd.concat([store.get(path, key) for path, key in runs], ignore_index=True)
+
+    count = df[quantity + '_count']
+    df = df.assign(_sum=np.where(count > 0, df[quantity + '_mean'] * count, 0.0))
+    g = df.groupby(by, sort=True)
+    out = pd.DataFrame({
+        'count': g[quantity + '_count'].sum(),
+        'min': g[quantity + '_min'].min(),
+        'max': g[quantity + '_max'].max(),
+        'sum': g['_sum'].sum(),
+    }).reset_index()
+    out['mean'] = np.where(out['count'] > 0, out['sum'] / out['count'].where(out['count'] > 0, 1), np.nan)
+    return out.drop(columns='sum')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Materialize the envelopes of result files")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY, help="Directory of the envelope files")
+    args = parser.parse_args()
+
+    store = EnvelopeStore(args.directory)
+    for path in args.files:
+        keys = store.update(path)
+        print(path, ":", len(keys), "runs ->", store.path(path),
+              "({:.1f} kB)".format(os.path.getsize(store.path(path)) / 1e3))
@@ -0,0 +1,354 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: initial_guess.py
+Date: October, 2026
+Description: initial-guess providers for the insert stage of the Taunay et al. model.
+The insert stage is a bisection on the logarithm of the insert neutral density,
+log10(ng) (see the "bisectionOutput" column of the results). A provider returns a
+guess of log10(ng) and a half-width; the bracket [guess - width, guess + width] replaces
+the default bracket of the bisection. Three strategies are available:
+    - ContinuationGuess: continuation from the previously converged points of a sweep
+    - CorrelationGuess: choked viscous flow through the orifice for the density, and the
+    Part 2 correlations for the electron temperature and emission length
+    - NearestStoredGuess: nearest operating point stored in results/*.h5
+
+Each strategy saves bisection iterations by narrowing the bracket. evaluate_guesses()
+measures the savings offline: it replays the stored runs in order, takes the root of the
+bisection of each point from its "bisectionOutput", and counts the iterations needed from
+the bracket of each strategy.
+
+The solve() of the cathode package does not take an initial bracket on log10(ng) (see
+solve_accepts_bracket()), so the strategies are not used by the sweeps: they can only be
+evaluated offline until the solver exposes such an argument.
+
+Usage:
+    python -m poctools.initial_guess results/*.h5
+"""
+import inspect
+import argparse
+
+import numpy as np
+import pandas as pd
+import cathode.constants as cc
+
+from poctools.loader import load_runs
+
+### Default bisection bracket on log10(ng) and tolerance
+DEFAULT_BRACKET = (20.0, 24.0)
+XTOL = 1e-5
+
+### Keyword of solve() that receives the bracket, if the installed cathode package has it
+BRACKET_KEYWORD = 'ng_bracket'
+
+### Columns that describe an operating point
+POINT_COLUMNS = ['species', 'mass', 'insertDiameter', 'orificeDiameter',
+                 'neutralGasTemperature', 'dischargeCurrent', 'massFlowRate_eqA', 'sheathVoltage']
+
+
+def point_row(point):
+    ''' Operating point of a sweep as a dictionary with the results column names '''
+    cat = point.cathode
+    return {
+        'species': cat.species,
+        'mass': cat.M_db * cc.atomic_mass,
+        'insertDiameter': cat.dc_db * 1e-3,
+        'orificeDiameter': cat.do_db * 1e-3,
+        'neutralGasTemperature': point.TgK,
+        'dischargeCurrent': point.Id,
+        'massFlowRate_eqA': point.mdot,
+        'sheathVoltage': point.phi_s,
+    }
+
+
+def solve_accepts_bracket():
+    ''' True if the installed solve() accepts an initial bracket on log10(ng) '''
+    from cathode.models.taunay_et_al import solve
+    return BRACKET_KEYWORD in inspect.signature(solve).parameters
+
+
+def bisection_root(output):
+    '''
+    Root of log10(ng) found by the bisection of a point, from its "bisectionOutput"
+    (list of (log10(ng), residual) pairs). NaN if the bisection did not converge.
+    '''
+    if not isinstance(output, (list, tuple)) or len(output) == 0:
+        return np.nan
+    x = output[-1][0]
+    return float(x) if np.isfinite(x) else np.nan
+
+
+def bisection_iterations(width, xtol=XTOL):
+    ''' Number of bisection iterations to reduce a bracket of a given width to xtol '''
+    return int(np.ceil(np.log2(max(width, xtol) / xtol)))
+
+
+def bracketed_iterations(guess, half_width, truth, xtol=XTOL):
+    '''
+    Iterations needed from a guess: the bracket guess +/- half_width is doubled until it
+    contains the root (one evaluation per expansion), and is then bisected.
+    '''
+    if guess is None:
+        return bisection_iterations(DEFAULT_BRACKET[1] - DEFAULT_BRACKET[0], xtol)
+
+    expansions = 0
+    while abs(truth - guess) > half_width:
+        half_width *= 2.0
+        expansions += 1
+
+    return expansions + bisection_iterations(2.0 * half_width, xtol)
+
+
+class GuessProvider:
+    '''
+    Base class of the initial-guess strategies. guess() returns (log10(ng), half-width)
+    or None if the strategy has no estimate; update() records a converged point.
+    '''
+    name = 'default'
+    half_width = 0.5 * (DEFAULT_BRACKET[1] - DEFAULT_BRACKET[0])
+
+    def guess(self, row):
+        return None
+
+    def update(self, row):
+        pass
+
+    def bracket(self, row):
+        ''' Bisection bracket for an operating point '''
+        g = self.guess(row)
+        if g is None:
+            return DEFAULT_BRACKET
+        center, width = g
+        return (center - width, center + width)
+
+
+def _features(species, mass, dc, do, TgK, Id, mdot, phi_s):
+    ''' Normalized coordinates used to find neighbouring operating points '''
+    return np.column_stack([
+        np.log10(np.asarray(dc, dtype=np.float64)),
+        np.log10(np.asarray(do, dtype=np.float64)),
+        np.asarray(TgK, dtype=np.float64) / 1000.,
+        np.log10(np.asarray(Id, dtype=np.float64)),
+        np.log10(np.asarray(mdot, dtype=np.float64)),
+        np.asarray(phi_s, dtype=np.float64) / 10.,
+    ])
+
+
+def _row_features(row):
+    return _features(row['species'], row['mass'], row['insertDiameter'], row['orificeDiameter'],
+                     row['neutralGasTemperature'], row['dischargeCurrent'],
+                     row['massFlowRate_eqA'], row['sheathVoltage'])[0]
+
+
+class ContinuationGuess(GuessProvider):
+    '''
+    Continuation along a sweep axis. The guess is the log10(ng) of the closest converged
+    point of the same cathode and gas temperature. If the two closest points only differ
+    in their discharge current (or mass flow rate), the guess is linearly extrapolated
+    along that axis in log-log space.
+    '''
+    name = 'continuation'
+    half_width = 0.05
+
+    def __init__(self):
+        self.history = {}
+
+    @staticmethod
+    def _group(row):
+        return (row['species'], round(row['insertDiameter'], 9), round(row['orificeDiameter'], 9),
+                float(row['neutralGasTemperature']))
+
+    def update(self, row):
+        ng = row['insertNeutralDensity']
+        if not np.isfinite(ng) or ng <= 0:
+            return
+        self.history.setdefault(self._group(row), []).append(
+            (_row_features(row), np.log10(ng)))
+
+    def guess(self, row):
+        hist = self.history.get(self._group(row))
+        if not hist:
+            return None
+
+        x = _row_features(row)
+        X = np.array([h[0] for h in hist])
+        y = np.array([h[1] for h in hist])
+        order = np.argsort(np.sum((X - x)**2, axis=1))
+
+        center = y[order[0]]
+        if len(order) > 1:
+            x0, x1 = X[order[0]], X[order[1]]
+            # Extrapolate along a single sweep axis (Id or mdot)
+            for axis in (3, 4):
+                others = [k for k in range(X.shape[1]) if k != axis]
+                if (np.allclose(x0[others], x[others]) and np.allclose(x1[others], x[others])
+                        and x0[axis] != x1[axis]):
+                    slope = (y[order[0]] - y[order[1]]) / (x0[axis] - x1[axis])
+                    center = y[order[0]] + slope * (x[axis] - x0[axis])
+                    break
+
+        return center, self.half_width
+
+
+class CorrelationGuess(GuessProvider):
+    '''
+    Closed-form estimate. The insert neutral density is estimated from choked viscous
+    flow through the orifice at the neutral gas temperature:
+        Gamma = mdot / e = ng * Ggam * pi * ro**2 * sqrt(kB * Tg / M)
+    The electron temperature and emission length then follow from the Part 2
+    correlations with the pressure-diameter product (see estimates()).
+    '''
+    name = 'correlation'
+    half_width = 0.3
+    gamma = 5. / 3.
+
+    def density(self, row):
+        ''' Insert neutral density estimate (1/m3) '''
+        gam = self.gamma
+        Ggam = np.sqrt(gam * (2 / (gam + 1))**((gam + 1) / (gam - 1)))
+        ro = row['orificeDiameter'] / 2
+        Tg = row['neutralGasTemperature']
+        Cv = Ggam * np.pi * ro**2 * np.sqrt(cc.kB * Tg / row['mass'])
+        return row['massFlowRate_eqA'] / cc.e / Cv
+
+    def estimates(self, row):
+        '''
+        Estimates of the insert neutral density (1/m3), electron temperature (eV),
+        and emission length / insert diameter.
+        '''
+        from cathode.models.taunay_et_al_core.correlation import Te_insert
+
+        ng = self.density(row)
+        dc = row['insertDiameter']
+        Te = Te_insert(ng, dc, row['species'])
+        Pd = ng * cc.kB * row['neutralGasTemperature'] / cc.Torr * dc * 1e2   # Torr-cm
+        Lem_dc = 0.5 * (0.72389 + 0.17565 / Pd**1.22140)
+        return ng, Te, Lem_dc
+
+    def guess(self, row):
+        return np.log10(self.density(row)), self.half_width
+
+
+class NearestStoredGuess(GuessProvider):
+    '''
+    Nearest operating point, for the same gas, among the results stored in HDF5 files.
+    '''
+    name = 'nearest stored'
+    half_width = 0.1
+
+    def __init__(self, paths):
+        data = load_runs(insert_runs(paths), columns=POINT_COLUMNS + ['insertNeutralDensity'])
+        data = data[np.isfinite(data['insertNeutralDensity']) & (data['insertNeutralDensity'] > 0)]
+        self.species = data['species'].to_numpy()
+        self.source = data['path'].to_numpy()
+        self.X = _features(*[data[c] for c in POINT_COLUMNS])
+        self.y = np.log10(data['insertNeutralDensity'].to_numpy())
+        self.exclude = None
+
+    def guess(self, row):
+        mask = self.species == row['species']
+        if self.exclude is not None:
+            mask &= self.source != self.exclude
+        if not np.any(mask):
+            return None
+
+        d2 = np.sum((self.X[mask] - _row_features(row))**2, axis=1)
+        return self.y[mask][np.argmin(d2)], self.half_width
+
+
+def insert_runs(paths):
+    ''' (file, key) pairs of the insert runs of HDF5 result files '''
+    runs = []
+    for path in paths:
+        with pd.HDFStore(path, 'r') as store:
+            runs.extend((path, k) for k in store.keys() if '/insert/' in k)
+    return runs
+
+
+def evaluate_guesses(providers, df, xtol=XTOL):
+    '''
+    Replay the rows of a stored run, in order, through each provider and count the
+    bisection iterations needed from its bracket to reach the stored root.
+    Inputs:
+        - providers: list of GuessProvider
+        - df: DataFrame of a stored run, with its "bisectionOutput" column
+        - xtol: tolerance of the bisection on log10(ng)
+    Outputs:
+        - DataFrame with, per provider, the number of replayed points (those whose
+        bisection converged), the mean bracket width, the mean number of iterations,
+        the mean number of iterations saved with respect to the default bracket, the
+        fraction of guesses whose bracket contained the root, and the mean absolute error
+        on log10(ng)
+    '''
+    default_width = DEFAULT_BRACKET[1] - DEFAULT_BRACKET[0]
+    baseline = bisection_iterations(default_width, xtol)
+    roots = np.array([bisection_root(b) for b in df['bisectionOutput']], dtype=np.float64)
+    rows = [(x, r) for x, (_, r) in zip(roots, df.iterrows()) if np.isfinite(x)]
+
+    report = []
+    for provider in providers:
+        iterations = []
+        widths = []
+        hits = []
+        errors = []
+        for truth, row in rows:
+            g = provider.guess(row)
+            if g is None:
+                iterations.append(baseline)
+                widths.append(default_width)
+            else:
+                iterations.append(bracketed_iterations(g[0], g[1], truth, xtol))
+                widths.append(2 * g[1])
+                hits.append(abs(truth - g[0]) <= g[1])
+                errors.append(abs(truth - g[0]))
+            provider.update(row)
+
+        report.append({
+            'strategy': provider.name,
+            'points': len(rows),
+            'bracket': np.mean(widths) if widths else np.nan,
+            'iterations': np.mean(iterations) if iterations else np.nan,
+            'saved': baseline - np.mean(iterations) if iterations else np.nan,
+            'in_bracket': np.mean(hits) if hits else np.nan,
+            'log10_ng_error': np.mean(errors) if errors else np.nan,
+        })
+
+    return pd.DataFrame(report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate the initial-guess strategies on stored results")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    args = parser.parse_args()
+
+    if not solve_accepts_bracket():
+        print("Note: the installed solve() does not accept an initial bracket; the savings below are offline estimates")
+
+    nearest = NearestStoredGuess(args.files)
+    for path, key in insert_runs(args.files):
+        # Leave the file being evaluated out of the stored results
+        nearest.exclude = path
+        df = load_runs([(path, key)])
+        report = evaluate_guesses([GuessProvider(), ContinuationGuess(), CorrelationGuess(), nearest], df)
+        print(path, key)
+        print(report.to_string(index=False))
@@ -0,0 +1,81 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: inventory.py
+Date: October, 2026
+Description: read and append to the simulation inventory (simulation_inventory.csv).
+Each row of the inventory describes one run stored in a results/*.h5 file.
+"""
+import csv
+import os
+
+import pandas as pd
+
+INVENTORY_COLUMNS = ['cathode', 'date', 'key', 'full_key',
+                     'discharge_current_min', 'discharge_current_max',
+                     'mass_flow_min', 'mass_flow_max',
+                     'neutral_temperature',
+                     'potential_min', 'potential_max',
+                     'description']
+
+
+def read_inventory(path):
+    ''' Load the inventory as a DataFrame '''
+    return pd.read_csv(path, dtype={'date': str, 'key': str})
+
+
+def _fmt(x):
+    ''' Format numbers the same way as the existing inventory entries '''
+    return '{:g}'.format(round(float(x), 2))
+
+
+def inventory_row(cathode, full_key, df, description=None):
+    '''
+    Build the inventory entry of a run from its DataFrame.
+    Mass flow rates are reported in sccm.
+    '''
+    key = full_key.split('/')[-1]
+    return {
+        'cathode': cathode,
+        'date': key[1:9],
+        'key': key,
+        'full_key': full_key,
+        'discharge_current_min': _fmt(df['dischargeCurrent'].min()),
+        'discharge_current_max': _fmt(df['dischargeCurrent'].max()),
+        'mass_flow_min': _fmt(df['massFlowRate_sccm'].min()),
+        'mass_flow_max': _fmt(df['massFlowRate_sccm'].max()),
+        'neutral_temperature': _fmt(df['neutralGasTemperature'].iloc[0]),
+        'potential_min': _fmt(df['sheathVoltage'].min()),
+        'potential_max': _fmt(df['sheathVoltage'].max()),
+        'description': description or '',
+    }
+
+
+def append_inventory(path, rows):
+    ''' Append a list of inventory entries to the inventory file '''
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as fh:
+        writer = csv.DictWriter(fh, fieldnames=INVENTORY_COLUMNS, lineterminator='\n')
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,198 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: loader.py
+Date: October, 2026
+Description: load many stored runs at once. Runs are given as (file, key) pairs,
+or as the output of a catalog query (see poctools.catalog). Each file is opened once,
+files are read concurrently on a process pool (PyTables, used by pd.HDFStore, is not
+thread-safe), and the runs are concatenated in a single pass. Each row is tagged with
+the file ("path") and the HDF5 key ("key") of its run, as in the catalog. Row conditions
+on the data columns of runs stored in table format (see poctools.migrate) are evaluated
+on disk, so that only the selected rows are read; the other conditions are evaluated in
+memory, so that the same conditions work on any storage format.
+
+Example:
+    from poctools.loader import load_runs, insert_key, isclose_where
+    keys = [insert_key('Xe', TgK, ke) for TgK, ke in zip(Tgvec, key_end)]
+    dfall = load_runs([(path_to_results, k) for k in keys])
+    dfx = load_runs([(path_to_results, k) for k in keys], where=[isclose_where('massFlowRate_sccm', 5.5)])
+"""
+import os
+import re
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def insert_key(species, TgK, timestamp):
+    '''
+    HDF5 key of an insert run:
+    '<species>/simulations/results/<Tg>/insert/r<UTC time results were written>'
+    '''
+    return species + '/simulations/results/' + str(int(TgK)) + '/insert/' + timestamp
+
+
+def _tolist(x):
+    return x.tolist()
+
+
+def bisection_to_json(values):
+    '''
+    Encode the entries of a "bisectionOutput" column, lists of (log10(ng), [goal]) tuples,
+    as JSON text. Formats that cannot store Python objects (table format, Parquet)
+    hold this column as text.
+    '''
+    return [json.dumps(b, default=_tolist) for b in values]
+
+
+def bisection_from_json(values):
+    ''' Decode a "bisectionOutput" column encoded with bisection_to_json() '''
+    return [[(x, np.array(goal)) for x, goal in json.loads(b)] for b in values]
+
+
+def isclose_where(column, value, rtol=1e-5, atol=1e-8):
+    '''
+    Condition that selects the rows whose column is close to value, with the same
+    tolerance as np.isclose. The condition can be passed to load_runs(where=...).
+    '''
+    tol = atol + rtol * abs(value)
+    return '(' + column + ' >= ' + repr(value - tol) + ') & (' + column + ' <= ' + repr(value + tol) + ')'
+
+
+### Names in a row condition that are not columns
+_NOT_COLUMNS = {'and', 'or', 'not', 'in', 'True', 'False', 'inf', 'nan', 'index'}
+
+
+def _condition_columns(condition):
+    ''' Column names used in a row condition '''
+    return set(re.findall(r'(?<![\w.])[A-Za-z_]\w*', condition)) - _NOT_COLUMNS
+
+
+def _split_where(where, data_columns):
+    '''
+    Split row conditions into those that only use data columns (evaluated on disk) and
+    the others (evaluated in memory)
+    '''
+    on_disk = [w for w in where if _condition_columns(w) <= set(data_columns)]
+    in_memory = [w for w in where if w not in on_disk]
+    return on_disk, in_memory
+
+
+def _is_json(values):
+    ''' True if a "bisectionOutput" column holds JSON text '''
+    return len(values) > 0 and isinstance(values.iloc[0], str)
+
+
+def _open(path):
+    ''' Open an HDF5 result file, or a view of the block store (see poctools.blockstore) '''
+    if path.endswith('.json'):
+        from poctools.blockstore import BlockView
+        return BlockView(path)
+    return pd.HDFStore(path, 'r')
+
+
+def _read_file(path, keys, columns, where):
+    '''
+    Read a list of keys of a single HDF5 file or block store view. Runs stored in table format are filtered
+    on disk on their data columns, and in memory on the other columns; runs stored in fixed format are
+    read in full and filtered in memory.
+    A "bisectionOutput" column stored as JSON text is decoded.
+    Returns {key: DataFrame}.
+    '''
+    frames = {}
+    with _open(path) as store:
+        for key in keys:
+            storer = store.get_storer(key)
+            in_memory = where
+            if storer.is_table:
+                on_disk, in_memory = _split_where(where or [], storer.data_columns)
+                read = columns
+                if columns is not None and len(in_memory) > 0:
+                    # The columns of the in-memory conditions are read as well
+                    needed = set().union(*[_condition_columns(w) for w in in_memory])
+                    read = list(columns) + sorted(needed - set(columns))
+                df = store.select(key, where=on_disk or None, columns=read)
+            else:
+                df = store.select(key)
+            if in_memory:
+                df = df.query(' & '.join('(' + w + ')' for w in in_memory))
+            if columns is not None:
+                df = df[columns]
+            if 'bisectionOutput' in df.columns and _is_json(df['bisectionOutput']):
+                df['bisectionOutput'] = bisection_from_json(df['bisectionOutput'])
+            frames[key] = df
+    return frames
+
+
+def load_runs(runs, columns=None, nproc=None, where=None, precision='float64'):
+    '''
+    Load several runs into a single DataFrame.
+    Inputs:
+        - runs: list of (file, key) pairs, or DataFrame with "path" and "key" columns
+        (e.g., the output of Catalog.find())
+        - columns: columns to keep. Defaults to all columns
+        - nproc: number of processes. Defaults to one per file, up to the number of cores.
+        A single file is read in the calling process
+        - where: row condition of the form "column op value", or list of conditions combined
+        with a logical and, e.g. ['dischargeCurrent == 25.0', isclose_where('massFlowRate_sccm', 5.5)].
+        Conditions on the data columns of runs stored in table format (see poctools.migrate)
+        are evaluated on disk.
+        - precision: 'float32' (or a dictionary of per-column types) to hold the computed
+        columns in reduced precision and the string columns as categoricals
+        (see poctools.precision). Defaults to the stored types
+    Outputs:
+        - DataFrame with the rows of each run in the order of runs, and the "path" and
+        "key" columns. A run that is listed twice appears twice.
+    '''
+    if isinstance(runs, pd.DataFrame):
+        runs = list(zip(runs['path'], runs['key']))
+    runs = [(path, key.lstrip('/')) for path, key in runs]
+    if isinstance(where, str):
+        where = [where]
+    if len(runs) == 0:
+        return pd.DataFrame(columns=(columns or []) + ['path', 'key'])
+
+    ### Group the keys per file, so that each file is only opened once
+    by_file = {}
+    for path, key in runs:
+        keys = by_file.setdefault(path, [])
+        if key not in keys:
+            keys.append(key)
+
+    nproc = nproc or min(len(by_file), os.cpu_count())
+    if nproc == 1 or len(by_file) == 1:
+        data = {path: _read_file(path, keys, columns, where) for path, keys in by_file.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=nproc) as executor:
+            futures = {path: executor.submit(_read_file, path, keys, columns, where) for path, keys in by_file.items()}
+            data = {path: fut.result() for path, fut in futures.items()}
+
+    frames = [data[path][key].assign(path=path, key=key) for path, key in runs]
+    df = pd.concat(frames, ignore_index=True)
+    if precision != 'float64':
+        from poctools.precision import reduce_precision
+        df = reduce_precision(df, precision, categorical=True)
+    return df
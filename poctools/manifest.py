@@ -0,0 +1,131 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: manifest.py
+Date: October, 2026
+Description: load a declarative sweep manifest (TOML). The manifest lists the cathodes,
+their geometry and gas, and the sweeps to run for each of them. See
+article/generate_numerical_results/sweeps.toml for an example.
+
+Sweep axes are given either as a list of values or as a table {start, stop, step}
+that is expanded with np.arange. Mass flow rates are given in sccm (mdot_sccm),
+in equivalent amperes (mdot_eqA), or both. TgK and phi_s default to the values of the
+[defaults] table. An optional "adaptive" table refines the sweep along one axis (see
+poctools.adaptive).
+"""
+import numpy as np
+import cathode.constants as cc
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    import tomli as tomllib
+
+from poctools.adaptive import ADAPTIVE_OPTIONS
+from poctools.sweep import Cathode, Sweep
+
+CATHODE_FIELDS = ['name', 'fname', 'species', 'M_db', 'eiz_db',
+                  'do_db', 'dc_db', 'Lo_db', 'Lupstream', 'Lemitter']
+
+
+def expand_axis(value):
+    ''' Expand a sweep axis from the manifest into an array '''
+    if isinstance(value, dict):
+        return np.arange(value['start'], value['stop'], value['step'], dtype=np.float64)
+    return np.array(value, dtype=np.float64).reshape(-1)
+
+
+def _mass_flow(table, prefix=''):
+    ''' Mass flow rate axis in eqA, or None if not specified. If values are given both
+    in sccm and in eqA, the union of both is returned in increasing order. '''
+    axes = []
+    if prefix + 'mdot_eqA' in table:
+        axes.append(expand_axis(table[prefix + 'mdot_eqA']))
+    if prefix + 'mdot_sccm' in table:
+        axes.append(expand_axis(table[prefix + 'mdot_sccm']) * cc.sccm2eqA)
+
+    if len(axes) == 0:
+        return None
+    if len(axes) == 1:
+        return axes[0]
+    return np.sort(np.concatenate(axes))
+
+
+def load_manifest(path, only=None):
+    '''
+    Parse a sweep manifest.
+
+    Inputs:
+        - path: path to the TOML manifest
+        - only: optional list of cathode entries to keep
+    Outputs:
+        - List of (entry name, Sweep), in the manifest order
+    '''
+    with open(path, 'rb') as fh:
+        manifest = tomllib.load(fh)
+
+    defaults = manifest.get('defaults', {})
+
+    sweeps = []
+    for entry, table in manifest['cathodes'].items():
+        if only is not None and entry not in only:
+            continue
+
+        missing = [f for f in CATHODE_FIELDS if f not in table]
+        if missing:
+            raise ValueError("Cathode '" + entry + "' is missing " + ", ".join(missing))
+
+        cat = Cathode(**{f: table[f] for f in CATHODE_FIELDS})
+
+        for sw in table.get('sweeps', []):
+            mdotvec = _mass_flow(sw)
+            if mdotvec is None:
+                raise ValueError("A sweep of cathode '" + entry + "' has no mass flow rate")
+
+            orifice_Idvec = sw.get('orifice_Id')
+            if orifice_Idvec is not None:
+                orifice_Idvec = expand_axis(orifice_Idvec)
+
+            adaptive = sw.get('adaptive')
+            if adaptive is not None:
+                unknown = [k for k in adaptive if k not in ADAPTIVE_OPTIONS]
+                if unknown or adaptive.get('axis') not in ('Id', 'mdot'):
+                    raise ValueError("Invalid adaptive table in cathode '" + entry + "': axis must be "
+                                     "'Id' or 'mdot', options are " + ", ".join(ADAPTIVE_OPTIONS))
+                # min_step is given in sccm for the mass flow rate
+                if adaptive['axis'] == 'mdot' and 'min_step' in adaptive:
+                    adaptive = dict(adaptive, min_step=adaptive['min_step'] * cc.sccm2eqA)
+
+            sweeps.append((entry, Sweep(
+                cathode=cat,
+                TgKvec=expand_axis(sw.get('TgK', defaults.get('TgK'))),
+                Idvec=expand_axis(sw['Id']),
+                mdotvec=mdotvec,
+                phisvec=expand_axis(sw.get('phi_s', defaults.get('phi_s'))),
+                description=sw.get('description'),
+                orifice_Idvec=orifice_Idvec,
+                orifice_mdotvec=_mass_flow(sw, 'orifice_'),
+                adaptive=adaptive,
+            )))
+
+    return sweeps
@@ -0,0 +1,144 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: migrate.py
+Date: October, 2026
+Description: rewrite the runs of results/*.h5 from the pandas "fixed" format to the
+"table" format. The operating point columns (discharge current, mass flow rate, sheath
+voltage, neutral gas temperature) become indexed data columns, so that row selections
+are evaluated on disk (see poctools.loader.load_runs(where=...)) instead of loading
+whole frames. The "bisectionOutput" column, which holds Python objects, is stored as
+JSON text and decoded by load_runs.
+
+The orifice solution, conditions, and geometry are copied unchanged. Each migrated run
+is read back and compared to the original before the file is replaced.
+
+Usage:
+    python -m poctools.migrate results/*.h5 [--output-dir DIR]
+"""
+import os
+import shutil
+import argparse
+import tempfile
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from poctools.loader import bisection_to_json, load_runs
+
+### Indexed data columns of the table format
+DATA_COLUMNS = ['dischargeCurrent', 'massFlowRate_sccm', 'sheathVoltage', 'neutralGasTemperature']
+
+
+def _copy_except_runs(src, dst):
+    ''' Copy all the nodes of an HDF5 file, except the content of the "insert" groups '''
+    def copy_group(gsrc, gdst):
+        for name, attr in gsrc.attrs.items():
+            gdst.attrs[name] = attr
+        for name, obj in gsrc.items():
+            if isinstance(obj, h5py.Group):
+                child = gdst.require_group(name)
+                if name != 'insert':
+                    copy_group(obj, child)
+            else:
+                gsrc.copy(obj, gdst, name=name)
+
+    with h5py.File(src, 'r') as fsrc, h5py.File(dst, 'w') as fdst:
+        copy_group(fsrc, fdst)
+
+
+def _same(df, ref):
+    ''' True if a migrated run holds the same data as the original run '''
+    if list(df.columns) != list(ref.columns) or len(df) != len(ref):
+        return False
+    for column in df.columns:
+        a, b = df[column].to_numpy(), ref[column].to_numpy()
+        if column == 'bisectionOutput':
+            a, b = np.array(bisection_to_json(a)), np.array(bisection_to_json(b))
+        if a.dtype.kind == 'f':
+            if not np.array_equal(a, b, equal_nan=True):
+                return False
+        elif not all(x == y for x, y in zip(a, b)):
+            return False
+    return True
+
+
+def migrate_file(path, output=None):
+    '''
+    Rewrite the insert runs of an HDF5 file in table format.
+    Inputs:
+        - path: HDF5 result file
+        - output: migrated file. Defaults to path, which is then replaced
+    Outputs:
+        - number of migrated runs
+    '''
+    output = output or path
+    with pd.HDFStore(path, 'r') as store:
+        keys = [k for k in store.keys() if '/insert/' in k]
+        descriptions = {k: getattr(store.get_storer(k).attrs, 'description', None) for k in keys}
+
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.h5.tmp')
+    os.close(fd)
+    try:
+        _copy_except_runs(path, tmp)
+
+        with pd.HDFStore(path, 'r') as src, pd.HDFStore(tmp, 'a') as dst:
+            for key in keys:
+                df = src.select(key)
+                if 'bisectionOutput' in df.columns:
+                    df['bisectionOutput'] = bisection_to_json(df['bisectionOutput'])
+                dst.put(key, df, format='table', data_columns=DATA_COLUMNS, index=False)
+                dst.create_table_index(key, columns=DATA_COLUMNS, optlevel=9, kind='full')
+                if descriptions[key] is not None:
+                    dst.get_storer(key).attrs.description = descriptions[key]
+
+        ### Check the migrated runs against the originals
+        for key in keys:
+            ref = pd.read_hdf(path, key)
+            df = load_runs([(tmp, key)]).drop(columns=['path', 'key'])
+            if not _same(df, ref):
+                raise RuntimeError("Migrated run " + key + " of " + path + " differs from the original")
+
+        shutil.move(tmp, output)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return len(keys)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rewrite result files in table format with indexed data columns")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('--output-dir', default=None,
+                        help="Directory of the migrated files (default: replace the files in place)")
+    args = parser.parse_args()
+
+    for path in args.files:
+        output = None if args.output_dir is None else os.path.join(args.output_dir, os.path.basename(path))
+        size = os.path.getsize(path)
+        n = migrate_file(path, output)
+        print(path, ":", n, "runs migrated,", "{:.1f} MB -> {:.1f} MB".format(
+            size / 1e6, os.path.getsize(output or path) / 1e6))
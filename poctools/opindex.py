@@ -0,0 +1,242 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: opindex.py
+Date: October, 2026
+Description: float-tolerant index of operating points. The discharge current, the mass
+flow rate (in sccm and eqA), the gas temperature, and the sheath voltage of each row are
+quantized into integer keys: bins of width BIN_WIDTH x log(1 + rtol) of the logarithm of
+the value, with one relative tolerance rtol per axis (see TOLERANCES). Rows are found by
+hashing the keys of a query; the neighbouring bin is also probed when the query is within
+the tolerance of a bin edge, and the candidates are then checked against the tolerance.
+A lookup therefore does not scan the frame, and gives the same rows as
+|value - query| <= rtol * max(|value|, |query|) on each axis.
+
+Example:
+    from poctools.opindex import OperatingPointIndex
+    index = OperatingPointIndex(dfall)
+    dfx = index.select(mdot_sccm=3.7)
+    matched = index.join(xp, on={'mdot_sccm': 'mdot', 'Id': 'Id'})
+
+Usage (compare the lookups to np.isclose scans on the stored results):
+    python -m poctools.opindex results/*.h5
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+### Axes of an operating point: name and result column
+AXES = {
+    'Id': 'dischargeCurrent',
+    'mdot_sccm': 'massFlowRate_sccm',
+    'mdot_eqA': 'massFlowRate_eqA',
+    'TgK': 'neutralGasTemperature',
+    'phi_s': 'sheathVoltage',
+}
+
+### Tolerance policy: relative tolerance of each axis.
+# Mass flow rates are converted between sccm and eqA, sometimes offset (8.00001 sccm), and
+# experimental values are reported with 3 to 4 significant digits.
+TOLERANCES = {
+    'Id': 1e-4,
+    'mdot_sccm': 1e-3,
+    'mdot_eqA': 1e-3,
+    'TgK': 1e-6,
+    'phi_s': 1e-6,
+}
+
+### Width of the bins, in units of log(1 + rtol)
+BIN_WIDTH = 8
+
+
+def _bins(values, rtol):
+    ''' Bin of each value in log space, and its position within the bin in [-0.5, 0.5) '''
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.log(np.abs(values)) / (BIN_WIDTH * np.log1p(rtol))
+    x = np.where(np.isfinite(x), x, 0.)
+    q = np.floor(x + 0.5)
+    return q, x - q
+
+
+def quantize(values, axis, rtol=None):
+    '''
+    Stable integer keys of the values of an axis: values within the tolerance of each
+    other share a key, except across a bin edge. Zero and negative values have their own
+    keys.
+    '''
+    rtol = TOLERANCES[axis] if rtol is None else rtol
+    values = np.asarray(values, dtype=np.float64)
+    q, _ = _bins(values, rtol)
+    # Sign in the lowest two bits; NaN and zero share the sign 0
+    sign = np.where(values > 0, 1, np.where(values < 0, 2, 0))
+    return q.astype(np.int64) * 4 + sign
+
+
+class OperatingPointIndex:
+    '''
+    Hashed index of the operating points of a DataFrame of results.
+    Inputs:
+        - df: DataFrame of results
+        - rtol: dictionary {axis: relative tolerance} that overrides TOLERANCES
+    '''
+    def __init__(self, df, rtol=None):
+        self.df = df
+        self.rtol = dict(TOLERANCES, **(rtol or {}))
+        self.axes = [a for a, c in AXES.items() if c in df.columns]
+        self.values = {a: df[AXES[a]].to_numpy(dtype=np.float64) for a in self.axes}
+        self.keys = {a: quantize(self.values[a], a, self.rtol[a]) for a in self.axes}
+        self._tables = {}
+
+    def _table(self, axes):
+        ''' {key tuple: row positions} for a combination of axes, built on first use '''
+        if axes not in self._tables:
+            keys = pd.DataFrame({a: self.keys[a] for a in axes})
+            indices = keys.groupby(list(axes), sort=False).indices
+            # Keys of a single axis are scalars: make them tuples, as the probes
+            self._tables[axes] = {(k if isinstance(k, tuple) else (k,)): v for k, v in indices.items()}
+        return self._tables[axes]
+
+    def _probe_keys(self, axis, value):
+        ''' Keys of the bins that can hold values within the tolerance of value '''
+        rtol = self.rtol[axis]
+        key = quantize(value, axis, rtol)
+        if value == 0 or not np.isfinite(value):
+            return [int(key)]
+        _, frac = _bins(value, rtol)
+        keys = [int(key)]
+        if frac > 0.5 - 1. / BIN_WIDTH:
+            keys.append(int(key) + 4)
+        elif frac < -0.5 + 1. / BIN_WIDTH:
+            keys.append(int(key) - 4)
+        return keys
+
+    def lookup(self, **point):
+        '''
+        Row positions of the operating points that match point, e.g. lookup(Id=25., mdot_sccm=5.5).
+        Axes that are not given are not constrained.
+        '''
+        for a in point:
+            if a not in self.axes:
+                raise KeyError("Unknown or missing axis " + a + ". Available axes: " + str(self.axes))
+        if len(point) == 0:
+            return np.arange(len(self.df))
+
+        axes = tuple(sorted(point))
+        table = self._table(axes)
+        candidates = [np.asarray(table[k], dtype=np.int64)
+                      for k in _product([self._probe_keys(a, point[a]) for a in axes]) if k in table]
+        if len(candidates) == 0:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.sort(np.concatenate(candidates))
+
+        ### Exact tolerance check
+        keep = np.ones(len(rows), dtype=bool)
+        for a in axes:
+            v = self.values[a][rows]
+            keep &= np.abs(v - point[a]) <= self.rtol[a] * np.maximum(np.abs(v), abs(point[a]))
+        return rows[keep]
+
+    def select(self, **point):
+        ''' Rows of the DataFrame that match point (see lookup()) '''
+        return self.df.iloc[self.lookup(**point)]
+
+    def join(self, other, on, how='inner'):
+        '''
+        Match the rows of other, e.g. experimental points, to the simulated operating points.
+        Inputs:
+            - other: DataFrame
+            - on: dictionary {axis: column of other}, e.g. {'mdot_sccm': 'mdot', 'Id': 'Id'}
+            - how: 'inner' (only matched rows) or 'left' (unmatched rows of other have NaN results)
+        Outputs:
+            - DataFrame with one row per (row of other, matching simulated row): the columns of
+            other, suffixed with '_xp' if they also are result columns, then the result columns
+        '''
+        left = []
+        right = []
+        for i, row in enumerate(zip(*[other[c].to_numpy() for c in on.values()])):
+            rows = self.lookup(**dict(zip(on.keys(), row)))
+            if len(rows) == 0 and how == 'left':
+                rows = np.array([-1])
+            left.extend([i] * len(rows))
+            right.extend(rows)
+
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        xp = other.iloc[left].reset_index(drop=True)
+        xp.columns = [c + '_xp' if c in self.df.columns else c for c in xp.columns]
+        sim = self.df.iloc[np.maximum(right, 0)].reset_index(drop=True)
+        if len(sim) > 0:
+            sim[right < 0] = np.nan
+        return pd.concat([xp, sim], axis=1)
+
+
+def check_against_scan(index, axes_list=(('mdot_sccm',), ('Id',), ('Id', 'mdot_sccm'))):
+    '''
+    Compare the lookups of an index to np.isclose scans of the frame, for every distinct
+    operating point of each combination of axes.
+    Inputs:
+        - index: OperatingPointIndex
+        - axes_list: combinations of axes to check
+    Outputs:
+        - dictionary {axes: number of operating points whose rows differ}
+    '''
+    out = {}
+    for axes in axes_list:
+        axes = tuple(a for a in axes if a in index.axes)
+        if len(axes) == 0:
+            continue
+        points = np.unique(np.column_stack([index.values[a] for a in axes]), axis=0)
+        ndiff = 0
+        for point in points:
+            mask = np.ones(len(index.df), dtype=bool)
+            for a, v in zip(axes, point):
+                mask &= np.isclose(index.values[a], v, rtol=index.rtol[a], atol=0)
+            rows = index.lookup(**dict(zip(axes, point)))
+            ndiff += not np.array_equal(rows, np.flatnonzero(mask))
+        out[axes] = ndiff
+    return out
+
+
+def _product(lists):
+    ''' Cartesian product of lists of keys, as tuples '''
+    out = [()]
+    for values in lists:
+        out = [t + (v,) for t in out for v in values]
+    return out
+
+
+if __name__ == '__main__':
+    from poctools.loader import load_runs
+
+    parser = argparse.ArgumentParser(description="Compare the index lookups to np.isclose scans")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    args = parser.parse_args()
+
+    for path in args.files:
+        with pd.HDFStore(path, 'r') as store:
+            keys = [k for k in store.keys() if '/insert/' in k]
+        for key in keys:
+            index = OperatingPointIndex(load_runs([(path, key)]))
+            result = check_against_scan(index)
+            print(path, key, ":", ", ".join("{}: {} differ".format("+".join(a), n) for a, n in result.items()))
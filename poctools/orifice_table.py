@@ -0,0 +1,210 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: orifice_table.py
+Date: October, 2026
+Description: persistent orifice interpolation tables. The insert stage of the
+Taunay et al. model interpolates the orifice solution, which is computed over a
+grid of discharge currents and mass flow rates (phi_s=None). Insert cases outside
+the bounds of that grid fail.
+
+A table holds the orifice solution of a single geometry and gas, for all the gas
+temperatures that were requested so far, in the same layout as the files written by
+solve(): it can be used as-is as the orifice file of solve_point(). When a sweep falls
+outside the grid (or within a small margin of its edges), the grid is extended: only
+the missing blocks of the Id x mdot cross-product are computed, and merged into the table.
+"""
+import os
+import json
+import hashlib
+import tempfile
+
+import h5py
+import numpy as np
+import cathode.constants as cc
+
+from poctools.cache import HASHED_FIELDS, cathode_version
+
+
+def table_hash(cathode, version=None):
+    ''' SHA-256 hash of the geometry and gas of a cathode, and of the cathode package version '''
+    if version is None:
+        version = cathode_version()
+
+    inputs = {f: repr(getattr(cathode, f)) for f in HASHED_FIELDS}
+    inputs['version'] = version
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def _extension(current, query, margin):
+    '''
+    Values to add to an axis of the grid so that it covers the query values with
+    a relative margin on both sides.
+    '''
+    query = np.unique(np.asarray(query, dtype=np.float64))
+    if len(current) == 0:
+        return np.unique(np.concatenate([query, [query[0] * (1 - margin), query[-1] * (1 + margin)]]))
+
+    new = [query[(query < current[0]) | (query > current[-1])]]
+    if query[0] * (1 - margin / 2) < current[0]:
+        new.append([query[0] * (1 - margin)])
+    if query[-1] * (1 + margin / 2) > current[-1]:
+        new.append([query[-1] * (1 + margin)])
+
+    return np.setdiff1d(np.concatenate(new), current)
+
+
+class OrificeTable:
+    '''
+    On-disk orifice table of a cathode, stored in <directory>/<species>_<hash>.h5.
+    The margin is the relative distance kept between the grid edges and the queried
+    operating points.
+    '''
+    def __init__(self, directory, cathode, margin=0.05, version=None):
+        self.cathode = cathode
+        self.margin = margin
+        self.path = os.path.join(directory, cathode.species + '_' + table_hash(cathode, version)[:16] + '.h5')
+
+    def _conditions(self):
+        return self.cathode.species + '/simulations/conditions'
+
+    def _results(self, TgK):
+        return self.cathode.species + '/simulations/results/' + str(int(TgK)) + '/orifice'
+
+    def grid(self):
+        ''' Discharge currents (A) and mass flow rates (eqA) of the grid '''
+        if not os.path.exists(self.path):
+            return np.array([]), np.array([])
+        with h5py.File(self.path, 'r') as f:
+            cond = f[self._conditions()]
+            return cond['Id_orifice'][()], cond['mdot_orifice'][()]
+
+    def temperatures(self):
+        ''' Gas temperatures (K) stored in the table '''
+        if not os.path.exists(self.path):
+            return []
+        with h5py.File(self.path, 'r') as f:
+            root = f[self.cathode.species + '/simulations/results']
+            return sorted(float(Tg) for Tg in root if 'orifice' in root[Tg])
+
+    def plan(self, TgKvec, Idvec, mdotvec):
+        '''
+        Orifice computations needed to cover the Idvec x mdotvec grid at the gas
+        temperatures TgKvec.
+        Outputs:
+            - list of (TgK, Idvec, mdotvec) blocks to compute with solve(..., phi_s=None)
+            - (Idvec, mdotvec) of the extended grid
+        '''
+        Id0, mdot0 = self.grid()
+        stored = self.temperatures()
+
+        Id_new = _extension(Id0, Idvec, self.margin)
+        mdot_new = _extension(mdot0, mdotvec, self.margin)
+        Id1 = np.union1d(Id0, Id_new)
+        mdot1 = np.union1d(mdot0, mdot_new)
+
+        blocks = []
+        for TgK in sorted(set(stored) | {float(T) for T in TgKvec}):
+            if TgK not in stored:
+                blocks.append((TgK, Id1, mdot1))
+                continue
+            if len(Id_new) > 0:
+                blocks.append((TgK, Id_new, mdot1))
+            if len(mdot_new) > 0:
+                blocks.append((TgK, Id0, mdot_new))
+
+        return blocks, (Id1, mdot1)
+
+    def merge(self, grid, computed):
+        '''
+        Merge computed blocks into the table and set its grid.
+        Inputs:
+            - grid: (Idvec, mdotvec) of the extended grid, as returned by plan()
+            - computed: list of (TgK, file) where file holds the output of solve(..., phi_s=None)
+        '''
+        Idvec, mdotvec = grid
+        arrays = {TgK: [] for TgK, _ in computed}
+        for TgK in self.temperatures():
+            with h5py.File(self.path, 'r') as f:
+                arrays.setdefault(TgK, []).append(f[self._results(TgK)][()])
+        for TgK, scratch in computed:
+            with h5py.File(scratch, 'r') as f:
+                arrays[TgK].append(f[self._results(TgK)][()])
+
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            with h5py.File(tmp, 'w') as fdst:
+                ### Geometry from the existing table, or from any computed block
+                src = self.path if os.path.exists(self.path) else computed[0][1]
+                with h5py.File(src, 'r') as fsrc:
+                    if 'geometry' in fsrc:
+                        fsrc.copy(fsrc['geometry'], fdst, name='geometry')
+
+                cond = fdst.require_group(self._conditions())
+                cond['Id_orifice'] = Idvec
+                cond['mdot_orifice'] = mdotvec
+
+                ### Mass flow rates of the rows are in kg/s
+                mdot_kgs = np.asarray(mdotvec) * self.cathode.M_db * cc.atomic_mass / cc.e
+                for TgK, parts in arrays.items():
+                    fdst[self._results(TgK)] = _merge_rows(np.concatenate(parts), Idvec, mdot_kgs)
+
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def _grid_index(values, grid, rtol=1e-6):
+    ''' Index of each value in grid, or -1 if it is not a grid value (within rtol) '''
+    grid = np.asarray(grid, dtype=np.float64)
+    idx = np.argmin(np.abs(values[:, None] - grid[None, :]), axis=1)
+    return np.where(np.abs(grid[idx] - values) <= rtol * np.abs(grid[idx]), idx, -1)
+
+
+def _merge_rows(data, Idvec, mdot_kgs):
+    '''
+    Sort the rows [mdot (kg/s), Id (A), ng (1/m3), value] of an orifice solution in the
+    order written by solve() (mass flow rate, then discharge current, then density), and
+    drop the rows that were computed twice. The rows must lie on the Idvec x mdot_kgs grid,
+    with the same number of rows for every (Id, mdot) pair of the grid.
+    '''
+    order = np.lexsort((data[:, 2], data[:, 1], data[:, 0]))
+    data = data[order]
+    keep = np.ones(len(data), dtype=bool)
+    keep[1:] = np.any(data[1:, :3] != data[:-1, :3], axis=1)
+    data = data[keep]
+
+    iId = _grid_index(data[:, 1], Idvec)
+    imdot = _grid_index(data[:, 0], mdot_kgs)
+    if np.any(iId < 0) or np.any(imdot < 0):
+        raise RuntimeError("The orifice solution has rows outside of the Id x mdot grid")
+
+    counts = np.bincount(imdot * len(Idvec) + iId, minlength=len(Idvec) * len(mdot_kgs))
+    if counts.min() == 0 or counts.min() != counts.max():
+        raise RuntimeError("The orifice solution does not cover the full Id x mdot grid")
+
+    return data
@@ -0,0 +1,171 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: precision.py
+Date: October, 2026
+Description: reduced-precision storage of the results. The computed columns (pressures,
+temperatures, densities, lengths) are stored in float32, or in a per-column type; the
+operating point and geometry inputs stay in float64 so that they still match the values
+of the sweeps exactly. The discrete axes (sheath voltage, gas temperature) are stored as
+integers when all their values are integral. In memory, string columns can also be
+converted to categoricals.
+
+The reduction is used by the sweep writer (run_sweeps(precision='float32'), or
+run_sweeps.py --precision float32) and by the loader (load_runs(precision='float32')).
+precision_report() gives the maximum relative error of each column.
+
+Usage:
+    python -m poctools.precision results/*.h5 [--output-dir results/float32]
+"""
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from poctools.migrate import _copy_except_runs
+
+### Inputs of a run: kept in float64
+INPUT_COLUMNS = ['dischargeCurrent', 'massFlowRate_SI', 'massFlowRate_eqA', 'massFlowRate_sccm',
+                 'mass', 'ionizationEnergy', 'insertDiameter', 'orificeDiameter', 'orificeLength',
+                 'upstreamPressureTap', 'emitterLength']
+
+### Discrete axes: stored as integers if all the values are integral
+DISCRETE_COLUMNS = ['sheathVoltage', 'neutralGasTemperature']
+
+PRECISIONS = ['float64', 'float32']
+
+
+def column_dtypes(df, precision='float32'):
+    '''
+    Storage type of each numeric column of a run.
+    Inputs:
+        - df: DataFrame of a run
+        - precision: 'float64' (no change), 'float32', or a dictionary {column: dtype}
+        of per-column types. Columns that are not in the dictionary keep their type.
+    Outputs:
+        - dictionary {column: dtype} of the columns whose type changes
+    '''
+    if isinstance(precision, dict):
+        return {c: np.dtype(t) for c, t in precision.items() if c in df.columns and df[c].dtype != t}
+    if precision == 'float64':
+        return {}
+    if precision != 'float32':
+        raise ValueError("Unknown precision " + str(precision) + ". Use one of " + str(PRECISIONS))
+
+    dtypes = {}
+    for c in df.columns:
+        if c in INPUT_COLUMNS or df[c].dtype != np.float64:
+            continue
+        values = df[c].to_numpy()
+        if (c in DISCRETE_COLUMNS and np.all(np.isfinite(values)) and np.all(values == np.round(values))
+                and np.all(np.abs(values) <= np.iinfo(np.int16).max)):
+            dtypes[c] = np.dtype(np.int16)
+        else:
+            dtypes[c] = np.dtype(np.float32)
+    return dtypes
+
+
+def reduce_precision(df, precision='float32', categorical=False):
+    '''
+    Convert a run to reduced precision.
+    Inputs:
+        - df: DataFrame of a run
+        - precision: see column_dtypes()
+        - categorical: if True, string columns are converted to categoricals. The pandas
+        "fixed" HDF5 format cannot store categoricals: only use it in memory.
+    Outputs:
+        - converted DataFrame. df is not modified.
+    '''
+    df = df.astype(column_dtypes(df, precision))
+    if categorical:
+        strings = [c for c in df.columns if pd.api.types.is_string_dtype(df[c]) and c != 'bisectionOutput']
+        df = df.astype({c: 'category' for c in strings})
+    return df
+
+
+def precision_report(original, reduced):
+    '''
+    Maximum relative error of each numeric column of a reduced-precision run.
+    Zeros and NaNs of the original must be reproduced exactly; otherwise the error is inf.
+    Returns a DataFrame with the column, its stored type, and the maximum relative error.
+    '''
+    report = []
+    for c in original.columns:
+        if not pd.api.types.is_numeric_dtype(original[c]) or c not in reduced.columns:
+            continue
+        a = original[c].to_numpy(dtype=np.float64)
+        b = reduced[c].to_numpy(dtype=np.float64)
+        same = (a == b) | (np.isnan(a) & np.isnan(b))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            err = np.where(same, 0.0, np.abs(b - a) / np.abs(a))
+        err[~same & ~np.isfinite(err)] = np.inf
+        report.append({'column': c, 'dtype': str(reduced[c].dtype),
+                       'max_rel_error': err.max() if len(err) > 0 else 0.0})
+    return pd.DataFrame(report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reduced-precision copies of result files, with error report")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('--output-dir', default=None,
+                        help="Write reduced-precision copies of the runs to this directory")
+    args = parser.parse_args()
+
+    errors = []
+    memory = [0, 0]
+    for path in args.files:
+        output = None
+        if args.output_dir is not None:
+            os.makedirs(args.output_dir, exist_ok=True)
+            output = os.path.join(args.output_dir, os.path.basename(path))
+            if os.path.abspath(output) == os.path.abspath(path):
+                parser.error("--output-dir must differ from the directory of " + path)
+            # Orifice solution, conditions, and geometry, as in poctools.migrate and poctools.repack
+            _copy_except_runs(path, output)
+
+        with pd.HDFStore(path, 'r') as store:
+            keys = [k for k in store.keys() if '/insert/' in k]
+            for key in keys:
+                df = store.select(key)
+                reduced = reduce_precision(df)
+                errors.append(precision_report(df, reduced))
+                memory[0] += df.select_dtypes(include=np.number).memory_usage(index=False).sum()
+                memory[1] += reduced.select_dtypes(include=np.number).memory_usage(index=False).sum()
+                if output is not None:
+                    # Uncompressed, with the bisectionOutput as stored, as in poctools.repack. The string
+                    # columns are stored as objects, in a single block with bisectionOutput as in the
+                    # original runs: each string block takes at least one 1 MB chunk otherwise
+                    reduced = reduced.astype({c: object for c in reduced.columns if reduced[c].dtype == 'str'})
+                    with pd.HDFStore(output, 'a') as out:
+                        out.put(key, reduced)
+                        description = getattr(store.get_storer(key).attrs, 'description', None)
+                        if description is not None:
+                            out.get_storer(key).attrs.description = description
+
+        if output is not None:
+            print(path, "->", output, "{:.2f} MB -> {:.2f} MB".format(
+                os.path.getsize(path) / 1e6, os.path.getsize(output) / 1e6))
+
+    report = pd.concat(errors).groupby('column', sort=False).agg({'dtype': 'first', 'max_rel_error': 'max'})
+    print(report.to_string())
+    print("Numeric columns: {:.1f} kB -> {:.1f} kB".format(memory[0] / 1e3, memory[1] / 1e3))
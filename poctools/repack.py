@@ -0,0 +1,197 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: repack.py
+Date: October, 2026
+Description: maintenance of the results/*.h5 stores. Each file is rewritten node by
+node, which reclaims the space that HDF5 never frees when keys are removed or
+overwritten. The runs are copied as they are, with the same layout and the same
+(pickled) "bisectionOutput" column, so that readers that use pd.read_hdf directly see
+no difference. The copy is uncompressed by default: compressed stores (e.g., --complib
+blosc:zstd) are up to 20 times smaller, but 30 to 80% slower to read.
+
+Runs that are not referenced by the simulation inventory, or whose inventory
+description matches a pattern (e.g., debugging runs), are dropped. They are first copied
+to an archive file; dropping runs without an archive requires --discard. Files whose
+cathode has no entry in the inventory keep all their runs.
+
+The size change and the change in the time to read all the runs of each file are
+reported. Each kept run is read back and compared to the original before a file is
+replaced.
+
+Usage:
+    python -m poctools.repack results/*.h5 --inventory simulation_inventory.csv
+        (--archive results/archive | --discard) [--drop-matching "debugging"]
+        [--complib blosc:zstd] [--dry-run]
+"""
+import os
+import re
+import time
+import shutil
+import argparse
+import tempfile
+
+import tables
+import pandas as pd
+
+from poctools.catalog import cathode_name
+from poctools.inventory import read_inventory
+from poctools.loader import load_runs
+from poctools.migrate import _copy_except_runs, _same
+
+
+def referenced_keys(inventory, drop_matching=None):
+    '''
+    Keys of the runs referenced by the inventory, per cathode (lower case).
+    Entries whose description matches the regular expression drop_matching are not
+    counted as references.
+    Returns {cathode: set of keys}. Cathodes that only have dropped entries map to
+    an empty set.
+    '''
+    inv = read_inventory(inventory)
+    refs = {}
+    for cathode, key, description in zip(inv['cathode'], inv['full_key'], inv['description'].fillna('')):
+        keys = refs.setdefault(cathode.lower(), set())
+        if drop_matching is None or not re.search(drop_matching, description):
+            keys.add(key.lstrip('/'))
+    return refs
+
+
+def _read_time(path, keys, repeat=3):
+    ''' Best time to read a list of runs of a file '''
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        load_runs([(path, k) for k in keys])
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _write_runs(src, dst, keys, complib=None, complevel=0):
+    '''
+    Copy runs from src to dst node by node, with their layout, attributes (description),
+    and table indexes. complib, if given, compresses the copied datasets.
+    '''
+    filters = tables.Filters(complevel=complevel, complib=complib) if complib else tables.Filters(0)
+    with tables.open_file(src, 'r') as fsrc, tables.open_file(dst, 'a') as fdst:
+        for key in keys:
+            parent, name = ('/' + key).rsplit('/', 1)
+            group = fdst.root
+            for part in parent.strip('/').split('/'):
+                group = group._f_get_child(part) if part in group else fdst.create_group(group, part)
+            fsrc.get_node('/' + key)._f_copy(group, name, recursive=True, filters=filters, propindexes=True)
+
+
+def repack_file(path, keep=None, archive=None, complib=None, complevel=5, discard=False, dry_run=False):
+    '''
+    Rewrite an HDF5 result file, dropping the runs that are not in keep.
+    Inputs:
+        - path: HDF5 result file
+        - keep: set of run keys to keep. Defaults to all the runs
+        - archive: file to which the dropped runs are copied
+        - complib, complevel: optional compression library and level (see tables.Filters).
+        Defaults to no compression, which is the fastest to read
+        - discard: drop runs without an archive
+        - dry_run: only report what would be done
+    Outputs:
+        - dictionary with the kept and dropped keys, the sizes (bytes) and the read
+        times (s) before and after
+    '''
+    with pd.HDFStore(path, 'r') as store:
+        keys = [k.lstrip('/') for k in store.keys() if '/insert/' in k]
+    kept = keys if keep is None else [k for k in keys if k in keep]
+    dropped = [k for k in keys if k not in kept]
+
+    report = {'path': path, 'kept': kept, 'dropped': dropped,
+              'size_before': os.path.getsize(path), 'read_before': _read_time(path, kept)}
+    if dry_run:
+        return report
+
+    if len(dropped) > 0 and archive is None and not discard:
+        raise ValueError(path + ": " + str(len(dropped)) + " runs would be deleted without an archive; "
+                         "give an archive, or discard=True")
+
+    if archive is not None and len(dropped) > 0:
+        os.makedirs(os.path.dirname(os.path.abspath(archive)), exist_ok=True)
+        _write_runs(path, archive, dropped, complib, complevel)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.h5.tmp')
+    os.close(fd)
+    try:
+        _copy_except_runs(path, tmp)
+        _write_runs(path, tmp, kept, complib, complevel)
+
+        for key in kept:
+            df = load_runs([(tmp, key)]).drop(columns=['path', 'key'])
+            if not _same(df, load_runs([(path, key)]).drop(columns=['path', 'key'])):
+                raise RuntimeError("Repacked run " + key + " of " + path + " differs from the original")
+
+        shutil.move(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    report['size_after'] = os.path.getsize(path)
+    report['read_after'] = _read_time(path, kept)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Repack, compress, and garbage-collect result files")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('--inventory', default='simulation_inventory.csv',
+                        help="Simulation inventory that lists the runs to keep")
+    parser.add_argument('--drop-matching', default=None,
+                        help="Also drop the runs whose inventory description matches this regular expression")
+    parser.add_argument('--archive', default=None,
+                        help="Directory where the dropped runs are archived before removal")
+    parser.add_argument('--discard', action='store_true',
+                        help="Delete the dropped runs without archiving them")
+    parser.add_argument('--complib', default=None,
+                        help="Compression library, e.g. blosc:zstd (default: none, fastest to read)")
+    parser.add_argument('--complevel', type=int, default=5)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    refs = referenced_keys(args.inventory, args.drop_matching)
+    for path in args.files:
+        cathode = cathode_name(path).lower()
+        keep = refs.get(cathode)
+        if keep is None:
+            print(path, ": no inventory entry for", cathode, "- all runs are kept")
+
+        archive = None
+        if args.archive is not None:
+            archive = os.path.join(args.archive, os.path.basename(path))
+
+        try:
+            r = repack_file(path, keep, archive, args.complib, args.complevel, args.discard, args.dry_run)
+        except ValueError as err:
+            print(err, "(use --archive or --discard)")
+            continue
+        print(path, ":", len(r['kept']), "runs kept,", len(r['dropped']), "dropped")
+        for key in r['dropped']:
+            print("    drop", key)
+        if not args.dry_run:
+            print("    size {:.2f} MB -> {:.2f} MB, read time {:.1f} ms -> {:.1f} ms".format(
+                r['size_before'] / 1e6, r['size_after'] / 1e6, 1e3 * r['read_before'], 1e3 * r['read_after']))
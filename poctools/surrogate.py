@@ -0,0 +1,320 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: surrogate.py
+Date: October, 2026
+Description: surrogate model of the Taunay et al. model, trained on the results
+stored in results/*.h5. The model is a ridge-regularized polynomial in the logarithms
+of the inputs:
+    - geometry: insert and orifice diameters, orifice length, emitter length,
+    pressure tap position
+    - gas: mass and ionization energy
+    - operating point: discharge current, mass flow rate, neutral gas temperature,
+    sheath voltage
+The outputs (total pressure, insert temperature, emission length, insert electron
+temperature) are predicted in log space as well. Most outputs follow power laws of the
+inputs, which a low-order polynomial in log space captures well. A prediction is a
+polynomial evaluation, so that millions of candidates can be screened in a few seconds.
+
+The headline error is the leave-one-cathode-out cross-validated error: points of the same
+cathode are strongly correlated, so random folds over rows only measure interpolation
+within known cathodes. Predictions are only returned inside the training domain: the
+bounding box of the training inputs, and within a distance of the training points (see
+Surrogate.in_domain). Outside of it, predict() returns NaN, or raises, or flags the rows.
+
+Usage:
+    python -m poctools.surrogate results/*.h5 -o surrogate.npz [--degree 3] [--alpha 1e-3]
+"""
+import time
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+### Inputs of the surrogate model, as named in the results DataFrames
+FEATURES = ['insertDiameter', 'orificeDiameter', 'orificeLength', 'emitterLength',
+            'upstreamPressureTap', 'mass', 'ionizationEnergy',
+            'dischargeCurrent', 'massFlowRate_eqA', 'neutralGasTemperature', 'sheathVoltage']
+
+### Outputs of the surrogate model
+OUTPUTS = ['totalPressureCorr', 'insertTemperature', 'emissionLength', 'insertElectronTemperature']
+
+### Geometry that identifies a cathode: orifice and gas variants of a cathode are grouped together
+CATHODE_COLUMNS = ['insertDiameter', 'emitterLength', 'upstreamPressureTap']
+
+### Distance to the training points, relative to their largest nearest-neighbour distance,
+### beyond which an input is outside the training domain
+DOMAIN_FACTOR = 2.0
+
+
+def load_results(paths, outputs=OUTPUTS):
+    '''
+    Load the insert runs of a list of HDF5 files.
+    Inputs:
+        - paths: HDF5 files
+        - outputs: output columns to keep
+    Outputs:
+        - DataFrame with the FEATURES and outputs columns, the name of the source file, and
+        a cathode label (one per CATHODE_COLUMNS geometry).
+        Rows with non-finite or non-positive values are dropped.
+    '''
+    frames = []
+    for path in paths:
+        with pd.HDFStore(path, 'r') as store:
+            keys = [k for k in store.keys() if '/insert/' in k]
+            for key in keys:
+                df = store.select(key)[FEATURES + list(outputs)]
+                frames.append(df.assign(source=path))
+
+    data = pd.concat(frames, ignore_index=True)
+    values = data[FEATURES + list(outputs)].to_numpy(dtype=np.float64)
+    keep = np.all(np.isfinite(values) & (values > 0), axis=1)
+
+    data = data[keep].reset_index(drop=True)
+    data['cathode'] = data.groupby(CATHODE_COLUMNS).ngroup()
+
+    return data
+
+
+def _monomials(nfeatures, degree):
+    ''' Indices of the features multiplied in each monomial, up to a given degree '''
+    terms = [()]
+    for d in range(1, degree + 1):
+        terms += list(itertools.combinations_with_replacement(range(nfeatures), d))
+    return terms
+
+
+class Surrogate:
+    '''
+    Polynomial ridge regression of log10(outputs) on the standardized log10(inputs).
+    '''
+    def __init__(self, degree=3, alpha=1e-3, outputs=OUTPUTS):
+        self.degree = degree
+        self.alpha = alpha
+        self.outputs = list(outputs)
+        self.mean = None
+        self.std = None
+        self.coef = None
+        self.lower = None
+        self.upper = None
+        self.points = None
+        self.max_distance = None
+        self._tree = None
+
+    def _standardize(self, X):
+        return (np.log10(X) - self.mean) / self.std
+
+    def _design(self, X):
+        ''' Design matrix of the polynomial for inputs X (one row per point) '''
+        Z = self._standardize(X)
+        terms = _monomials(Z.shape[1], self.degree)
+        A = np.ones((Z.shape[0], len(terms)))
+        for j, term in enumerate(terms):
+            for i in term:
+                A[:, j] *= Z[:, i]
+        return A
+
+    def fit(self, data):
+        '''
+        Fit the model to a DataFrame holding the FEATURES and outputs columns.
+        Returns the fitted model.
+        '''
+        X = data[FEATURES].to_numpy(dtype=np.float64)
+        Y = np.log10(data[self.outputs].to_numpy(dtype=np.float64))
+
+        logX = np.log10(X)
+        self.mean = logX.mean(axis=0)
+        # Features that do not vary in the training set (e.g., a single gas) are only centered
+        self.std = logX.std(axis=0)
+        self.std[self.std == 0] = 1.
+
+        ### Training domain: bounding box and training points, in standardized log space
+        self.lower = logX.min(axis=0)
+        self.upper = logX.max(axis=0)
+        self._set_points(np.unique(self._standardize(X), axis=0))
+
+        A = self._design(X)
+        ### Ridge regression; the intercept is not penalized
+        penalty = self.alpha * len(A) * np.eye(A.shape[1])
+        penalty[0, 0] = 0.
+        self.coef = np.linalg.solve(A.T @ A + penalty, A.T @ Y)
+
+        return self
+
+    def _set_points(self, points):
+        ''' Training points of the domain check; the distance threshold is DOMAIN_FACTOR times
+        the largest distance between a training point and its nearest neighbour '''
+        self.points = points
+        self._tree = cKDTree(points)
+        if len(points) > 1:
+            d, _ = self._tree.query(points, k=2)
+            self.max_distance = DOMAIN_FACTOR * d[:, 1].max()
+        else:
+            self.max_distance = 0.
+
+    @staticmethod
+    def _inputs(X):
+        if isinstance(X, (pd.DataFrame, dict)):
+            X = np.column_stack([np.asarray(X[c], dtype=np.float64) for c in FEATURES])
+        return np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+    def in_domain(self, X):
+        '''
+        True for the inputs inside the training domain: within the bounding box of the
+        training inputs, and within max_distance of a training point (standardized log space).
+        Features that do not vary in the training set (e.g., a single gas) must match exactly.
+        '''
+        X = self._inputs(X)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            logX = np.log10(X)
+            tol = 1e-9 * np.maximum(1., np.abs(self.upper))
+            inside = np.all((logX >= self.lower - tol) & (logX <= self.upper + tol), axis=1)
+        if np.any(inside):
+            d, _ = self._tree.query(self._standardize(X[inside]))
+            inside[inside] = d <= self.max_distance
+        return inside
+
+    def predict(self, X, outside='nan'):
+        '''
+        Predict the outputs for a set of inputs.
+        Inputs:
+            - X: DataFrame (or dictionary of arrays) with the FEATURES columns, or an array
+            whose columns are ordered as FEATURES
+            - outside: inputs outside the training domain give NaN outputs ('nan'), raise a
+            ValueError ('raise'), or are predicted anyway ('keep')
+        Outputs:
+            - DataFrame with one column per output, and an "in_domain" column
+        '''
+        if outside not in ('nan', 'raise', 'keep'):
+            raise ValueError("outside must be 'nan', 'raise', or 'keep'")
+
+        X = self._inputs(X)
+        inside = self.in_domain(X)
+        if outside == 'raise' and not np.all(inside):
+            raise ValueError(str(np.sum(~inside)) + " inputs are outside the training domain of the surrogate")
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            Y = 10**(self._design(X) @ self.coef)
+        if outside == 'nan':
+            Y[~inside] = np.nan
+
+        df = pd.DataFrame(Y, columns=self.outputs)
+        df['in_domain'] = inside
+        return df
+
+    def save(self, path):
+        ''' Store the fitted model in a .npz file '''
+        np.savez(path, degree=self.degree, alpha=self.alpha,
+                 features=np.array(FEATURES), outputs=np.array(self.outputs),
+                 mean=self.mean, std=self.std, coef=self.coef,
+                 lower=self.lower, upper=self.upper, points=self.points)
+
+    @classmethod
+    def load(cls, path):
+        ''' Load a model stored with save() '''
+        with np.load(path, allow_pickle=False) as f:
+            if list(f['features']) != FEATURES:
+                raise ValueError("The features of " + str(path) + " do not match the surrogate features")
+            if 'points' not in f.files:
+                raise ValueError(str(path) + " has no training domain: the model must be retrained")
+            model = cls(int(f['degree']), float(f['alpha']), list(f['outputs']))
+            model.mean = f['mean']
+            model.std = f['std']
+            model.coef = f['coef']
+            model.lower = f['lower']
+            model.upper = f['upper']
+            model._set_points(f['points'])
+        return model
+
+
+def cross_validate(data, degree=3, alpha=1e-3, outputs=OUTPUTS, folds=5, groups='cathode', seed=0):
+    '''
+    Cross-validation of the surrogate.
+    Inputs:
+        - data: DataFrame from load_results()
+        - degree, alpha: model parameters
+        - outputs: outputs to fit
+        - folds: number of random folds over the rows, used if groups is None
+        - groups: name of a column of data. Each group is left out in turn; the default,
+        'cathode', measures the error on a cathode that is not in the training set.
+        Random folds (groups=None) mix the points of a run between folds and only measure
+        the interpolation error within known cathodes.
+        - seed: seed of the random fold assignment
+    Outputs:
+        - DataFrame with, per output, the median, 90th percentile, and maximum of the
+        absolute relative error on the left-out points. The errors are computed without the
+        domain check of predict().
+    '''
+    if groups is None:
+        rng = np.random.default_rng(seed)
+        labels = rng.permutation(len(data)) % folds
+    else:
+        labels = data[groups].to_numpy()
+
+    errors = []
+    for label in np.unique(labels):
+        test = labels == label
+        model = Surrogate(degree, alpha, outputs).fit(data[~test])
+        truth = data.loc[test, outputs].to_numpy(dtype=np.float64)
+        pred = model.predict(data[test], outside='keep')[outputs].to_numpy()
+        errors.append(np.abs(pred / truth - 1.))
+
+    errors = np.concatenate(errors)
+    return pd.DataFrame({'output': outputs,
+                         'median': np.median(errors, axis=0),
+                         'p90': np.percentile(errors, 90, axis=0),
+                         'max': np.max(errors, axis=0)})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train a surrogate of the Taunay et al. model")
+    parser.add_argument('files', nargs='+', help="HDF5 result files")
+    parser.add_argument('-o', '--output', default='surrogate.npz', help="Model file")
+    parser.add_argument('--degree', type=int, default=3)
+    parser.add_argument('--alpha', type=float, default=1e-3)
+    parser.add_argument('--folds', type=int, default=5)
+    args = parser.parse_args()
+
+    data = load_results(args.files)
+    print("Training points:", len(data), "from", data['source'].nunique(), "files")
+
+    if data['cathode'].nunique() > 1:
+        print("Cross-validated relative error, leave one cathode out (", data['cathode'].nunique(), "cathodes)")
+        print(cross_validate(data, args.degree, args.alpha).to_string(index=False))
+    else:
+        print("A single cathode: the error on an unseen cathode cannot be estimated")
+    print("Interpolation error within the known cathodes,", args.folds, "random folds")
+    print(cross_validate(data, args.degree, args.alpha, folds=args.folds, groups=None).to_string(index=False))
+
+    model = Surrogate(args.degree, args.alpha).fit(data)
+    model.save(args.output)
+
+    X = data[FEATURES].to_numpy()
+    X = X[np.random.default_rng(0).integers(len(X), size=100000)]
+    t0 = time.perf_counter()
+    model.predict(X, outside='keep')
+    dt = time.perf_counter() - t0
+    print("Prediction time: {:.2f} us/point".format(1e6 * dt / len(X)))
+    print("Model written to", args.output)
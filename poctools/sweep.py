@@ -0,0 +1,689 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: sweep.py
+Date: October, 2026
+Description: parallel sweep executor for the Taunay et al. model. The full
+(TgK, Id, mdot, phi_s) cartesian product is split into single operating points
+that are solved on a process pool. Rows are merged back, in a deterministic order,
+into the usual per-temperature keys 'species/simulations/results/<Tg>/insert/r<timestamp>'.
+"""
+import os
+import tempfile
+import itertools
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from cathode.models.taunay_et_al import solve
+
+from poctools.cache import orifice_hash, split_points
+from poctools.checkpoint import Ledger
+from poctools.orifice_table import OrificeTable
+from poctools.precision import precision_report, reduce_precision
+
+
+@dataclass(frozen=True)
+class Cathode:
+    '''
+    Name, output file, gas, and geometry of a cathode. Units are the same as the
+    ones used in the generate_numerical_results scripts: diameters and orifice
+    length in mm, upstream pressure tap position and emitter length in m.
+    '''
+    name: str
+    fname: str
+    species: str
+    M_db: float
+    eiz_db: float
+    do_db: float
+    dc_db: float
+    Lo_db: float
+    Lupstream: float
+    Lemitter: float
+
+    def solve_args(self):
+        ''' Positional arguments of solve(), after the discharge current and mass
+        flow rate vectors, up to (and excluding) the neutral gas temperature. '''
+        return (self.M_db, self.dc_db, self.do_db, self.Lo_db,
+                self.Lupstream, self.Lemitter, self.eiz_db)
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    '''
+    A single operating point. The mass flow rate is in eqA, as in solve().
+    phi_s is None for an orifice-only computation. orifice is the hash of the orifice
+    grid the insert stage interpolates on (see with_orifice()); it only enters the
+    cache key.
+    '''
+    cathode: Cathode
+    TgK: float
+    Id: float
+    mdot: float
+    phi_s: float
+    orifice: str = None
+
+
+def result_key(species, TgK, timestamp=None):
+    '''
+    Build the HDF5 key under which a run is stored:
+    '<species>/simulations/results/<Tg>/insert/r<UTC time results were written>'
+    '''
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+    return species + '/simulations/results/' + str(int(TgK)) + '/insert/r' + timestamp
+
+
+def sweep_points(cathode, TgKvec, Idvec, mdotvec, phisvec):
+    '''
+    Cartesian product of the sweep axes. The ordering matches the one of the
+    rows written by solve(): temperature, then mass flow rate, then discharge
+    current, and finally sheath voltage. A phisvec of None yields orifice-only points.
+    '''
+    if phisvec is None:
+        phisvec = [None]
+
+    return [SweepPoint(cathode, float(TgK), float(Id), float(mdot),
+                       None if phi_s is None else float(phi_s))
+            for TgK, mdot, Id, phi_s in itertools.product(TgKvec, mdotvec, Idvec, phisvec)]
+
+
+def with_orifice(points, Idvec, mdotvec):
+    ''' Tag points with the hash of the Idvec x mdotvec orifice grid they are solved against '''
+    h = orifice_hash(Idvec, mdotvec)
+    return [replace(p, orifice=h) for p in points]
+
+
+def stored_orifice_grid(path, species):
+    ''' Orifice grid (Idvec, mdotvec) stored in an HDF5 file; empty arrays if there is none '''
+    name = species + '/simulations/conditions'
+    if not os.path.exists(path):
+        return np.array([]), np.array([])
+    with h5py.File(path, 'r') as f:
+        if name not in f:
+            return np.array([]), np.array([])
+        return f[name]['Id_orifice'][()], f[name]['mdot_orifice'][()]
+
+
+def _orifice_groups(species, TgK):
+    ''' Groups of an HDF5 file that hold the orifice solution for a given temperature '''
+    return ['geometry',
+            species + '/simulations/conditions',
+            species + '/simulations/results/' + str(int(TgK)) + '/orifice']
+
+
+def copy_orifice_data(src, dst, species, TgK):
+    '''
+    Copy the orifice solution (interpolation grid and results) for a given gas
+    temperature from the HDF5 file src to dst. Missing groups are ignored.
+    '''
+    with h5py.File(src, 'r') as fsrc, h5py.File(dst, 'a') as fdst:
+        for name in _orifice_groups(species, TgK):
+            if name not in fsrc:
+                continue
+            if name in fdst:
+                del fdst[name]
+            parent = os.path.dirname(name)
+            if parent:
+                fdst.require_group(parent)
+            fsrc.copy(fsrc[name], fdst, name=name)
+
+
+def _solve_orifice(cathode, TgK, Idvec, mdotvec, scratch_file):
+    ''' Orifice-only solution over the Idvec x mdotvec grid, written to scratch_file '''
+    solve(np.asarray(Idvec, dtype=np.float64), np.asarray(mdotvec, dtype=np.float64),
+          *cathode.solve_args(), TgK, scratch_file, verbose=False, phi_s=None)
+    return scratch_file
+
+
+def solve_point(point, orifice_file=None):
+    '''
+    Solve a single operating point in a private scratch file. The orifice solution
+    is seeded from orifice_file so that only the insert stage is computed.
+    Returns the DataFrame produced by solve().
+    '''
+    cat = point.cathode
+    with tempfile.TemporaryDirectory(prefix='sweep_') as tmpdir:
+        scratch_file = os.path.join(tmpdir, 'point.h5')
+        if orifice_file is not None and os.path.exists(orifice_file):
+            copy_orifice_data(orifice_file, scratch_file, cat.species, point.TgK)
+
+        phi_s = None if point.phi_s is None else np.array([point.phi_s])
+        _, df = solve(np.array([point.Id]), np.array([point.mdot]),
+                      *cat.solve_args(), point.TgK,
+                      scratch_file, verbose=False, phi_s=phi_s)
+
+    return df
+
+
+def solve_block(points, orifice_file=None):
+    '''
+    Solve a block of points with a single call to solve(). The points must share the
+    cathode, gas temperature, and mass flow rate, and be ordered as the product of
+    their discharge currents (outer) and sheath voltages (inner), as produced by
+    batch_points(). This amortizes the per-call cost of solve() (scratch file, orifice
+    interpolation setup, HDF5 output) and the process round-trips over the whole block.
+    It is not a batched residual: solve() still iterates over the points of the block
+    one at a time, so the work per point is unchanged.
+    Returns one DataFrame per point, identical to the output of solve_point().
+    '''
+    if len(points) == 1:
+        return [solve_point(points[0], orifice_file)]
+
+    cat = points[0].cathode
+    TgK = points[0].TgK
+    Idvec = np.array(list(dict.fromkeys(p.Id for p in points)))
+    phisvec = np.array(list(dict.fromkeys(p.phi_s for p in points)))
+    if len(Idvec) * len(phisvec) != len(points):
+        raise ValueError("The points do not form an Id x phi_s block")
+
+    with tempfile.TemporaryDirectory(prefix='sweep_') as tmpdir:
+        scratch_file = os.path.join(tmpdir, 'block.h5')
+        if orifice_file is not None and os.path.exists(orifice_file):
+            copy_orifice_data(orifice_file, scratch_file, cat.species, TgK)
+
+        _, df = solve(Idvec, np.array([points[0].mdot]), *cat.solve_args(), TgK,
+                      scratch_file, verbose=False, phi_s=phisvec)
+
+    ### Split the block back into single points
+    if not (np.allclose(df['dischargeCurrent'], [p.Id for p in points]) and
+            np.allclose(df['sheathVoltage'], [p.phi_s for p in points])):
+        raise RuntimeError("Unexpected row ordering in the output of solve()")
+
+    return [df.iloc[[k]].reset_index(drop=True) for k in range(len(points))]
+
+
+def batch_points(points, orifice_files, block_size):
+    '''
+    Group points into blocks of at most block_size points that can be solved with
+    solve_block(): same cathode, gas temperature, mass flow rate, and orifice file, and a
+    full product of discharge currents and sheath voltages. Points that cannot be
+    grouped are left in blocks of one.
+    Returns a list of blocks, each a list of indices into points.
+    '''
+    groups = {}
+    for idx, (p, f) in enumerate(zip(points, orifice_files)):
+        if p.phi_s is None:
+            groups[('single', idx)] = [idx]
+            continue
+        groups.setdefault((p.cathode, p.TgK, p.mdot, f), []).append(idx)
+
+    blocks = []
+    for members in groups.values():
+        by_Id = {}
+        for idx in members:
+            by_Id.setdefault(points[idx].Id, []).append(idx)
+
+        phis = [tuple(points[i].phi_s for i in v) for v in by_Id.values()]
+        if len(set(phis)) != 1:
+            blocks.extend([idx] for idx in members)
+            continue
+
+        ncurrents = max(1, block_size // len(phis[0]))
+        rows = list(by_Id.values())
+        for k in range(0, len(rows), ncurrents):
+            blocks.append([idx for row in rows[k:k + ncurrents] for idx in row])
+
+    return blocks
+
+
+def _solve_job(points, orifice_file):
+    ''' Solve a single point or a block of points. Returns a list of DataFrames. '''
+    if len(points) == 1:
+        return [solve_point(points[0], orifice_file)]
+    return solve_block(points, orifice_file)
+
+
+def prime_orifice(cathode, TgKvec, Idvec, mdotvec, savefile, nproc=None):
+    '''
+    Run the orifice stage for each gas temperature (one process per temperature)
+    and store the results in savefile. This is the equivalent of running solve()
+    with phi_s=None before the actual insert cases.
+    '''
+    with tempfile.TemporaryDirectory(prefix='orifice_') as tmpdir:
+        scratch = [os.path.join(tmpdir, 'orifice_' + str(int(TgK)) + '.h5') for TgK in TgKvec]
+        with ProcessPoolExecutor(max_workers=nproc) as executor:
+            futures = [executor.submit(_solve_orifice, cathode, TgK, Idvec, mdotvec, f)
+                       for TgK, f in zip(TgKvec, scratch)]
+            for future in futures:
+                future.result()
+
+        for TgK, f in zip(TgKvec, scratch):
+            copy_orifice_data(f, savefile, cathode.species, TgK)
+
+
+def run_points(points, orifice_files=None, nproc=None, block_size=1):
+    '''
+    Solve a list of operating points on a process pool. orifice_files is either
+    a single file or a list with one file per point. If block_size is larger than
+    one, points are grouped in blocks solved with a single call to solve().
+    Returns one DataFrame per point, in the same order as the input list.
+    '''
+    if len(points) == 0:
+        return []
+
+    if orifice_files is None or isinstance(orifice_files, str):
+        orifice_files = [orifice_files] * len(points)
+
+    nproc = nproc or os.cpu_count()
+    if block_size > 1:
+        blocks = batch_points(points, orifice_files, block_size)
+    else:
+        blocks = [[idx] for idx in range(len(points))]
+
+    frames = [None] * len(points)
+    with ProcessPoolExecutor(max_workers=min(nproc, len(blocks))) as executor:
+        jobs = [executor.submit(_solve_job, [points[i] for i in b], orifice_files[b[0]])
+                for b in blocks]
+        for block, job in zip(blocks, jobs):
+            for idx, df in zip(block, job.result()):
+                frames[idx] = df
+
+    return frames
+
+
+def iter_solve(points, orifice_files=None, nproc=None, block_size=1, ordered=False, max_pending=None):
+    '''
+    Streaming equivalent of run_points(): yields the results of the points as soon as
+    they are converged, instead of returning all of them at the end. At most max_pending
+    jobs (default: twice the number of processes) are in flight, so that memory use does
+    not depend on the number of points.
+    Inputs:
+        - points, orifice_files, nproc, block_size: see run_points()
+        - ordered: if True, the results are yielded in the order of points. Results
+        that arrive early are held until their turn.
+        - max_pending: maximum number of jobs submitted but not yet yielded
+    Outputs:
+        - generator of (indices, DataFrame): indices of the points of a job (one point,
+        or a block of points if block_size > 1) and their rows, in the order of indices
+    '''
+    if len(points) == 0:
+        return
+
+    if orifice_files is None or isinstance(orifice_files, str):
+        orifice_files = [orifice_files] * len(points)
+
+    nproc = nproc or os.cpu_count()
+    max_pending = max_pending or 2 * nproc
+    if block_size > 1:
+        blocks = batch_points(points, orifice_files, block_size)
+    else:
+        blocks = [[idx] for idx in range(len(points))]
+
+    with ProcessPoolExecutor(max_workers=min(nproc, len(blocks))) as executor:
+        pending = {}
+        done = {}
+        submitted = 0
+        emitted = 0
+        try:
+            while emitted < len(blocks):
+                ### Keep up to max_pending jobs in flight, counted from the next result to yield
+                while submitted < len(blocks) and submitted - emitted < max_pending:
+                    b = blocks[submitted]
+                    fut = executor.submit(_solve_job, [points[i] for i in b], orifice_files[b[0]])
+                    pending[fut] = submitted
+                    submitted += 1
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    done[pending.pop(fut)] = pd.concat(fut.result(), ignore_index=True)
+
+                if ordered:
+                    while emitted in done:
+                        yield blocks[emitted], done.pop(emitted)
+                        emitted += 1
+                else:
+                    for k in list(done):
+                        yield blocks[k], done.pop(k)
+                        emitted += 1
+        finally:
+            # The consumer stopped early, or a job failed: drop the jobs that have not started
+            for fut in pending:
+                fut.cancel()
+
+
+def iter_sweep(cathode, TgKvec, Idvec, mdotvec, phisvec, nproc=None, block_size=1, ordered=False):
+    '''
+    Streaming sweep over the (TgK, Id, mdot, phi_s) cartesian product. The orifice stage
+    is first computed in a scratch file; the insert stage is then streamed by iter_solve().
+    Nothing is written to the output file of the cathode.
+    Yields (points, DataFrame), with the SweepPoint objects of each result.
+
+    Example:
+        for pts, df in iter_sweep(cat, [3000.], Idvec, mdotvec, phisvec, nproc=32):
+            ax.plot(df['dischargeCurrent'], df['totalPressure_Torr'], 'k.')
+    '''
+    points = sweep_points(cathode, TgKvec, Idvec, mdotvec, phisvec)
+    with tempfile.TemporaryDirectory(prefix='stream_') as tmpdir:
+        orifice_file = os.path.join(tmpdir, 'orifice.h5')
+        prime_orifice(cathode, TgKvec, Idvec, mdotvec, orifice_file, nproc)
+        for indices, df in iter_solve(points, orifice_file, nproc, block_size, ordered):
+            yield [points[i] for i in indices], df
+
+
+def merge_rows(points, frames):
+    '''
+    Group the per-point DataFrames by gas temperature. The row ordering within
+    each temperature follows the ordering of points.
+    Returns a dictionary {TgK: DataFrame}
+    '''
+    grouped = {}
+    for point, df in zip(points, frames):
+        grouped.setdefault(point.TgK, []).append(df)
+
+    return {TgK: pd.concat(dfs, ignore_index=True) for TgK, dfs in grouped.items()}
+
+
+def free_key(taken, species, TgK, timestamp=None):
+    '''
+    Key of a new run that is not in taken (keys with a leading '/', as returned by
+    HDFStore.keys()). If the key derived from the timestamp (default: now) is taken,
+    the next free second is used.
+    '''
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc).replace(microsecond=0)
+
+    key = result_key(species, TgK, timestamp.strftime('%Y%m%d%H%M%S'))
+    while '/' + key in taken:
+        timestamp += timedelta(seconds=1)
+        key = result_key(species, TgK, timestamp.strftime('%Y%m%d%H%M%S'))
+    return key
+
+
+def write_run(savefile, cathode, TgK, df, description=None, timestamp=None):
+    '''
+    Store the DataFrame of a run in savefile. The description, if any, is attached
+    to the group as the "description" attribute. If the key derived from the
+    timestamp is already taken, the next free second is used.
+    Returns the key of the run.
+    '''
+    with pd.HDFStore(savefile) as store:
+        key = free_key(store.keys(), cathode.species, TgK, timestamp)
+        store.put(key, df)
+        if description is not None:
+            store.get_storer(key).attrs.description = description
+
+    return key
+
+
+@dataclass
+class Sweep:
+    '''
+    A sweep over the (TgK, Id, mdot, phi_s) cartesian product for a single cathode.
+    Mass flow rates are in eqA. The orifice stage is computed over
+    orifice_Idvec x orifice_mdotvec, which default to Idvec and mdotvec. If prime is
+    False, the orifice solution already stored in the output file is used. If adaptive
+    is given, the sweep is refined along one axis (see poctools.adaptive.run_adaptive).
+    '''
+    cathode: Cathode
+    TgKvec: np.ndarray
+    Idvec: np.ndarray
+    mdotvec: np.ndarray
+    phisvec: np.ndarray
+    description: str = None
+    savefile: str = None
+    orifice_Idvec: np.ndarray = None
+    orifice_mdotvec: np.ndarray = None
+    prime: bool = True
+    adaptive: dict = None
+
+    def output_file(self):
+        return self.savefile or self.cathode.fname
+
+    def points(self):
+        return sweep_points(self.cathode, self.TgKvec, self.Idvec, self.mdotvec, self.phisvec)
+
+    def orifice_grid(self):
+        Idvec = self.Idvec if self.orifice_Idvec is None else self.orifice_Idvec
+        mdotvec = self.mdotvec if self.orifice_mdotvec is None else self.orifice_mdotvec
+        return Idvec, mdotvec
+
+
+def run_sweeps(sweeps, nproc=None, verbose=True, cache=None, checkpoint=False, resume=False,
+               block_size=1, orifice_tables=None, precision='float64'):
+    '''
+    Run several sweeps as a single batch on one process pool: the orifice stage of
+    every (sweep, temperature) pair first, then all the operating points of all
+    sweeps. Each run is then written to the output file of its sweep.
+
+    Inputs:
+        - sweeps: list of Sweep objects
+        - nproc: number of worker processes. Defaults to the number of cores
+        - verbose: print progress
+        - cache: optional SolveCache. Only the points that are not in the cache are
+        computed, and the computed points are added to the cache. Points are keyed on
+        their orifice grid as well: after an orifice table is extended, the points of its
+        cathode are recomputed.
+        - checkpoint: if True, keep a completion ledger next to each output file
+        (see poctools.checkpoint). The ledger is removed once the runs are written.
+        - resume: if True, the points recorded in existing ledgers are not recomputed.
+        Implies checkpoint.
+        - block_size: if larger than one, points are grouped in blocks of up to
+        block_size points that are solved with a single call to solve()
+        - orifice_tables: optional directory of persistent orifice tables (see
+        poctools.orifice_table). If given, the orifice stage only computes the part of the
+        Id x mdot grid that is not already in the table of each cathode.
+        - precision: storage precision of the runs: 'float64', 'float32', or a dictionary
+        of per-column types (see poctools.precision). The maximum relative error of each
+        reduced run is printed if verbose.
+    Outputs:
+        - List with, for each sweep, a list of (key, DataFrame), one per gas temperature.
+        The DataFrames are the stored, possibly reduced-precision, runs
+    '''
+    nproc = nproc or os.cpu_count()
+
+    ### Requirements of all the sweeps that share an orifice table are gathered first
+    tables = {}
+    if orifice_tables is not None:
+        for sw in sweeps:
+            if sw.prime:
+                table = OrificeTable(orifice_tables, sw.cathode)
+                req = tables.setdefault(table.path, (table, set(), [], []))
+                Idvec, mdotvec = sw.orifice_grid()
+                req[2].extend(Idvec)
+                req[3].extend(mdotvec)
+
+    ### Orifice grid of each sweep: it enters the cache key of the points
+    points = []
+    for sw in sweeps:
+        if not sw.prime:
+            grid = stored_orifice_grid(sw.output_file(), sw.cathode.species)
+        elif orifice_tables is not None:
+            table, _, Idvec, mdotvec = tables[OrificeTable(orifice_tables, sw.cathode).path]
+            grid = table.plan([], Idvec, mdotvec)[1]
+        else:
+            grid = sw.orifice_grid()
+        points.append(with_orifice(sw.points(), *grid))
+    flat = [(isw, p) for isw, pts in enumerate(points) for p in pts]
+
+    ### Completion ledgers, one per output file
+    ledgers = {}
+    if checkpoint or resume:
+        for sw in sweeps:
+            savefile = sw.output_file()
+            if savefile not in ledgers:
+                ledgers[savefile] = Ledger(savefile, cache.version if cache is not None else None)
+                if not resume:
+                    ledgers[savefile].clear()
+
+    ### Only compute what is neither in a ledger nor in the cache
+    stores = list(ledgers.values()) + ([cache] if cache is not None else [])
+    hits, misses, duplicates = split_points([p for _, p in flat], stores)
+    if verbose and len(stores) > 0:
+        print("Ledger and cache:", len(hits), "hits,", len(misses), "misses,",
+              len(duplicates), "duplicates")
+
+    ### The orifice stage is needed for the temperatures that have points to compute
+    needs_orifice = {(flat[idx][0], flat[idx][1].TgK) for idx in misses}
+
+    frames = [None] * len(flat)
+    with tempfile.TemporaryDirectory(prefix='sweeps_') as tmpdir, \
+            ProcessPoolExecutor(max_workers=nproc) as executor:
+        ### Orifice stage
+        orifice_files = []
+        futures = []
+        for isw, sw in enumerate(sweeps):
+            if not sw.prime:
+                orifice_files.append(sw.output_file())
+                continue
+
+            Idvec, mdotvec = sw.orifice_grid()
+            TgKvec = [TgK for TgK in sw.TgKvec if (isw, float(TgK)) in needs_orifice]
+            if orifice_tables is not None:
+                table = OrificeTable(orifice_tables, sw.cathode)
+                orifice_files.append(table.path)
+                tables[table.path][1].update(float(TgK) for TgK in TgKvec)
+                continue
+
+            orifice_files.append(os.path.join(tmpdir, 'orifice_' + str(isw) + '.h5'))
+            for TgK in TgKvec:
+                scratch = os.path.join(tmpdir, 'orifice_' + str(isw) + '_' + str(int(TgK)) + '.h5')
+                fut = executor.submit(_solve_orifice, sw.cathode, TgK, Idvec, mdotvec, scratch)
+                futures.append((isw, TgK, scratch, fut))
+
+        table_futures = []
+        for path, (table, TgKs, Idvec, mdotvec) in tables.items():
+            if len(TgKs) == 0:
+                continue
+            blocks, grid = table.plan(sorted(TgKs), Idvec, mdotvec)
+            computed = []
+            for k, (TgK, Idblock, mdotblock) in enumerate(blocks):
+                scratch = os.path.join(tmpdir, 'table_' + str(len(table_futures)) + '_' + str(k) + '.h5')
+                computed.append((TgK, scratch,
+                                 executor.submit(_solve_orifice, table.cathode, TgK, Idblock, mdotblock, scratch)))
+            if len(computed) > 0:
+                table_futures.append((table, grid, computed))
+
+        if verbose and len(futures) + len(table_futures) > 0:
+            print("Orifice stage:", len(futures) + sum(len(c) for _, _, c in table_futures),
+                  "tasks on", nproc, "processes")
+
+        for isw, TgK, scratch, fut in futures:
+            fut.result()
+            copy_orifice_data(scratch, orifice_files[isw], sweeps[isw].cathode.species, TgK)
+
+        for table, grid, computed in table_futures:
+            for _, _, fut in computed:
+                fut.result()
+            table.merge(grid, [(TgK, scratch) for TgK, scratch, _ in computed])
+            if verbose:
+                print(table.cathode.name, ": orifice table", table.path, "extended to",
+                      len(grid[0]), "x", len(grid[1]), "points")
+
+        ### Insert stage
+        args = [(flat[idx][1], orifice_files[flat[idx][0]]) for idx in misses]
+        if verbose:
+            print("Insert stage:", len(args), "operating points on", nproc, "processes")
+
+        if block_size > 1:
+            blocks = batch_points([p for p, _ in args], [f for _, f in args], block_size)
+        else:
+            blocks = [[k] for k in range(len(args))]
+
+        futures = {executor.submit(_solve_job, [args[k][0] for k in b], args[b[0]][1]): b
+                   for b in blocks}
+        try:
+            for fut in as_completed(futures):
+                for k, df in zip(futures[fut], fut.result()):
+                    idx = misses[k]
+                    isw, point = flat[idx]
+                    frames[idx] = df
+                    if len(ledgers) > 0:
+                        ledgers[sweeps[isw].output_file()].put(point, df)
+                    if cache is not None:
+                        cache.put(point, df)
+        except BaseException:
+            # Do not wait for the points that have not started yet
+            for fut in futures:
+                fut.cancel()
+            raise
+
+        for idx, df in hits.items():
+            frames[idx] = df
+        for idx, first in duplicates.items():
+            frames[idx] = frames[first]
+
+        ### Write results
+        results = []
+        start = 0
+        for isw, (sw, pts) in enumerate(zip(sweeps, points)):
+            savefile = sw.output_file()
+            sweep_frames = frames[start:start + len(pts)]
+            start += len(pts)
+
+            runs = []
+            for TgK, df in merge_rows(pts, sweep_frames).items():
+                if sw.prime and (isw, TgK) in needs_orifice:
+                    copy_orifice_data(orifice_files[isw], savefile, sw.cathode.species, TgK)
+                stored = reduce_precision(df, precision)
+                key = write_run(savefile, sw.cathode, TgK, stored, sw.description)
+                if verbose:
+                    print(sw.cathode.name, ": wrote", savefile, key)
+                    if precision != 'float64':
+                        print("    maximum relative error:", precision_report(df, stored)['max_rel_error'].max())
+                runs.append((key, stored))
+            results.append(runs)
+
+    for ledger in ledgers.values():
+        ledger.remove()
+
+    return results
+
+
+def parallel_sweep(cathode, TgKvec, Idvec, mdotvec, phisvec, savefile=None,
+                   nproc=None, description=None, prime=True, verbose=True, cache=None,
+                   checkpoint=False, resume=False, block_size=1, orifice_tables=None,
+                   precision='float64'):
+    '''
+    Parallel equivalent of
+        for TgK in TgKvec:
+            path, df = solve(Idvec, mdotvec, ..., TgK, savefile, phi_s=phisvec)
+
+    Inputs:
+        - cathode: Cathode object
+        - TgKvec: neutral gas temperatures (K)
+        - Idvec: discharge currents (A)
+        - mdotvec: mass flow rates (eqA)
+        - phisvec: sheath voltages (V)
+        - savefile: HDF5 output file. Defaults to cathode.fname
+        - nproc: number of worker processes. Defaults to the number of cores
+        - description: "description" attribute of each run
+        - prime: if True, first compute the orifice solution over Idvec x mdotvec
+        - verbose: print progress
+        - cache: optional SolveCache
+        - checkpoint: keep a completion ledger next to savefile
+        - resume: skip the points already recorded in the ledger
+        - block_size: maximum number of points per call to solve()
+        - orifice_tables: optional directory of persistent orifice tables
+        - precision: storage precision of the runs (see run_sweeps)
+    Outputs:
+        - List of (key, DataFrame), one per gas temperature
+    '''
+    sweep = Sweep(cathode, TgKvec, Idvec, mdotvec, phisvec, description=description,
+                  savefile=savefile, prime=prime)
+    return run_sweeps([sweep], nproc, verbose, cache, checkpoint, resume,
+                      block_size=block_size, orifice_tables=orifice_tables, precision=precision)[0]
@@ -0,0 +1,176 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: wall_temperature.py
+Date: October, 2026
+Description: vectorized insert wall temperature from the current balance at the insert
+wall, for any work-function model. The thermionic emission current is given by the
+Richardson-Dushman law; the ion and electron currents at the wall follow from the insert
+solution. For each row, the wall temperature Tw solves
+    Tw**2 * exp(-e * phi(Tw) / (kB * Tw)) = rhs
+with rhs the current balance divided by (pi * Lem * dc * A). The equation is solved for all
+the rows at once, in logarithmic form, with a Newton iteration safeguarded by bisection.
+
+Example:
+    from poctools.wall_temperature import WorkFunction, BAO_W, LAB6, add_wall_temperatures
+    dfx = add_wall_temperatures(dfx, [WorkFunction(1.8), WorkFunction(2.0), BAO_W])
+    # -> columns insertTemperature_1.8eV, insertTemperature_2eV, insertTemperature_BaO-W (degC)
+"""
+import numpy as np
+import cathode.constants as cc
+
+### Richardson-Dushman constant (A/m2/K2)
+RD_CONSTANT = 120e4
+
+### Bracket of the wall temperature (K)
+TW_BRACKET = (200., 5000.)
+
+
+class WorkFunction:
+    '''
+    Work function linear in temperature, phi(T) = phi0 + alpha * T (eV).
+    alpha = 0 gives a constant work function.
+    '''
+    def __init__(self, phi0, alpha=0.0, name=None):
+        self.phi0 = phi0
+        self.alpha = alpha
+        self.name = name or '{:g}eV'.format(phi0)
+
+    def __call__(self, T):
+        return self.phi0 + self.alpha * T
+
+    def derivative(self, T):
+        return self.alpha * np.ones_like(T)
+
+
+### Temperature-dependent work functions
+BAO_W = WorkFunction(1.67, 2.82e-4, 'BaO-W')
+LAB6 = WorkFunction(2.66, 1.23e-4, 'LaB6')
+
+
+def emission_rhs(df, chold, A=RD_CONSTANT):
+    '''
+    Right-hand side of the Richardson-Dushman equation for each row of the results.
+    Inputs:
+        - df: DataFrame of results
+        - chold: collision holder of the gas, or dictionary {species: collision holder}
+        - A: Richardson-Dushman constant (A/m2/K2)
+    Outputs:
+        - array of Tw**2 * exp(-e * phi / (kB * Tw)) values (K2)
+    '''
+    dc = df['insertDiameter'].to_numpy()
+    Lem = df['emissionLength'].to_numpy()
+    phi_s = df['sheathVoltage'].to_numpy()
+    Te = df['insertElectronTemperature'].to_numpy()
+    M = df['mass'].to_numpy()
+    al = df['insertIonizationFraction'].to_numpy()
+    ng = df['insertNeutralDensity'].to_numpy()
+    Id = df['dischargeCurrent'].to_numpy()
+
+    ### Ionization cross section, per gas
+    xsec = np.full(len(df), np.nan)
+    if isinstance(chold, dict):
+        species = df['species'].to_numpy()
+        for sp, holder in chold.items():
+            mask = species == sp
+            if np.any(mask):
+                xsec[mask] = holder.xsec('iz', Te[mask])
+    else:
+        xsec[:] = chold.xsec('iz', Te)
+
+    V = np.pi * Lem * (dc / 2)**2
+    f_Ir = 1 / 4 * np.sqrt(8 * M / (np.pi * cc.me)) * np.exp(-phi_s / Te)
+    f_Ii = 1
+
+    rhs = al / (1 - al) * ng**2 * cc.e * xsec * V * (f_Ir - f_Ii) + Id
+    return rhs / (np.pi * Lem * dc * A)
+
+
+def solve_wall_temperature(rhs, phi_wf, bracket=TW_BRACKET, xtol=1e-10, maxiter=100):
+    '''
+    Solve Tw**2 * exp(-e * phi_wf(Tw) / (kB * Tw)) = rhs for all the entries of rhs.
+    The residual f = 2 ln(Tw) - e phi_wf(Tw) / (kB Tw) - ln(rhs) is solved with Newton steps;
+    a step that leaves the current bracket of the root is replaced by a bisection.
+    Inputs:
+        - rhs: array of right-hand sides (K2)
+        - phi_wf: work function model (see WorkFunction)
+        - bracket: initial bracket of the wall temperature (K)
+    Outputs:
+        - array of wall temperatures (K). NaN where rhs is not positive or where there is
+        no root in the bracket.
+    '''
+    rhs = np.asarray(rhs, dtype=np.float64)
+    valid = np.isfinite(rhs) & (rhs > 0)
+    log_rhs = np.log(np.where(valid, rhs, 1.0))
+
+    def residual(T):
+        f = 2 * np.log(T) - cc.e * phi_wf(T) / (cc.kB * T) - log_rhs
+        df = 2 / T - cc.e / cc.kB * (phi_wf.derivative(T) * T - phi_wf(T)) / T**2
+        return f, df
+
+    lo = np.full_like(rhs, bracket[0])
+    hi = np.full_like(rhs, bracket[1])
+    flo, _ = residual(lo)
+    fhi, _ = residual(hi)
+    valid &= (flo <= 0) & (fhi >= 0)
+
+    T = np.full_like(rhs, 0.5 * (bracket[0] + bracket[1]))
+    for _ in range(maxiter):
+        f, df = residual(T)
+        ### Shrink the bracket
+        lo = np.where(f < 0, T, lo)
+        hi = np.where(f > 0, T, hi)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Tn = T - f / df
+        outside = ~np.isfinite(Tn) | (Tn <= lo) | (Tn >= hi)
+        Tn = np.where(outside, 0.5 * (lo + hi), Tn)
+
+        converged = np.abs(Tn - T) <= xtol * T
+        T = Tn
+        if np.all(converged | ~valid):
+            break
+
+    return np.where(valid, T, np.nan)
+
+
+def add_wall_temperatures(df, models, chold=None, A=RD_CONSTANT):
+    '''
+    Add one wall temperature column per work function model.
+    Inputs:
+        - df: DataFrame of results
+        - models: list of WorkFunction
+        - chold: collision holder, or dictionary {species: collision holder}. Defaults to
+        one collision holder per gas of df (requires the LXCAT cross sections)
+        - A: Richardson-Dushman constant (A/m2/K2)
+    Outputs:
+        - copy of df with the columns 'insertTemperature_<model name>' (degC)
+    '''
+    if chold is None:
+        from cathode.models.taunay_et_al_core.collision_holder import collision_holder
+        chold = {sp: collision_holder(sp) for sp in np.unique(df['species'])}
+
+    rhs = emission_rhs(df, chold, A)
+    df = df.copy()
+    for model in models:
+        df['insertTemperature_' + model.name] = solve_wall_temperature(rhs, model) - 273.15
+    return df
@@ -0,0 +1,446 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+File: workqueue.py
+Date: October, 2026
+Description: file-based work queue to spread a campaign over several nodes that share a
+filesystem, without a scheduler service. A queue is a directory:
+    - campaign.pkl: the list of (entry name, Sweep) of the campaign
+    - tasks/<task>.pkl: description of each task
+    - todo/<task>: tasks that are waiting
+    - claimed/<task>.<worker>: tasks being worked on. Claims are atomic renames of
+    the todo files; workers increment a heartbeat counter in their claims while they
+    work, and claims whose counter has not changed for the lease are put back in todo.
+    The lease is measured with the clock of the worker that checks the claims, never
+    against file modification times, so that the clocks of the nodes and of the file
+    server do not have to agree.
+    - done/<task>.pkl: results
+    - attempts/<task>/: one file per claim of a task, with the traceback if it failed
+    - failed/<task>.txt: tasks that failed max_attempts times, with their tracebacks
+    - orifice/: orifice solutions shared by the insert tasks
+The orifice tasks of each (sweep, temperature) pair are listed before the insert tasks.
+An insert task is only started once its orifice solution is available, and fails if
+its orifice task failed. A task that raises is put back in todo until it has been claimed
+max_attempts times; claims of dead workers count as attempts. The merge step writes the
+standard results/*.h5 layout once every task is done.
+
+Usage:
+    python -m poctools.workqueue submit QUEUE sweeps.toml [--only nstar nexis ...]
+    python -m poctools.workqueue work QUEUE [--nproc N] [--lease SECONDS]
+    python -m poctools.workqueue status QUEUE
+    python -m poctools.workqueue retry QUEUE
+    python -m poctools.workqueue merge QUEUE [--output-dir DIR] [--inventory CSV]
+"""
+import os
+import sys
+import time
+import socket
+import pickle
+import shutil
+import argparse
+import threading
+import traceback
+import multiprocessing
+
+from poctools.sweep import _solve_orifice, solve_point, merge_rows, write_run, copy_orifice_data
+
+SUBDIRS = ['tasks', 'todo', 'claimed', 'done', 'attempts', 'failed', 'orifice']
+
+### Number of claims of a task before it is moved to failed/
+MAX_ATTEMPTS = 3
+
+
+def _atomic_pickle(obj, path):
+    tmp = path + '.' + socket.gethostname() + '.' + str(os.getpid()) + '.tmp'
+    with open(tmp, 'wb') as fh:
+        pickle.dump(obj, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as fh:
+        return pickle.load(fh)
+
+
+def orifice_task_name(isw, TgK):
+    return '0_orifice_' + str(isw).zfill(4) + '_' + str(int(TgK))
+
+
+def point_task_name(isw, TgK, ipt):
+    return '1_point_' + str(isw).zfill(4) + '_' + str(int(TgK)) + '_' + str(ipt).zfill(8)
+
+
+def orifice_file(queue, isw, TgK):
+    return os.path.join(queue, 'orifice', orifice_task_name(isw, TgK) + '.h5')
+
+
+def submit(queue, entries):
+    '''
+    Create a queue for a list of (entry name, Sweep), as returned by load_manifest().
+    Returns the number of tasks. Adaptive sweeps (see poctools.adaptive) choose their points as
+    they go and cannot be queued.
+    '''
+    adaptive = [entry for entry, sw in entries if sw.adaptive is not None]
+    if adaptive:
+        raise ValueError("Adaptive sweeps cannot be queued (" + ", ".join(adaptive) + "): run them with run_sweeps.py")
+
+    for d in SUBDIRS:
+        os.makedirs(os.path.join(queue, d), exist_ok=True)
+    _atomic_pickle(entries, os.path.join(queue, 'campaign.pkl'))
+
+    tasks = {}
+    for isw, (_, sw) in enumerate(entries):
+        Idvec, mdotvec = sw.orifice_grid()
+        for TgK in sw.TgKvec:
+            tasks[orifice_task_name(isw, TgK)] = ('orifice', isw, sw.cathode, TgK, Idvec, mdotvec)
+        for ipt, point in enumerate(sw.points()):
+            tasks[point_task_name(isw, point.TgK, ipt)] = ('point', isw, point)
+
+    for name, task in tasks.items():
+        _atomic_pickle(task, os.path.join(queue, 'tasks', name + '.pkl'))
+        open(os.path.join(queue, 'todo', name), 'w').close()
+
+    return len(tasks)
+
+
+def _read_heartbeat(path):
+    ''' Heartbeat of a claim: "<claim token> <counter>" '''
+    with open(path) as fh:
+        return fh.read()
+
+
+def requeue_expired(queue, lease, seen):
+    '''
+    Put back in todo the claims whose heartbeat has not changed for more than lease
+    seconds (dead workers). The time is measured on this node, with time.monotonic(),
+    from the first time the current heartbeat of a claim was seen.
+    Inputs:
+        - queue: queue directory
+        - lease: lease (s)
+        - seen: dictionary {claim file: (heartbeat, time it was first seen)}, kept by the
+        caller between calls
+    Outputs:
+        - number of requeued tasks
+    '''
+    count = 0
+    now = time.monotonic()
+    claimed = os.path.join(queue, 'claimed')
+    fnames = os.listdir(claimed)
+    for fname in list(seen):
+        if fname not in fnames:
+            del seen[fname]
+
+    for fname in fnames:
+        path = os.path.join(claimed, fname)
+        try:
+            beat = _read_heartbeat(path)
+        except FileNotFoundError:
+            continue
+        if fname not in seen or seen[fname][0] != beat:
+            seen[fname] = (beat, now)
+            continue
+        if now - seen[fname][1] <= lease:
+            continue
+        name = fname.split('.')[0]
+        try:
+            os.rename(path, os.path.join(queue, 'todo', name))
+            count += 1
+        except FileNotFoundError:
+            pass
+        del seen[fname]
+    return count
+
+
+def status(queue):
+    ''' Number of tasks waiting, claimed, done, and failed '''
+    return {d: len(os.listdir(os.path.join(queue, d))) for d in ['todo', 'claimed', 'done', 'failed']}
+
+
+def _attempt(queue, name, worker_id):
+    ''' Record a claim of a task. Returns the path of the attempt file and the number of claims. '''
+    directory = os.path.join(queue, 'attempts', name)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, worker_id + '-' + str(time.time_ns()))
+    open(path, 'w').close()
+    return path, len(os.listdir(directory))
+
+
+def _fail(queue, name, claim):
+    ''' Move a claimed task to failed/, with the tracebacks of its attempts '''
+    directory = os.path.join(queue, 'attempts', name)
+    with open(os.path.join(queue, 'failed', name + '.txt'), 'w') as fh:
+        for fname in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, fname)) as fa:
+                fh.write('### ' + fname + '\n' + (fa.read() or 'no traceback: the worker died\n') + '\n')
+    try:
+        os.remove(claim)
+    except FileNotFoundError:
+        pass
+
+
+def _release(queue, name, claim):
+    ''' Put a claimed task back in todo '''
+    try:
+        os.rename(claim, os.path.join(queue, 'todo', name))
+    except FileNotFoundError:
+        pass
+
+
+def retry_failed(queue):
+    ''' Put the failed tasks back in todo and reset their attempts. Returns the number of tasks. '''
+    names = [f[:-len('.txt')] for f in os.listdir(os.path.join(queue, 'failed'))]
+    for name in names:
+        shutil.rmtree(os.path.join(queue, 'attempts', name), ignore_errors=True)
+        open(os.path.join(queue, 'todo', name), 'w').close()
+        os.remove(os.path.join(queue, 'failed', name + '.txt'))
+    return len(names)
+
+
+def _write_heartbeat(path, token, counter, create=False):
+    ''' Write the heartbeat of a claim. The claim is not recreated if it was requeued. '''
+    with open(path, 'w' if create else 'r+') as fh:
+        fh.write(token + ' ' + str(counter))
+        fh.truncate()
+
+
+class _Heartbeat:
+    ''' Increment the heartbeat counter of a claim file while a task runs '''
+    def __init__(self, path, token, period):
+        self.path = path
+        self.token = token
+        self.period = period
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        counter = 0
+        while not self.stop.wait(self.period):
+            counter += 1
+            try:
+                _write_heartbeat(self.path, self.token, counter)
+            except FileNotFoundError:
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop.set()
+        self.thread.join()
+
+
+def _claim(queue, worker_id):
+    '''
+    Claim the first available task. Insert tasks whose orifice solution is not ready
+    are skipped; those whose orifice task failed are moved to failed/.
+    Returns (task name, claim path, claim token) or None.
+    '''
+    for name in sorted(os.listdir(os.path.join(queue, 'todo'))):
+        orifice_failed = False
+        if name.startswith('1_point_'):
+            _, _, isw, TgK, _ = name.split('_')
+            orifice_failed = os.path.exists(os.path.join(queue, 'failed', orifice_task_name(isw, TgK) + '.txt'))
+            if not orifice_failed and not os.path.exists(orifice_file(queue, int(isw), TgK)):
+                continue
+
+        claim = os.path.join(queue, 'claimed', name + '.' + worker_id)
+        try:
+            os.rename(os.path.join(queue, 'todo', name), claim)
+        except FileNotFoundError:
+            # Another worker was faster
+            continue
+        # Unique token of this claim, so that a new claim of the same task starts a new heartbeat
+        token = worker_id + '-' + str(time.time_ns())
+        _write_heartbeat(claim, token, 0, create=True)
+
+        if orifice_failed:
+            path, _ = _attempt(queue, name, worker_id)
+            with open(path, 'w') as fh:
+                fh.write("The orifice task " + orifice_task_name(isw, TgK) + " failed\n")
+            _fail(queue, name, claim)
+            continue
+
+        return name, claim, token
+
+    return None
+
+
+def work(queue, lease=600., poll=5., max_attempts=MAX_ATTEMPTS, verbose=True):
+    '''
+    Worker loop: claim and run tasks until no task is waiting or claimed. Expired claims
+    of other workers are requeued along the way. A task that raises is put back in todo,
+    or moved to failed/ once it has been claimed max_attempts times.
+    '''
+    worker_id = socket.gethostname() + '-' + str(os.getpid())
+    seen = {}
+    while True:
+        requeue_expired(queue, lease, seen)
+        claimed = _claim(queue, worker_id)
+        if claimed is None:
+            st = status(queue)
+            if st['todo'] == 0 and st['claimed'] == 0:
+                return
+            time.sleep(poll)
+            continue
+
+        name, claim, token = claimed
+        attempt, nattempts = _attempt(queue, name, worker_id)
+        if nattempts > max_attempts:
+            # Previous workers died on this task
+            _fail(queue, name, claim)
+            continue
+
+        task = _load_pickle(os.path.join(queue, 'tasks', name + '.pkl'))
+        if verbose:
+            print(worker_id, ":", name, "(attempt", str(nattempts) + ")")
+
+        try:
+            with _Heartbeat(claim, token, lease / 4.):
+                if task[0] == 'orifice':
+                    _, isw, cathode, TgK, Idvec, mdotvec = task
+                    target = orifice_file(queue, isw, TgK)
+                    scratch = target + '.' + worker_id + '.tmp'
+                    _solve_orifice(cathode, TgK, Idvec, mdotvec, scratch)
+                    os.replace(scratch, target)
+                    result = target
+                else:
+                    _, isw, point = task
+                    result = solve_point(point, orifice_file(queue, isw, point.TgK))
+        except Exception:
+            with open(attempt, 'w') as fh:
+                fh.write(traceback.format_exc())
+            if verbose:
+                print(worker_id, ":", name, "failed")
+            if nattempts >= max_attempts:
+                _fail(queue, name, claim)
+            else:
+                _release(queue, name, claim)
+            continue
+
+        _atomic_pickle(result, os.path.join(queue, 'done', name + '.pkl'))
+        try:
+            os.remove(claim)
+        except FileNotFoundError:
+            pass
+
+
+def start_workers(queue, nproc=None, lease=600., max_attempts=MAX_ATTEMPTS, verbose=True):
+    ''' Start nproc local worker processes on this node and wait for them '''
+    nproc = nproc or os.cpu_count()
+    procs = [multiprocessing.Process(target=work, args=(queue, lease),
+                                     kwargs={'max_attempts': max_attempts, 'verbose': verbose})
+             for _ in range(nproc)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+def merge(queue, output_dir='.', verbose=True):
+    '''
+    Write the results of a completed queue to HDF5 files in output_dir, with the
+    standard layout.
+    Returns a list of (entry name, Sweep, [(key, DataFrame), ...]).
+    '''
+    st = status(queue)
+    if st['todo'] > 0 or st['claimed'] > 0:
+        raise RuntimeError("Queue " + queue + " is not complete: " + str(st))
+    if st['failed'] > 0:
+        raise RuntimeError("Queue " + queue + " has failed tasks (see " + os.path.join(queue, 'failed') +
+                           "): " + str(st))
+
+    entries = _load_pickle(os.path.join(queue, 'campaign.pkl'))
+    results = []
+    for isw, (entry, sw) in enumerate(entries):
+        savefile = os.path.join(output_dir, sw.cathode.fname)
+        pts = sw.points()
+        frames = [_load_pickle(os.path.join(queue, 'done', point_task_name(isw, p.TgK, ipt) + '.pkl'))
+                  for ipt, p in enumerate(pts)]
+
+        runs = []
+        for TgK, df in merge_rows(pts, frames).items():
+            copy_orifice_data(orifice_file(queue, isw, TgK), savefile, sw.cathode.species, TgK)
+            key = write_run(savefile, sw.cathode, TgK, df, sw.description)
+            if verbose:
+                print(sw.cathode.name, ": wrote", savefile, key)
+            runs.append((key, df))
+        results.append((entry, sw, runs))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File-based work queue for sweep campaigns")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('submit', help="Create a queue from a manifest")
+    p.add_argument('queue')
+    p.add_argument('manifest')
+    p.add_argument('--only', nargs='+', default=None)
+
+    p = sub.add_parser('work', help="Start local workers")
+    p.add_argument('queue')
+    p.add_argument('--nproc', type=int, default=None)
+    p.add_argument('--lease', type=float, default=600.,
+                   help="Seconds after which the claim of a silent worker is requeued")
+    p.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS,
+                   help="Claims of a task before it is moved to failed/")
+
+    p = sub.add_parser('status', help="Show the queue status")
+    p.add_argument('queue')
+
+    p = sub.add_parser('retry', help="Put the failed tasks back in the queue")
+    p.add_argument('queue')
+
+    p = sub.add_parser('merge', help="Write the results of a completed queue")
+    p.add_argument('queue')
+    p.add_argument('--output-dir', default='.')
+    p.add_argument('--inventory', default=None,
+                   help="Simulation inventory to append to")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'submit':
+        from poctools.manifest import load_manifest
+        n = submit(args.queue, load_manifest(args.manifest, only=args.only))
+        print("Submitted", n, "tasks to", args.queue)
+    elif args.command == 'work':
+        start_workers(args.queue, args.nproc, args.lease, args.max_attempts)
+    elif args.command == 'status':
+        print(status(args.queue))
+    elif args.command == 'retry':
+        print("Requeued", retry_failed(args.queue), "failed tasks")
+    elif args.command == 'merge':
+        results = merge(args.queue, args.output_dir)
+        if args.inventory is not None:
+            from poctools.inventory import inventory_row, append_inventory
+            rows = [inventory_row(entry, key, df, sw.description)
+                    for entry, sw, runs in results for key, df in runs]
+            append_inventory(args.inventory, rows)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,323 @@
+# MIT License
+# 
+# Copyright (c) 2022 Pierre-Yves Camille Regis Taunay
+#  
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+File: xsec_table.py
+Date: October, 2026
+Description: binary cache of the LXCAT cross sections and of their Maxwellian averages.
+The collision holder of the cathode package parses the LXCAT text dump,
+data/<gas>_all.dat, and integrates the cross sections every time it is built, i.e.,
+once per process. A table holds the parsed cross sections (one process per kind:
+elastic, excitation, ionization) and their Maxwellian-averaged rate coefficients and
+cross sections on a dense logarithmic grid of electron temperatures. It is stored in a
+versioned .npz file, .xsec_tables/<gas>.npz, with the modification time, size, and
+SHA-256 hash of the LXCAT file: it is built once, then loaded by every process.
+
+As with the collision holder, the first process of each kind in the LXCAT file is used,
+so that a total cross section listed before its partial cross sections is not counted
+twice. The elastic kind is the ELASTIC process, or the EFFECTIVE (momentum transfer) one
+if the file has no ELASTIC process.
+
+A table is reused as long as the LXCAT file has the same modification time and size; the
+file is only hashed if they differ, and the table is rebuilt if the hash differs too.
+
+CollisionTable.xsec(kind, Te) has the same signature as collision_holder.xsec and
+returns the Maxwellian-averaged cross section (m2),
+    <sigma>(Te) = <sigma v>(Te) / vth(Te),   vth = sqrt(8 e Te / (pi me))
+    <sigma v>(Te) = vth / Te**2 * int sigma(E) E exp(-E/Te) dE
+
+Usage:
+    python -m poctools.xsec_table Ar Xe [--data data] [--directory .xsec_tables] [--check]
+"""
+import os
+import hashlib
+import tempfile
+import argparse
+
+import numpy as np
+
+import cathode.constants as cc
+
+DEFAULT_DIRECTORY = '.xsec_tables'
+
+### Version of the table layout and integration: tables of another version are rebuilt
+VERSION = 2
+
+### LXCAT process types and their kind, in order of preference within a kind
+KINDS = {
+    'ELASTIC': 'el',
+    'EFFECTIVE': 'el',
+    'EXCITATION': 'ex',
+    'IONIZATION': 'iz',
+}
+
+### Electron temperature grid (eV)
+TE_GRID = np.logspace(-1, 2, 2048)
+
+### Number of points of the energy grid used for the Maxwellian integrals
+NENERGY = 4096
+
+
+def source_path(species, data_dir='data'):
+    ''' Path to the LXCAT file of a gas, e.g. data/ar_all.dat '''
+    return os.path.join(data_dir, species.lower() + '_all.dat')
+
+
+def file_hash(path):
+    ''' SHA-256 hash of a file '''
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_lxcat(path):
+    '''
+    Parse an LXCAT text dump.
+    Inputs:
+        - path: path to the LXCAT file
+    Outputs:
+        - dictionary {kind: list of (process type, energy (eV), cross section (m2))}, for the
+        kinds of KINDS, in the order of the file. Other processes (e.g., attachment) are skipped.
+    '''
+    processes = {}
+    with open(path, 'r', errors='replace') as f:
+        lines = iter(f.read().splitlines())
+
+    for line in lines:
+        ptype = line.strip().upper()
+        kind = KINDS.get(ptype)
+        if kind is None:
+            continue
+
+        ### Skip the header (species, threshold or mass ratio, comments) up to the table
+        for line in lines:
+            if line.startswith('-----'):
+                break
+
+        rows = []
+        for line in lines:
+            if line.startswith('-----'):
+                break
+            rows.append(line.split()[:2])
+
+        if len(rows) > 0:
+            table = np.array(rows, dtype=np.float64)
+            processes.setdefault(kind, []).append((ptype, table[:, 0], table[:, 1]))
+
+    return processes
+
+
+def select_process(tables):
+    '''
+    Process of a kind: the first one of the most preferred type of KINDS (e.g., ELASTIC
+    before EFFECTIVE), otherwise the first one in the file.
+    Outputs:
+        - energy (eV) and cross section (m2) arrays
+    '''
+    order = list(KINDS)
+    _, energy, sigma = min(tables, key=lambda t: order.index(t[0]))
+    return energy, sigma
+
+
+def maxwellian_rate(energy, sigma, Te):
+    '''
+    Maxwellian rate coefficient of a cross section.
+    Inputs:
+        - energy: energies of the cross section (eV)
+        - sigma: cross section (m2)
+        - Te: electron temperatures (eV)
+    Outputs:
+        - <sigma v> (m3/s) at each electron temperature
+    '''
+    Te = np.asarray(Te, dtype=np.float64)
+
+    ### Energy grid: logarithmic, refined with the data points
+    emin = max(energy[energy > 0].min() if np.any(energy > 0) else 1e-4, 1e-4)
+    E = np.union1d(np.logspace(np.log10(emin), np.log10(energy[-1]), NENERGY), energy)
+    s = np.interp(E, energy, sigma, left=0.0, right=sigma[-1])
+
+    integrand = (s * E)[None, :] * np.exp(-E[None, :] / Te[:, None])
+    integral = np.trapezoid(integrand, E, axis=1)
+
+    vth = np.sqrt(8 * cc.e * Te / (np.pi * cc.me))
+    return vth / Te**2 * integral
+
+
+def build_table(species, data_dir='data', Te=TE_GRID, source_hash=None):
+    '''
+    Parse the LXCAT file of a gas and compute the Maxwellian averages of each kind.
+    Inputs:
+        - species: gas, e.g. 'Ar'
+        - data_dir: directory of the LXCAT files
+        - Te: electron temperatures of the table (eV)
+        - source_hash: SHA-256 hash of the LXCAT file, if already known
+    Outputs:
+        - dictionary of arrays, as stored in the .npz file
+    '''
+    path = source_path(species, data_dir)
+    st = os.stat(path)
+    processes = parse_lxcat(path)
+
+    vth = np.sqrt(8 * cc.e * Te / (np.pi * cc.me))
+    arrays = {
+        'version': np.array(VERSION),
+        'species': np.array(species),
+        'source_hash': np.array(source_hash or file_hash(path)),
+        'source_mtime': np.array(st.st_mtime_ns),
+        'source_size': np.array(st.st_size),
+        'Te': Te,
+    }
+    for kind, tables in processes.items():
+        energy, sigma = select_process(tables)
+        rate = maxwellian_rate(energy, sigma, Te)
+        arrays[kind + '_energy'] = energy
+        arrays[kind + '_sigma'] = sigma
+        arrays[kind + '_rate'] = rate
+        arrays[kind + '_xsec'] = rate / vth
+
+    return arrays
+
+
+class CollisionTable:
+    '''
+    Cross sections and Maxwellian averages of a gas, read from the binary cache
+    <directory>/<species>.npz. The cache is built from the LXCAT file if it does not
+    exist, if it was built by another version, or if the LXCAT file changed.
+    Temperatures outside of TE_GRID raise a ValueError, rather than giving NaN rates
+    or extrapolated ones; NaN temperatures (points that did not converge) give NaN.
+    '''
+    def __init__(self, species, data_dir='data', directory=DEFAULT_DIRECTORY):
+        self.species = species
+        self.source = source_path(species, data_dir)
+        self.path = os.path.join(directory, species.lower() + '.npz')
+
+        st = os.stat(self.source)
+        h = None
+        arrays = self._load()
+        if arrays is not None and (int(arrays['source_mtime']), int(arrays['source_size'])) != (st.st_mtime_ns, st.st_size):
+            h = file_hash(self.source)
+            if str(arrays['source_hash']) == h:
+                # The file was touched, but not modified: only refresh the modification time and size
+                arrays['source_mtime'] = np.array(st.st_mtime_ns)
+                arrays['source_size'] = np.array(st.st_size)
+                self._save(arrays)
+            else:
+                arrays = None
+
+        if arrays is None:
+            arrays = build_table(species, data_dir, source_hash=h)
+            self._save(arrays)
+
+        self.Te = arrays['Te']
+        self._logTe = np.log(self.Te)
+        self.kinds = sorted(k[:-len('_rate')] for k in arrays if k.endswith('_rate'))
+        self._arrays = arrays
+        self._logs = {k: np.log(np.maximum(arrays[k], np.finfo(np.float64).tiny))
+                      for k in arrays if k.endswith('_rate') or k.endswith('_xsec')}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        with np.load(self.path) as data:
+            if int(data['version']) != VERSION:
+                return None
+            return {k: data[k] for k in data.files}
+
+    def _save(self, arrays):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _interp(self, name, Te):
+        if name not in self._logs:
+            raise KeyError("No '{}' cross section for {}".format(name.split('_')[0], self.species))
+        Te = np.asarray(Te, dtype=np.float64)
+        outside = np.isfinite(Te) & ((Te < self.Te[0]) | (Te > self.Te[-1]))
+        if np.any(outside):
+            raise ValueError("Electron temperatures outside of the table ({:g}-{:g} eV): {}".format(
+                self.Te[0], self.Te[-1], np.unique(Te[outside])[:5]))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.exp(np.interp(np.log(Te), self._logTe, self._logs[name]))
+
+    def xsec(self, kind, Te):
+        ''' Maxwellian-averaged cross section (m2) of a kind ('el', 'ex', 'iz') at Te (eV) '''
+        return self._interp(kind + '_xsec', Te)
+
+    def rate(self, kind, Te):
+        ''' Maxwellian rate coefficient (m3/s) of a kind ('el', 'ex', 'iz') at Te (eV) '''
+        return self._interp(kind + '_rate', Te)
+
+    def sigma(self, kind, energy):
+        ''' Cross section (m2) of a kind at the electron energies (eV) '''
+        e = self._arrays[kind + '_energy']
+        s = self._arrays[kind + '_sigma']
+        return np.interp(energy, e, s, left=0.0, right=s[-1])
+
+
+def check_against_holder(table, kinds=('iz',), Te=TE_GRID):
+    '''
+    Compare the Maxwellian-averaged cross sections of a table to those of the collision
+    holder of the cathode package.
+    Inputs:
+        - table: CollisionTable
+        - kinds: kinds to compare
+        - Te: electron temperatures (eV)
+    Outputs:
+        - dictionary {kind: maximum relative difference over Te}
+    '''
+    from cathode.models.taunay_et_al_core.collision_holder import collision_holder
+    chold = collision_holder(table.species)
+
+    out = {}
+    for kind in kinds:
+        ref = np.asarray(chold.xsec(kind, Te), dtype=np.float64)
+        val = table.xsec(kind, Te)
+        scale = np.maximum(np.abs(ref), np.finfo(np.float64).tiny)
+        out[kind] = np.nanmax(np.abs(val - ref) / scale)
+    return out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the binary cross section tables")
+    parser.add_argument('species', nargs='+', help="Gases, e.g. Ar Xe")
+    parser.add_argument('--data', default='data', help="Directory of the LXCAT files")
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY, help="Directory of the tables")
+    parser.add_argument('--check', action='store_true',
+                        help="Compare the ionization cross section to that of the collision holder")
+    args = parser.parse_args()
+
+    for species in args.species:
+        table = CollisionTable(species, args.data, args.directory)
+        print(species, ":", table.source, "->", table.path, "(" + ", ".join(table.kinds) + ";",
+              "{:.1f} kB)".format(os.path.getsize(table.path) / 1e3))
+        if args.check:
+            for kind, err in check_against_holder(table).items():
+                print("    {}: max. relative difference to collision_holder {:.2e}".format(kind, err))